@@ -0,0 +1,1180 @@
+"""
+ezText Benchmarks
+
+Usage:
+    python benchmark.py injection [--event-cost SECONDS]
+    python benchmark.py dispatch [--events N]
+    python benchmark.py table [--rows N] [--widget-rows N]
+    python benchmark.py cache [--rows N]
+    python benchmark.py storage [--sizes N,N,...]
+    python benchmark.py memory [--library PATH] [--rows N]
+    python benchmark.py startup [--runs N] [--budget-ms MS]
+    python benchmark.py theme [--rows N] [--switches N]
+    python benchmark.py update [--checks N]
+    python benchmark.py download [--size-mb N]
+    python benchmark.py delta [--files N] [--changed N]
+    python benchmark.py latency [--fires N] [--event-cost SECONDS]
+    python benchmark.py commands [--requests N]
+    python benchmark.py modes [--runs N] [--rows N] [--settle SECONDS]
+    python benchmark.py reload [--rows N] [--edits N]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from database import ShortcutDatabase
+from diagnostics import resident_memory
+from hotkeys import ChordDispatcher, HotkeyRegistry
+from injector import InjectionWorker, RecordingBackend, TextInjector, MODE_TYPE, MODE_PASTE
+from snippets import SnippetStore
+from storage import SnapshotCache, atomic_write, parse_ini, serialize_ini
+
+
+def bench_injection(args):
+    """Compare chars/second of the typing and paste engines"""
+    sizes = [50, 500, 2_000, 20_000]
+
+    print(f"Key event cost: {args.event_cost * 1000:.3f} ms, "
+          f"clipboard restore delay: {args.restore_delay * 1000:.0f} ms")
+    print(f"{'chars':>8} {'type chars/s':>14} {'paste chars/s':>14} {'speedup':>9}")
+
+    for size in sizes:
+        text = ('lorem ipsum ' * (size // 12 + 1))[:size]
+        rates = {}
+        for mode in (MODE_TYPE, MODE_PASTE):
+            backend = RecordingBackend(event_cost=args.event_cost)
+            injector = TextInjector(backend=backend, restore_delay=args.restore_delay)
+            start = time.perf_counter()
+            injector.inject(text, mode)
+            elapsed = time.perf_counter() - start
+            rates[mode] = size / elapsed if elapsed else float('inf')
+        speedup = rates[MODE_PASTE] / rates[MODE_TYPE]
+        print(f"{size:>8} {rates[MODE_TYPE]:>14,.0f} {rates[MODE_PASTE]:>14,.0f} {speedup:>8.1f}x")
+
+
+class FakeKeyEvent:
+    """Minimal stand-in for keyboard.KeyboardEvent"""
+
+    __slots__ = ('event_type', 'scan_code', 'name', 'time')
+
+    def __init__(self, event_type, scan_code, name):
+        self.event_type = event_type
+        self.scan_code = scan_code
+        self.name = name
+        self.time = time.time()
+
+
+class FakeKeyboard:
+    """Keyboard backend with a synthetic scan code table and no OS hook"""
+
+    def __init__(self):
+        self._codes = {}
+
+    def key_to_scan_codes(self, key):
+        return (self._codes.setdefault(key, 1000 + len(self._codes)),)
+
+    def hook(self, callback):
+        return callback
+
+    def unhook(self, callback):
+        pass
+
+    def send(self, hotkey):
+        pass
+
+
+def synthetic_shortcuts(count):
+    """Generate distinct single-key chords"""
+    modifiers = ['ctrl', 'alt', 'shift', 'win']
+    combos = [m for r in range(1, 5) for m in itertools.combinations(modifiers, r)]
+    for i in range(count):
+        yield '+'.join(combos[i % len(combos)]) + f'+key{i // len(combos)}'
+
+
+def bench_dispatch(args):
+    """Per-keystroke dispatch cost at 10, 1k and 10k shortcuts"""
+    print(f"{'shortcuts':>10} {'dispatcher ns/event':>20} {'per-handler ns/event':>21}")
+
+    for count in (10, 1_000, 10_000):
+        backend = FakeKeyboard()
+        dispatcher = ChordDispatcher(backend)
+        registry = HotkeyRegistry(lambda shortcut: (lambda event_time: None), backend=dispatcher)
+        shortcuts = list(synthetic_shortcuts(count))
+        registry.refresh(shortcuts)
+
+        # Typing stream: ctrl held while plain keys are pressed and released
+        ctrl_code = backend.key_to_scan_codes('ctrl')[0]
+        events = [FakeKeyEvent('down', ctrl_code, 'ctrl')]
+        for i in range(args.events):
+            code = backend.key_to_scan_codes(f'key{i % 50}')[0]
+            events.append(FakeKeyEvent('down', code, f'key{i % 50}'))
+            events.append(FakeKeyEvent('up', code, f'key{i % 50}'))
+        events.append(FakeKeyEvent('up', ctrl_code, 'ctrl'))
+
+        start = time.perf_counter()
+        for event in events:
+            dispatcher.dispatch(event)
+        single = (time.perf_counter() - start) / len(events) * 1e9
+
+        # Baseline: one handler per shortcut, each checking the event
+        handlers = [dispatcher.parse_hotkey(shortcut) for shortcut in shortcuts]
+        held = 0
+        start = time.perf_counter()
+        for event in events:
+            if event.name == 'ctrl':
+                held = 1 if event.event_type == 'down' else 0
+                continue
+            for mask, codes in handlers:
+                if event.event_type == 'down' and held == mask and event.scan_code in codes:
+                    pass
+        baseline = (time.perf_counter() - start) / len(events) * 1e9
+
+        print(f"{count:>10,} {single:>20,.0f} {baseline:>21,.0f}")
+
+
+def synthetic_library(count):
+    """Generate (shortcut, text) pairs for table and storage benchmarks"""
+    for i, shortcut in enumerate(synthetic_shortcuts(count)):
+        yield shortcut, f'Snippet {i}: ' + 'boilerplate text ' * (i % 8 + 1)
+
+
+def bench_table(args):
+    """Memory and load time of the shortcut table model vs. per-cell widgets"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem, QCheckBox
+    from table_model import ShortcutTableModel
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    rows = list(synthetic_library(args.rows))
+    texts = dict(rows)
+    before = resident_memory()
+    start = time.perf_counter()
+    model = ShortcutTableModel(texts)
+    view = QTableView()
+    view.setModel(model)
+    model.reset_rows(texts)
+    view.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    used = resident_memory() - before
+
+    start = time.perf_counter()
+    model.set_all_checked(True)
+    checked = len(model.checked_rows())
+    select_time = time.perf_counter() - start
+
+    print(f"Model/view, {args.rows:,} rows: load {elapsed * 1000:,.0f} ms, "
+          f"+{used / 2**20:,.1f} MB RSS, select all + collect {select_time * 1000:,.1f} ms ({checked:,})")
+
+    view.close()
+    del view, model
+
+    if args.widget_rows:
+        rows = rows[:args.widget_rows]
+        before = resident_memory()
+        start = time.perf_counter()
+        table = QTableWidget()
+        table.setColumnCount(3)
+        for shortcut, text in rows:
+            row = table.rowCount()
+            table.insertRow(row)
+            table.setCellWidget(row, 0, QCheckBox())
+            table.setItem(row, 1, QTableWidgetItem(text))
+            table.setItem(row, 2, QTableWidgetItem(shortcut))
+        table.show()
+        app.processEvents()
+        elapsed = time.perf_counter() - start
+        used = resident_memory() - before
+        print(f"QTableWidget + QCheckBox, {len(rows):,} rows: load {elapsed * 1000:,.0f} ms, "
+              f"+{used / 2**20:,.1f} MB RSS")
+        table.close()
+
+
+def bench_cache(args):
+    """Library load time: INI parsing vs. the binary snapshot cache"""
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'library.ini')
+        atomic_write(source, serialize_ini(dict(synthetic_library(args.rows))))
+        cache = SnapshotCache(os.path.join(directory, 'cache'))
+
+        start = time.perf_counter()
+        parsed = parse_ini(source)
+        parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cache.load(source)  # miss: parse and write the cache
+        miss_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached = cache.load(source)
+        hit_time = time.perf_counter() - start
+
+        assert cached == parsed
+        print(f"{args.rows:,} rows, INI {os.path.getsize(source) / 2**20:,.1f} MB, "
+              f"cache {os.path.getsize(cache.cache_path(source)) / 2**20:,.1f} MB")
+        print(f"  configparser:     {parse_time * 1000:>8,.1f} ms")
+        print(f"  cache miss+write: {miss_time * 1000:>8,.1f} ms")
+        print(f"  cache hit:        {hit_time * 1000:>8,.1f} ms ({parse_time / hit_time:,.1f}x faster)")
+
+
+def bench_storage(args):
+    """Load, search and single-row update: INI file vs. SQLite database"""
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"{'entries':>8} {'backend':>8} {'load ms':>10} {'search ms':>10} {'update ms':>10}")
+
+    for size in sizes:
+        library = dict(synthetic_library(size))
+        # Single-word query hitting a handful of rows
+        query = f'{size // 2}:'
+        target = next(iter(library))
+
+        with tempfile.TemporaryDirectory() as directory:
+            ini_path = os.path.join(directory, 'library.ini')
+            atomic_write(ini_path, serialize_ini(library))
+
+            start = time.perf_counter()
+            shortcuts, engines, triggers = parse_ini(ini_path)
+            load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            hits = [s for s, text in shortcuts.items() if query in text]
+            search_time = time.perf_counter() - start
+
+            # An INI edit rewrites the whole file
+            start = time.perf_counter()
+            shortcuts[target] = 'edited'
+            atomic_write(ini_path, serialize_ini(shortcuts, engines, triggers))
+            update_time = time.perf_counter() - start
+            print(f"{size:>8,} {'ini':>8} {load_time * 1000:>10,.1f} {search_time * 1000:>10,.2f} "
+                  f"{update_time * 1000:>10,.1f}")
+
+            database = ShortcutDatabase(os.path.join(directory, 'library.db'))
+            database.replace_all(library)
+
+            start = time.perf_counter()
+            database.load()
+            load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = database.search(f'{size // 2}')
+            search_time = time.perf_counter() - start
+            assert set(hits) <= set(found), "database search missed rows the INI scan found"
+
+            start = time.perf_counter()
+            database.set(target, 'edited')
+            update_time = time.perf_counter() - start
+            database.close()
+            print(f"{size:>8,} {'sqlite':>8} {load_time * 1000:>10,.1f} {search_time * 1000:>10,.2f} "
+                  f"{update_time * 1000:>10,.1f}")
+
+
+def bench_memory(args):
+    """Snippet text memory: plain strings vs. the deduplicating, compressing store"""
+    if args.library:
+        library = parse_ini(args.library)[0]
+        source = args.library
+    else:
+        # Boilerplate-heavy library: long templates, many of them repeated
+        templates = [f'Template {t}\n' + 'Dear customer, thank you for contacting support. ' * (20 + t)
+                     for t in range(50)]
+        library = {shortcut: templates[i % len(templates)] + (f'Ref {i}' if i % 3 == 0 else '')
+                   for i, shortcut in enumerate(synthetic_shortcuts(args.rows))}
+        source = f'synthetic, {args.rows:,} entries'
+
+    store = SnippetStore(compress_threshold=args.threshold)
+    start = time.perf_counter()
+    store.update(library)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for shortcut in itertools.islice(store, 1000):
+        store[shortcut]
+    read_time = (time.perf_counter() - start) / min(1000, len(store))
+
+    report = store.memory_report()
+    print(f"Library: {source}")
+    print(f"  entries {report['entries']:,}, unique texts {report['unique']:,}, "
+          f"compressed {report['compressed']:,}")
+    print(f"  plain strings: {report['plain_bytes'] / 2**20:,.2f} MB")
+    print(f"  snippet store: {report['stored_bytes'] / 2**20:,.2f} MB "
+          f"({report['plain_bytes'] / max(1, report['stored_bytes']):,.1f}x smaller)")
+    print(f"  build {build_time * 1000:,.0f} ms, read {read_time * 1e6:,.1f} us/text")
+
+
+# Run in benchmark child processes after ezText is imported: the engine's
+# settings become an INI file under the temporary LOCALAPPDATA (the library
+# is already kept there), so the user's settings and registry stay untouched
+ISOLATED_SETTINGS = r"""
+import os
+import engine
+from PyQt6.QtCore import QSettings
+QSettings.setPath(QSettings.Format.IniFormat, QSettings.Scope.UserScope, os.environ['LOCALAPPDATA'])
+engine.QSettings = lambda organization, application: QSettings(
+    QSettings.Format.IniFormat, QSettings.Scope.UserScope, organization, application)
+"""
+
+# Child process for the startup benchmark: times the ezText import, window
+# construction and the first hotkey registration, then exits without
+# entering the event loop
+STARTUP_PROBE = r"""
+import json, os, sys, time
+start = time.perf_counter()
+import ezText
+imported = time.perf_counter()
+""" + ISOLATED_SETTINGS + r"""
+from hotkeys import HotkeyRegistry
+first_hotkey = []
+register = HotkeyRegistry.register
+def timed_register(self, shortcut):
+    if not first_hotkey:
+        first_hotkey.append(time.perf_counter())
+    return register(self, shortcut)
+HotkeyRegistry.register = timed_register
+
+app = ezText.QApplication(sys.argv)
+window = ezText.TextShortcutApp()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+
+print(json.dumps({
+    'import': imported - start,
+    'first_hotkey': (first_hotkey[0] - start) if first_hotkey else None,
+    'shown': shown - start,
+    'modules': len(sys.modules),
+}))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into (module, self us, cumulative us) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def bench_startup(args):
+    """Import time (-X importtime) and wall-clock time to window and first hotkey"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    imports = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as directory:
+            # Every cold start gets fresh settings and an empty library
+            env = dict(os.environ, LOCALAPPDATA=directory)
+            process = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', STARTUP_PROBE],
+                cwd=here, env=env, capture_output=True, text=True, timeout=120
+            )
+        lines = [line for line in process.stdout.splitlines() if line.startswith('{')]
+        if process.returncode != 0 or not lines:
+            print(process.stderr[-2000:])
+            sys.exit("Startup probe failed")
+        results.append(json.loads(lines[-1]))
+        imports = parse_importtime(process.stderr)
+
+    def median_ms(key):
+        values = [result[key] for result in results if result[key] is not None]
+        return statistics.median(values) * 1000 if values else float('nan')
+
+    print(f"Runs: {args.runs} (fresh settings and library each)")
+    print(f"  import ezText:      {median_ms('import'):>8,.0f} ms")
+    print(f"  first hotkey:       {median_ms('first_hotkey'):>8,.0f} ms")
+    print(f"  window shown:       {median_ms('shown'):>8,.0f} ms")
+    print(f"  modules loaded:     {results[-1]['modules']:>8,}")
+
+    print("Slowest imports (self time):")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:>8,.1f} ms self {cumulative_us / 1000:>8,.1f} ms cumulative  {name}")
+
+    if args.budget_ms and median_ms('first_hotkey') > args.budget_ms:
+        sys.exit(f"Time to first hotkey {median_ms('first_hotkey'):,.0f} ms exceeds "
+                 f"the {args.budget_ms:,.0f} ms budget")
+
+
+def bench_theme(args):
+    """Theme switch latency with a loaded table: rebuild-every-time vs. cached + skip"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+                                 QTableView, QPushButton, QLineEdit, QCheckBox)
+    import theme
+    from table_model import ShortcutTableModel
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    # Window resembling the main window: inputs, buttons, checkboxes and the table
+    window = QMainWindow()
+    central = QWidget()
+    layout = QVBoxLayout(central)
+    row = QHBoxLayout()
+    for i in range(6):
+        row.addWidget(QPushButton(f'Button {i}'))
+        row.addWidget(QCheckBox(f'Check {i}'))
+    layout.addLayout(row)
+    layout.addWidget(QLineEdit())
+    texts = dict(synthetic_library(args.rows))
+    model = ShortcutTableModel(texts)
+    model.reset_rows(texts)
+    view = QTableView()
+    view.setModel(model)
+    layout.addWidget(view)
+    window.setCentralWidget(central)
+    window.resize(900, 700)
+    window.show()
+    app.processEvents()
+
+    def timed(apply):
+        samples = []
+        for i in range(args.switches):
+            start = time.perf_counter()
+            apply(theme.THEMES[i % 2])
+            app.processEvents()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1000
+
+    def rebuild(name):
+        # Previous behavior: format the stylesheet on every call
+        window.setStyleSheet(theme.STYLESHEET_TEMPLATE.format(**THEME_COLORS_COPY[name]))
+
+    THEME_COLORS_COPY = {name: dict(colors) for name, colors in theme.THEME_COLORS.items()}
+    current = [None]
+
+    def cached(name):
+        if name == current[0]:
+            return
+        current[0] = name
+        window.setPalette(theme.palette(name))
+        window.setStyleSheet(theme.stylesheet(name))
+
+    print(f"{args.rows:,} rows loaded, median of {args.switches} switches")
+    print(f"  rebuild + setStyleSheet per switch: {timed(rebuild):>8,.2f} ms")
+    print(f"  cached stylesheet + palette:        {timed(cached):>8,.2f} ms")
+
+    # Same theme re-applied (e.g. a watcher event without a flip)
+    samples = []
+    for _ in range(args.switches):
+        start = time.perf_counter()
+        rebuild('dark')
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    print(f"  unchanged theme, rebuild:           {statistics.median(samples) * 1000:>8,.2f} ms")
+    cached('dark')
+    samples = []
+    for _ in range(args.switches):
+        start = time.perf_counter()
+        cached('dark')
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    print(f"  unchanged theme, skipped:           {statistics.median(samples) * 1000:>8,.2f} ms")
+    window.close()
+
+
+def bench_update(args):
+    """Release checks against a local stand-in server: plain vs. conditional/cached"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from updater import AutoUpdater
+
+    # A release payload about the size of a real GitHub response
+    release = json.dumps({
+        'tag_name': 'v9.9.9',
+        'html_url': 'http://localhost/releases/v9.9.9',
+        'body': 'Release notes\n' * 2000,
+        'assets': [{'name': 'ezText_Setup.exe', 'browser_download_url': 'http://localhost/ezText_Setup.exe',
+                    'size': 40_000_000, 'digest': 'sha256:' + '0' * 64, 'uploader': {'login': 'x' * 40}}],
+    }).encode()
+    etag = '"release-1"'
+    state = {'full': 0, 'not_modified': 0, 'fail': False}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if state['fail']:
+                self.send_error(503)
+                return
+            if self.headers.get('If-None-Match') == etag:
+                state['not_modified'] += 1
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            state['full'] += 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(release)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', 'Mon, 01 Jan 2024 00:00:00 GMT')
+            self.end_headers()
+            self.wfile.write(release)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/releases/latest'
+
+    def run(label, make_updater, force):
+        state['full'] = state['not_modified'] = 0
+        updater = make_updater()
+        start = time.perf_counter()
+        for _ in range(args.checks):
+            if make_updater is fresh:
+                updater = fresh()
+            available, info = updater.check_for_updates(force=force)
+            assert available and info['version'] == '9.9.9', (available, info)
+        elapsed = (time.perf_counter() - start) / args.checks * 1000
+        print(f"  {label:<36} {elapsed:>8.2f} ms/check  "
+              f"{state['full']:>4} full  {state['not_modified']:>4} not modified")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'update-cache.json')
+        print(f"{args.checks} checks, {len(release):,} byte release payload")
+        def fresh():
+            return AutoUpdater('1.0.0', 'o', 'r', api_url=url)
+
+        def cached():
+            return AutoUpdater('1.0.0', 'o', 'r', cache_path, api_url=url)
+
+        # Without a cache every check downloads and parses the full release
+        run('uncached (previous behavior)', fresh, True)
+        run('manual, conditional (304)', cached, True)
+        run('automatic, within interval', cached, False)
+
+        # A fresh instance must pick the validators up from disk
+        state['full'] = state['not_modified'] = 0
+        AutoUpdater('1.0.0', 'o', 'r', cache_path, check_interval=0, api_url=url).check_for_updates()
+        print(f"  restart, interval elapsed: {state['full']} full, {state['not_modified']} not modified")
+
+        # Concurrent checks on one updater are serialized; only the first goes out
+        state['full'] = state['not_modified'] = 0
+        updater = AutoUpdater('1.0.0', 'o', 'r', os.path.join(tmp, 'concurrent.json'), api_url=url)
+        threads = [threading.Thread(target=updater.check_for_updates) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(f"  8 concurrent automatic checks: {state['full']} full request(s)")
+
+        # Failures back off: later automatic checks don't reach the server
+        state['fail'] = True
+        failing = AutoUpdater('1.0.0', 'o', 'r', os.path.join(tmp, 'failing.json'), check_interval=0, api_url=url)
+        for _ in range(3):
+            failing.check_for_updates()
+        with open(os.path.join(tmp, 'failing.json'), encoding='utf-8') as f:
+            cache = json.load(f)
+        print(f"  3 automatic checks while failing: {failing.requests} request(s), "
+              f"retry in {cache['retry_at'] - time.time():.0f} s")
+
+    server.shutdown()
+
+
+def bench_download(args):
+    """Installer download against a local server: urlretrieve vs. streamed, resumed, reused"""
+    import hashlib
+    import threading
+    import urllib.request
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from updater import DownloadCancelled, download_file
+
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    sha256 = hashlib.sha256(payload).hexdigest()
+    served = {'bytes': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            start = 0
+            ranged = self.headers.get('Range')
+            if ranged and self.headers.get('If-Range') == '"installer"':
+                start = int(ranged.split('=')[1].split('-')[0])
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{len(payload) - 1}/{len(payload)}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', str(len(payload) - start))
+            self.send_header('ETag', '"installer"')
+            self.end_headers()
+            try:
+                for offset in range(start, len(payload), 64 * 1024):
+                    chunk = payload[offset:offset + 64 * 1024]
+                    self.wfile.write(chunk)
+                    served['bytes'] += len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/ezText_Setup.exe'
+    print(f"{args.size_mb} MB installer")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ezText_Setup.exe')
+
+        # Previous behavior: a callback (status update + processEvents) per 8 KB block
+        calls = [0]
+
+        def reporthook(block_count, block_size, total_size):
+            calls[0] += 1
+
+        start = time.perf_counter()
+        urllib.request.urlretrieve(url, path, reporthook=reporthook)
+        elapsed = time.perf_counter() - start
+        print(f"  urlretrieve:          {elapsed * 1000:>8,.0f} ms  {calls[0]:>6,} progress callbacks")
+        os.remove(path)
+
+        calls[0] = 0
+
+        def progress(downloaded, total):
+            calls[0] += 1
+
+        served['bytes'] = 0
+        start = time.perf_counter()
+        download_file(url, path, sha256, progress=progress)
+        elapsed = time.perf_counter() - start
+        print(f"  streamed + verified:  {elapsed * 1000:>8,.0f} ms  {calls[0]:>6,} progress callbacks")
+
+        # Interrupt half-way, then resume
+        os.remove(path)
+        cancel = threading.Event()
+
+        def cancel_half_way(downloaded, total):
+            if downloaded >= total // 2:
+                cancel.set()
+
+        try:
+            download_file(url, path, sha256, progress=cancel_half_way, cancel_event=cancel, progress_interval=0)
+        except DownloadCancelled:
+            pass
+        partial = os.path.getsize(path + '.part')
+        served['bytes'] = 0
+        start = time.perf_counter()
+        download_file(url, path, sha256)
+        elapsed = time.perf_counter() - start
+        print(f"  resumed at {partial / 1024 / 1024:,.1f} MB:   {elapsed * 1000:>8,.0f} ms  "
+              f"{served['bytes'] / 1024 / 1024:,.1f} MB transferred")
+
+        served['bytes'] = 0
+        start = time.perf_counter()
+        downloaded = download_file(url, path, sha256)
+        elapsed = time.perf_counter() - start
+        print(f"  already downloaded:   {elapsed * 1000:>8,.0f} ms  reused={not downloaded}, "
+              f"{served['bytes']:,} bytes transferred")
+
+        try:
+            download_file(url, os.path.join(tmp, 'bad.exe'), '0' * 64)
+        except ValueError as e:
+            print(f"  wrong hash:           rejected ({e}), "
+                  f"part kept: {os.path.exists(os.path.join(tmp, 'bad.exe.part'))}")
+
+    server.shutdown()
+
+
+def bench_delta(args):
+    """Delta update between two synthetic bundle versions vs. the full bundle size"""
+    import functools
+    import random
+    import shutil
+    import threading
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+    from updater import AutoUpdater, DownloadCancelled, build_manifest
+
+    rng = random.Random(1)
+
+    def write(path, size):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(rng.randbytes(size))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # v1: executable plus a library tree; v2 changes a few files and adds one
+        v1 = os.path.join(tmp, 'v1')
+        write(os.path.join(v1, 'ezText.exe'), 4 * 1024 * 1024)
+        for i in range(args.files):
+            write(os.path.join(v1, '_internal', f'lib{i // 50}', f'module{i}.pyd'), rng.randint(20_000, 400_000))
+        v2 = os.path.join(tmp, 'v2')
+        shutil.copytree(v1, v2)
+        write(os.path.join(v2, 'ezText.exe'), 4 * 1024 * 1024)
+        for i in rng.sample(range(args.files), args.changed):
+            write(os.path.join(v2, '_internal', f'lib{i // 50}', f'module{i}.pyd'), 100_000)
+        write(os.path.join(v2, '_internal', 'new', 'added.pyd'), 50_000)
+        manifest_v1 = build_manifest(v1, '1.0.0')
+        manifest_v2 = build_manifest(v2, '2.0.0')
+        with open(os.path.join(v2, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest_v2, f)
+
+        served = {'bytes': 0}
+
+        class Handler(SimpleHTTPRequestHandler):
+            def copyfile(self, source, outputfile):
+                data = source.read()
+                served['bytes'] += len(data)
+                outputfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Handler, directory=v2))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        manifest_url = f'http://127.0.0.1:{server.server_address[1]}/manifest.json'
+
+        full = sum(entry['size'] for entry in manifest_v2['files'].values())
+        install = os.path.join(tmp, 'install')
+
+        def fresh_install():
+            shutil.rmtree(install, ignore_errors=True)
+            shutil.copytree(v1, install)
+            return AutoUpdater('1.0.0', 'o', 'r', install_dir=install)
+
+        def matches(manifest):
+            updater = AutoUpdater('1.0.0', 'o', 'r', install_dir=install)
+            return not updater.plan_delta(manifest) and not updater.plan_removals(manifest)
+
+        print(f"{len(manifest_v2['files'])} files, full bundle {full / 1024 / 1024:,.1f} MB")
+
+        updater = fresh_install()
+        start = time.perf_counter()
+        manifest = updater.fetch_manifest(manifest_url, '2.0.0')
+        planned = updater.plan_delta(manifest)
+        plan_ms = (time.perf_counter() - start) * 1000
+        served['bytes'] = 0
+        start = time.perf_counter()
+        count = updater.apply_delta(manifest)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  plan: {len(planned)} changed files in {plan_ms:,.0f} ms")
+        print(f"  delta: {count} files, {served['bytes'] / 1024 / 1024:,.2f} MB transferred "
+              f"({served['bytes'] / full:.1%} of full) in {elapsed:,.0f} ms; "
+              f"matches v2: {matches(manifest_v2)}, staging left: {os.path.exists(os.path.join(install, '_update'))}")
+
+        # Interrupted once the executable is staged, then resumed (the test
+        # server ignores Range, so only completely staged files are reused)
+        updater = fresh_install()
+        cancel = threading.Event()
+        exe_size = manifest['files']['ezText.exe']['size']
+        try:
+            updater.apply_delta(manifest, progress=lambda done, total: done > exe_size and cancel.set(),
+                                cancel_event=cancel)
+        except DownloadCancelled:
+            pass
+        print(f"  cancelled mid-download: install unchanged: {matches(manifest_v1)}")
+        served['bytes'] = 0
+        updater.apply_delta(manifest)
+        print(f"  resumed: {served['bytes'] / 1024 / 1024:,.2f} MB transferred, matches v2: {matches(manifest_v2)}")
+
+        # A file that doesn't match the manifest aborts before anything is swapped
+        updater = fresh_install()
+        write(os.path.join(v2, '_internal', 'new', 'added.pyd'), 50_000)
+        try:
+            updater.apply_delta(manifest)
+        except ValueError as e:
+            print(f"  corrupt file on server: {e}; install unchanged: {matches(manifest_v1)}")
+
+        server.shutdown()
+
+
+def bench_latency(args):
+    """Hotkey latency recording: cost on the hook path and a simulated fire stream"""
+    from diagnostics import (LatencyStats, LATENCY_KEY_TO_CALLBACK, LATENCY_CALLBACK_TO_INJECTION,
+                             LATENCY_INJECTION)
+
+    stats = LatencyStats()
+    samples = [0.0001 * (i % 500) for i in range(100_000)]
+    start = time.perf_counter()
+    for i, sample in enumerate(samples):
+        stats.record('ctrl+key1', LATENCY_KEY_TO_CALLBACK, sample)
+    record_ns = (time.perf_counter() - start) / len(samples) * 1e9
+    print(f"record(): {record_ns:,.0f} ns/sample")
+
+    # Fires go through the dispatcher and worker the way ezText wires them
+    stats = LatencyStats()
+    backend = FakeKeyboard()
+    dispatcher = ChordDispatcher(backend)
+    injector = TextInjector(backend=RecordingBackend(event_cost=args.event_cost))
+    worker = InjectionWorker(injector, max_pending=args.fires, on_injected=lambda shortcut, queued, duration: (
+        stats.record(shortcut, LATENCY_CALLBACK_TO_INJECTION, queued),
+        stats.record(shortcut, LATENCY_INJECTION, duration)))
+    worker.start()
+
+    def make_callback(shortcut):
+        def callback(event_time):
+            fired = time.perf_counter()
+            stats.record(shortcut, LATENCY_KEY_TO_CALLBACK, time.time() - event_time)
+            worker.submit(f'text of {shortcut}', MODE_TYPE, shortcut, fired=fired)
+        return callback
+
+    registry = HotkeyRegistry(make_callback, backend=dispatcher)
+    shortcuts = [f'ctrl+key{i}' for i in range(5)]
+    registry.refresh(shortcuts)
+    ctrl_code = backend.key_to_scan_codes('ctrl')[0]
+    dispatcher.dispatch(FakeKeyEvent('down', ctrl_code, 'ctrl'))
+    for i in range(args.fires):
+        code = backend.key_to_scan_codes(f'key{i % 5}')[0]
+        dispatcher.dispatch(FakeKeyEvent('down', code, f'key{i % 5}'))
+        dispatcher.dispatch(FakeKeyEvent('up', code, f'key{i % 5}'))
+        time.sleep(0.002)
+    while worker.depth:
+        time.sleep(0.01)
+    worker.stop()
+    print()
+    print(stats.format())
+
+
+def bench_commands(args):
+    """Command channel round trips over a real local socket"""
+    import socket
+    import threading
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from command_server import (CommandServer, CommandError, DEFERRED, send_command, server_path)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    name = f'ezText_benchmark_{os.getpid()}'
+    shown = []
+
+    def deferred(argument, reply):
+        threading.Thread(target=lambda: (time.sleep(0.05), reply(True, {'slow': argument}))).start()
+        return DEFERRED
+
+    def fail(argument, reply):
+        raise CommandError('failed on purpose')
+
+    server = CommandServer()
+    server.register('STATS', lambda argument, reply: {'entries': 1234, 'counters': {'fires': 5}})
+    server.register('SHOW', lambda argument, reply: shown.append(argument) or {})
+    server.register('SLOW', deferred)
+    server.register('FAIL', fail)
+    assert server.listen(name), server.server.errorString()
+
+    results = {}
+
+    def client():
+        try:
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                send_command('STATS', name=name)
+            results['round_trip_ms'] = (time.perf_counter() - start) / args.requests * 1000
+
+            try:
+                send_command('NOPE', name=name)
+            except CommandError as e:
+                results['unknown'] = str(e)
+            try:
+                send_command('FAIL', name=name)
+            except CommandError as e:
+                results['error'] = str(e)
+
+            if sys.platform != 'win32':
+                # Pipelined on one connection: the slow reply must still come first
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(server_path(name))
+                    sock.sendall(b'SLOW first\nSTATS\n')
+                    with sock.makefile('rb') as stream:
+                        results['pipelined'] = [stream.readline().decode().strip() for _ in range(2)]
+
+                # Legacy second instance: bare SHOW, then disconnect
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(server_path(name))
+                    sock.sendall(b'SHOW')
+                time.sleep(0.1)
+        finally:
+            results['done'] = True
+
+    if sys.platform == 'win32':
+        print("(pipelining and legacy checks use Unix sockets; round trips only)")
+    thread = threading.Thread(target=client)
+    thread.start()
+    timer = QTimer()
+    timer.timeout.connect(lambda: results.get('done') and app.quit())
+    timer.start(10)
+    app.exec()
+    thread.join()
+    server.close()
+
+    print(f"STATS round trip:   {results.get('round_trip_ms', float('nan')):.3f} ms (new connection each)")
+    print(f"unknown command:    ERR {results.get('unknown')}")
+    print(f"handler error:      ERR {results.get('error')}")
+    print(f"pipelined replies:  {results.get('pipelined')}")
+    print(f"legacy bare SHOW:   handled={bool(shown)}, requests served={server.requests}")
+
+
+# Child process for the modes benchmark: ezText's normal startup (the
+# command line picks the mode) with isolated settings
+MODES_PROBE = r"""
+import ezText
+""" + ISOLATED_SETTINGS + r"""
+ezText.main()
+"""
+
+
+def bench_modes(args):
+    """Startup time and resident memory of the full window vs. --headless"""
+    from command_server import CommandError, send_command
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        send_command('STATS', timeout=1.0)
+        sys.exit("Another ezText instance is running; exit it first")
+    except (CommandError, OSError):
+        pass
+
+    def run(extra):
+        with tempfile.TemporaryDirectory() as directory:
+            # Fresh settings and a synthetic library for every launch
+            os.mkdir(os.path.join(directory, 'ezText'))
+            atomic_write(os.path.join(directory, 'ezText', 'ezTextShortcut.ini'),
+                         serialize_ini(dict(synthetic_library(args.rows))))
+            env = dict(os.environ, LOCALAPPDATA=directory)
+            start = time.perf_counter()
+            process = subprocess.Popen([sys.executable, '-c', MODES_PROBE, *extra], cwd=here, env=env)
+            try:
+                # The command server answers once the engine is up
+                while True:
+                    if process.poll() is not None:
+                        sys.exit(f"ezText {' '.join(extra) or '(window)'} exited with {process.returncode}")
+                    try:
+                        send_command('STATS', timeout=1.0)
+                        break
+                    except (CommandError, OSError):
+                        time.sleep(0.01)
+                answered = time.perf_counter() - start
+                # Let incremental registration and the first paint finish
+                time.sleep(args.settle)
+                stats = send_command('STATS')
+                send_command('QUIT')
+                process.wait(timeout=30)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+            return answered, stats
+
+    print(f"Runs: {args.runs} per mode (fresh settings, {args.rows:,} shortcuts)")
+    for label, extra in (('window', []), ('headless', ['--headless'])):
+        runs = [run(extra) for _ in range(args.runs)]
+        answered = statistics.median(run[0] for run in runs) * 1000
+        startup = statistics.median(run[1]['startup_ms'] for run in runs)
+        resident = [run[1]['resident_bytes'] for run in runs if run[1]['resident_bytes']]
+        memory = f"{statistics.median(resident) / 2**20:,.1f} MB" if resident else 'n/a'
+        print(f"  {label:<9} startup {startup:>7,.0f} ms (to first reply {answered:>7,.0f} ms), "
+              f"resident {memory}, {runs[-1][1]['library']['entries']:,} entries")
+
+
+def bench_reload(args):
+    """Reloading an externally edited library: full reload vs. the engine's diff-based apply"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtCore import QSettings
+    from PyQt6.QtWidgets import QApplication
+    import engine as engine_module
+    from diagnostics import PhaseTimer
+    from engine import ShortcutEngine
+    from ezText import VERSION, TextShortcutApp
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    # Settings go to INI files under each temporary LOCALAPPDATA
+    engine_module.QSettings = lambda organization, application: QSettings(
+        QSettings.Format.IniFormat, QSettings.Scope.UserScope, organization, application)
+
+    library = dict(synthetic_library(args.rows))
+    # A "sync tool" edits some texts, deletes some entries and adds new ones
+    edited = dict(library)
+    shortcuts = list(library)
+    for shortcut in shortcuts[:args.edits]:
+        edited[shortcut] += ' (edited)'
+    for shortcut in shortcuts[-args.edits:]:
+        del edited[shortcut]
+    for i in range(args.edits):
+        edited[f'ctrl+alt+shift+new{i}'] = f'New snippet {i}'
+
+    def wait(predicate, timeout=120.0):
+        """Run the event loop until predicate() holds; False on timeout"""
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                return False
+            app.processEvents()
+            # Leave the GIL to the reload and autosave threads
+            time.sleep(0.0005)
+        return True
+
+    def start(directory, name):
+        """Headless engine with an attached window, registered and idle"""
+        os.environ['LOCALAPPDATA'] = directory
+        QSettings.setPath(QSettings.Format.IniFormat, QSettings.Scope.UserScope, directory)
+        os.mkdir(os.path.join(directory, 'ezText'))
+        atomic_write(os.path.join(directory, 'ezText', 'ezTextShortcut.ini'), serialize_ini(library))
+        engine = ShortcutEngine(
+            VERSION, PhaseTimer(), headless=True, hotkey_backend=FakeKeyboard(),
+            injection_backend=RecordingBackend(), server_name=f'ezText_bench_{name}_{os.getpid()}')
+        engine.settings.setValue('update_check_delay', 24 * 60 * 60 * 1000)
+        engine.load_shortcuts()
+        window = TextShortcutApp(engine=engine)
+        wait(lambda: not engine.registration_queue.pending)
+        return engine, window
+
+    def edit(engine):
+        """Save the edited library as another program would; parsed into the cache untimed"""
+        atomic_write(engine.config_file, serialize_ini(edited))
+        begin = time.perf_counter()
+        engine.snapshot_cache.load(engine.config_file)
+        return time.perf_counter() - begin
+
+    def result(engine, window):
+        model = window.table_model
+        return (dict(engine.shortcuts_dict), sorted(engine.hotkey_registry.registered),
+                sorted(model.shortcut_at(row) for row in range(model.rowCount())))
+
+    def stop(window):
+        window.exit_app()
+        window.deleteLater()
+        app.processEvents()
+
+    # Before: unregister everything, reload every entry, reset the table
+    with tempfile.TemporaryDirectory() as directory:
+        engine, window = start(directory, 'full')
+        parse_time = edit(engine)
+        begin = time.perf_counter()
+        engine.load_shortcuts()
+        assert wait(lambda: not engine.registration_queue.pending), "full reload timed out"
+        full_time = time.perf_counter() - begin
+        full_result = result(engine, window)
+        stop(window)
+
+    # After: the engine parses in the background and applies only the diff
+    with tempfile.TemporaryDirectory() as directory:
+        engine, window = start(directory, 'diff')
+        edit(engine)
+        diffs = []
+        begin = time.perf_counter()
+        engine.reload_shortcuts(done=lambda diff, error: diffs.append(diff))
+        assert wait(lambda: diffs and not engine.registration_queue.pending), "diff reload timed out"
+        diff_time = time.perf_counter() - begin
+        diff_result = result(engine, window)
+
+        # The file watcher ignores the engine's own autosave but picks up
+        # a save made by another program
+        engine.reload_timer.setInterval(50)
+        reloads = engine.live_reloads
+        engine.put_shortcut('ctrl+alt+shift+own', 'Own edit')
+        engine.flush_autosave()
+        own_save = not wait(lambda: engine.reload_running or engine.live_reloads > reloads, timeout=1.0)
+        atomic_write(engine.config_file, serialize_ini(library))
+        external_save = wait(lambda: engine.live_reloads > reloads)
+        stop(window)
+
+    assert diff_result == full_result, "diff apply and full reload disagree"
+    diff = diffs[0]
+    print(f"{args.rows:,} entries, {len(diff.added)} added, {len(diff.removed)} removed, "
+          f"{len(diff.changed)} changed")
+    print(f"  own save ignored: {own_save}, external save detected: {external_save}")
+    print(f"  parse (not timed below): {parse_time * 1000:>8,.1f} ms")
+    print(f"  full reload: {full_time * 1000:>8,.1f} ms")
+    print(f"  diff apply:  {diff_time * 1000:>8,.1f} ms ({full_time / diff_time:,.1f}x faster)")
+
+
+BENCHMARKS = {
+    'injection': bench_injection,
+    'dispatch': bench_dispatch,
+    'table': bench_table,
+    'cache': bench_cache,
+    'storage': bench_storage,
+    'memory': bench_memory,
+    'startup': bench_startup,
+    'theme': bench_theme,
+    'update': bench_update,
+    'download': bench_download,
+    'delta': bench_delta,
+    'latency': bench_latency,
+    'commands': bench_commands,
+    'modes': bench_modes,
+    'reload': bench_reload,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ezText benchmarks')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    injection = subparsers.add_parser('injection', help=bench_injection.__doc__)
+    injection.add_argument('--event-cost', type=float, default=0.0005,
+                           help='Simulated seconds per synthesized key event')
+    injection.add_argument('--restore-delay', type=float, default=0.15,
+                           help='Clipboard restore delay of the paste engine')
+
+    dispatch = subparsers.add_parser('dispatch', help=bench_dispatch.__doc__)
+    dispatch.add_argument('--events', type=int, default=20_000,
+                          help='Number of simulated key presses')
+
+    table = subparsers.add_parser('table', help=bench_table.__doc__)
+    table.add_argument('--rows', type=int, default=100_000, help='Rows loaded into the model')
+    table.add_argument('--widget-rows', type=int, default=10_000,
+                       help='Rows for the QTableWidget baseline (0 to skip)')
+
+    cache = subparsers.add_parser('cache', help=bench_cache.__doc__)
+    cache.add_argument('--rows', type=int, default=50_000, help='Entries in the synthetic library')
+
+    storage = subparsers.add_parser('storage', help=bench_storage.__doc__)
+    storage.add_argument('--sizes', default='1000,10000,100000',
+                         help='Comma-separated library sizes')
+
+    memory = subparsers.add_parser('memory', help=bench_memory.__doc__)
+    memory.add_argument('--library', help='INI library to measure (default: synthetic)')
+    memory.add_argument('--rows', type=int, default=20_000, help='Entries in the synthetic library')
+    memory.add_argument('--threshold', type=int, default=512, help='Compression threshold')
+
+    startup = subparsers.add_parser('startup', help=bench_startup.__doc__)
+    startup.add_argument('--runs', type=int, default=5, help='Number of cold starts (median reported)')
+    startup.add_argument('--top', type=int, default=15, help='Number of slowest imports to list')
+    startup.add_argument('--budget-ms', type=float, default=0,
+                         help='Fail if the time to the first hotkey exceeds this (0: no check)')
+
+    theme = subparsers.add_parser('theme', help=bench_theme.__doc__)
+    theme.add_argument('--rows', type=int, default=10_000, help='Rows loaded into the table')
+    theme.add_argument('--switches', type=int, default=10, help='Theme switches to time')
+
+    update = subparsers.add_parser('update', help=bench_update.__doc__)
+    update.add_argument('--checks', type=int, default=20, help='Checks per scenario')
+
+    download = subparsers.add_parser('download', help=bench_download.__doc__)
+    download.add_argument('--size-mb', type=int, default=64, help='Installer size in MB')
+
+    delta = subparsers.add_parser('delta', help=bench_delta.__doc__)
+    delta.add_argument('--files', type=int, default=300, help='Files in the synthetic bundle')
+    delta.add_argument('--changed', type=int, default=3, help='Files changed between versions')
+
+    latency = subparsers.add_parser('latency', help=bench_latency.__doc__)
+    latency.add_argument('--fires', type=int, default=200, help='Hotkey fires to simulate')
+    latency.add_argument('--event-cost', type=float, default=0.0002, help='Seconds per synthesized key event')
+
+    commands = subparsers.add_parser('commands', help=bench_commands.__doc__)
+    commands.add_argument('--requests', type=int, default=200, help='Sequential STATS requests')
+
+    modes = subparsers.add_parser('modes', help=bench_modes.__doc__)
+    modes.add_argument('--runs', type=int, default=3, help='Launches per mode')
+    modes.add_argument('--rows', type=int, default=1_000, help='Shortcuts in the synthetic library')
+    modes.add_argument('--settle', type=float, default=2.0,
+                       help='Seconds to wait after the first reply before measuring memory')
+
+    reload = subparsers.add_parser('reload', help=bench_reload.__doc__)
+    reload.add_argument('--rows', type=int, default=20_000, help='Library size')
+    reload.add_argument('--edits', type=int, default=10, help='Entries edited, deleted and added each')
+
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+ezText Command Channel
+
+The single-instance local socket doubles as a small command channel, so
+scripts and deployment tooling can drive the running instance without
+starting a second process.
+
+Protocol (UTF-8, one request per line, any number per connection):
+    request:  COMMAND [argument]\n
+    response: OK <json>\n  or  ERR <message>\n
+
+Responses come back in request order. A request without a trailing newline
+that is followed by a disconnect (what older instances send for SHOW) is
+still executed; its response is dropped.
+
+CommandServer does no blocking socket calls: reads and writes are driven
+by the Qt event loop, and handlers that take long (EXPORT) finish on a
+worker thread and reply later.
+
+send_command() is a plain-socket client that needs no event loop, e.g.
+    python command_server.py STATS
+"""
+
+import json
+import os
+import sys
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+# Name of the local socket (also used for the single-instance check)
+SERVER_NAME = 'ezText_SingleInstance'
+
+# Returned by handlers that reply later
+DEFERRED = object()
+
+# Longest accepted request line in bytes (ADD carries snippet text)
+MAX_REQUEST_SIZE = 4 * 1024 * 1024
+
+
+class CommandError(Exception):
+    """Raised by handlers to send an ERR response"""
+
+
+def parse_request(line):
+    """
+    Split a request line
+
+    Returns:
+        tuple: (upper-case command, argument string)
+    """
+    command, _, argument = line.strip().partition(' ')
+    return command.upper(), argument.strip()
+
+
+def format_response(ok, payload):
+    """Encode one response line"""
+    if ok:
+        return ('OK ' + json.dumps(payload, ensure_ascii=False) + '\n').encode('utf-8')
+    # Keep errors on one line
+    message = ' '.join(str(payload).split())
+    return f'ERR {message}\n'.encode('utf-8')
+
+
+def parse_response(line):
+    """
+    Decode one response line
+
+    Returns:
+        object: The OK payload
+
+    Raises:
+        CommandError: The server answered ERR
+    """
+    line = line.decode('utf-8').rstrip('\n')
+    if line.startswith('OK '):
+        return json.loads(line[3:])
+    if line.startswith('ERR'):
+        raise CommandError(line[4:])
+    raise CommandError(f"Malformed response: {line!r}")
+
+
+def server_path(name=SERVER_NAME):
+    """Platform path of a QLocalServer with the given name"""
+    if sys.platform == 'win32':
+        return r'\\.\pipe' + '\\' + name
+    import tempfile  # Not needed at startup: the server listens by name
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def send_command(command, argument='', name=SERVER_NAME, timeout=5.0):
+    """
+    Send one request to a running instance and wait for the response
+
+    Args:
+        command: Command name, e.g. 'STATS'
+        argument: Argument string (must not contain newlines)
+        name: Server name
+        timeout: Seconds to wait (POSIX only; named pipes block)
+
+    Returns:
+        object: The OK payload
+
+    Raises:
+        CommandError: The server answered ERR
+        OSError: No instance is running
+    """
+    request = (f'{command} {argument}'.rstrip() + '\n').encode('utf-8')
+    if '\n' in argument:
+        raise ValueError("Arguments can't contain newlines")
+
+    if sys.platform == 'win32':
+        with open(server_path(name), 'r+b', buffering=0) as pipe:
+            pipe.write(request)
+            line = b''
+            while not line.endswith(b'\n'):
+                chunk = pipe.read(65536)
+                if not chunk:
+                    break
+                line += chunk
+    else:
+        import socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(server_path(name))
+            client.sendall(request)
+            with client.makefile('rb') as stream:
+                line = stream.readline()
+    return parse_response(line)
+
+
+class _Connection:
+    """Read buffer and ordered response slots of one client"""
+
+    __slots__ = ('socket', 'buffer', 'pending', 'discarding')
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.buffer = b''
+        self.pending = []   # [response bytes or None while unanswered], in request order
+        self.discarding = False  # skipping the rest of an oversized request
+
+
+class CommandServer(QObject):
+    """Line-based request/response server on a QLocalServer"""
+
+    # Replies from worker threads are delivered on the GUI thread
+    _deferred_reply = pyqtSignal(object, object, bool, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.handlers = {}      # command -> handler(argument, reply)
+        self.server = QLocalServer(self)
+        # FIRE and ADD act on the desktop, so only the current user may connect
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._deferred_reply.connect(self._send)
+        self._connections = set()
+
+        # Counters for diagnostics
+        self.requests = 0
+        self.errors = 0
+
+    def listen(self, name=SERVER_NAME):
+        """Start listening, replacing a stale server left by a crash"""
+        QLocalServer.removeServer(name)
+        return self.server.listen(name)
+
+    def close(self):
+        self.server.close()
+
+    def register(self, command, handler):
+        """
+        Add a command
+
+        Args:
+            command: Command name (case-insensitive)
+            handler: Callable(argument, reply). Returns the OK payload, or
+                returns DEFERRED and calls reply(ok, payload) later from
+                any thread. Raising an exception answers ERR.
+        """
+        self.handlers[command.upper()] = handler
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = _Connection(self.server.nextPendingConnection())
+            self._connections.add(connection)
+            connection.socket.readyRead.connect(lambda c=connection: self._on_ready_read(c))
+            connection.socket.disconnected.connect(lambda c=connection: self._on_disconnected(c))
+
+    def _on_ready_read(self, connection):
+        connection.buffer += bytes(connection.socket.readAll())
+        while b'\n' in connection.buffer:
+            line, connection.buffer = connection.buffer.split(b'\n', 1)
+            if connection.discarding:
+                # End of an oversized request that was already answered
+                connection.discarding = False
+                continue
+            self._handle(connection, line if len(line) <= MAX_REQUEST_SIZE else None)
+        if len(connection.buffer) > MAX_REQUEST_SIZE:
+            connection.buffer = b''
+            if not connection.discarding:
+                connection.discarding = True
+                self._handle(connection, None)
+
+    def _on_disconnected(self, connection):
+        # Legacy clients send a bare 'SHOW' and disconnect
+        connection.buffer += bytes(connection.socket.readAll())
+        if connection.buffer.strip() and not connection.discarding:
+            line, connection.buffer = connection.buffer, b''
+            self._handle(connection, line)
+        self._connections.discard(connection)
+        connection.socket.deleteLater()
+        connection.socket = None
+
+    def _handle(self, connection, line):
+        slot = [None]
+        connection.pending.append(slot)
+        self.requests += 1
+
+        def reply(ok, payload=None):
+            self._deferred_reply.emit(connection, slot, ok, payload)
+
+        if line is None:
+            reply(False, f"Request too long (over {MAX_REQUEST_SIZE} bytes)")
+            return
+        try:
+            command, argument = parse_request(line.decode('utf-8'))
+            handler = self.handlers.get(command)
+            if handler is None:
+                raise CommandError(f"Unknown command: {command or '(empty)'}")
+            result = handler(argument, reply)
+        except Exception as e:
+            reply(False, e)
+            return
+        if result is not DEFERRED:
+            reply(True, result)
+
+    def _send(self, connection, slot, ok, payload):
+        if not ok:
+            self.errors += 1
+        slot[0] = format_response(ok, payload)
+        # Write every response that is ready, stopping at the first unanswered one
+        pending = connection.pending
+        while pending and pending[0][0] is not None:
+            data = pending.pop(0)[0]
+            socket = connection.socket
+            if socket is not None and socket.state() == QLocalSocket.LocalSocketState.ConnectedState:
+                socket.write(data)
+
+
+if __name__ == '__main__':
+    # Client: python command_server.py COMMAND [argument]
+    if len(sys.argv) < 2:
+        print("usage: python command_server.py COMMAND [argument]")
+        sys.exit(2)
+    try:
+        result = send_command(sys.argv[1], ' '.join(sys.argv[2:]))
+    except (CommandError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
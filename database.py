@@ -0,0 +1,183 @@
+"""
+ezText Shortcut Database
+
+SQLite storage backend for large shortcut libraries (standard-library
+sqlite3, no extra dependency).
+
+Compared with the INI format, a database library is updated one row at a
+time instead of being rewritten, looks shortcuts up through the primary
+key index, and keeps an FTS5 full-text index over shortcuts and snippet
+text. Libraries convert to and from INI with import_ini()/export_ini().
+
+If the SQLite build lacks FTS5, search falls back to a LIKE scan.
+"""
+
+import sqlite3
+
+from storage import atomic_write, parse_ini, serialize_ini
+
+
+SCHEMA_VERSION = 1
+
+
+class ShortcutDatabase:
+    """Shortcut library stored in an SQLite database"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Database file path (created if missing)
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self.has_fts = self._create_schema()
+
+    def _create_schema(self):
+        """Create tables and indexes; returns whether FTS5 is available"""
+        with self._connection:
+            self._connection.execute('''
+                CREATE TABLE IF NOT EXISTS shortcuts (
+                    id INTEGER PRIMARY KEY,
+                    shortcut TEXT NOT NULL UNIQUE,
+                    text TEXT NOT NULL,
+                    engine TEXT,
+                    trigger TEXT
+                )''')
+
+        try:
+            with self._connection:
+                created = not self._connection.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shortcuts_fts'").fetchone()
+                self._connection.executescript('''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS shortcuts_fts
+                        USING fts5(shortcut, text, content='shortcuts', content_rowid='id');
+                    CREATE TRIGGER IF NOT EXISTS shortcuts_fts_insert AFTER INSERT ON shortcuts BEGIN
+                        INSERT INTO shortcuts_fts(rowid, shortcut, text) VALUES (new.id, new.shortcut, new.text);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS shortcuts_fts_delete AFTER DELETE ON shortcuts BEGIN
+                        INSERT INTO shortcuts_fts(shortcuts_fts, rowid, shortcut, text)
+                            VALUES ('delete', old.id, old.shortcut, old.text);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS shortcuts_fts_update AFTER UPDATE OF shortcut, text ON shortcuts BEGIN
+                        INSERT INTO shortcuts_fts(shortcuts_fts, rowid, shortcut, text)
+                            VALUES ('delete', old.id, old.shortcut, old.text);
+                        INSERT INTO shortcuts_fts(rowid, shortcut, text) VALUES (new.id, new.shortcut, new.text);
+                    END;
+                ''')
+                if created:
+                    # Index the rows that existed before the FTS table
+                    self._connection.execute("INSERT INTO shortcuts_fts(shortcuts_fts) VALUES('rebuild')")
+            has_fts = True
+        except sqlite3.OperationalError:
+            has_fts = False
+
+        with self._connection:
+            self._connection.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        return has_fts
+
+    def load(self):
+        """
+        Load the whole library
+
+        Returns:
+            tuple: (shortcuts, engines, triggers) dicts, like parse_ini()
+        """
+        shortcuts = {}
+        engines = {}
+        triggers = {}
+        rows = self._connection.execute(
+            'SELECT shortcut, text, engine, trigger FROM shortcuts ORDER BY id')
+        for shortcut, text, engine, trigger in rows:
+            shortcuts[shortcut] = text
+            if engine:
+                engines[shortcut] = engine
+            if trigger:
+                triggers[shortcut] = trigger
+        return shortcuts, engines, triggers
+
+    def get(self, shortcut):
+        """
+        Look up a single shortcut
+
+        Returns:
+            str: Snippet text, or None if the shortcut doesn't exist
+        """
+        row = self._connection.execute(
+            'SELECT text FROM shortcuts WHERE shortcut = ?', (shortcut,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, shortcut, text, engine=None, trigger=None):
+        """Insert or update a shortcut"""
+        with self._connection:
+            self._connection.execute(
+                'INSERT INTO shortcuts (shortcut, text, engine, trigger) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(shortcut) DO UPDATE SET '
+                'text = excluded.text, engine = excluded.engine, trigger = excluded.trigger',
+                (shortcut, text, engine or None, trigger or None))
+
+    def delete(self, shortcuts):
+        """Delete shortcuts in one transaction"""
+        with self._connection:
+            self._connection.executemany(
+                'DELETE FROM shortcuts WHERE shortcut = ?', ((shortcut,) for shortcut in shortcuts))
+
+    def clear(self):
+        """Delete every shortcut"""
+        with self._connection:
+            self._connection.execute('DELETE FROM shortcuts')
+
+    def replace_all(self, shortcuts, engines=None, triggers=None):
+        """Replace the whole library in one batched transaction"""
+        engines = engines or {}
+        triggers = triggers or {}
+        with self._connection:
+            self._connection.execute('DELETE FROM shortcuts')
+            self._connection.executemany(
+                'INSERT INTO shortcuts (shortcut, text, engine, trigger) VALUES (?, ?, ?, ?)',
+                ((shortcut, text, engines.get(shortcut), triggers.get(shortcut))
+                 for shortcut, text in shortcuts.items()))
+
+    def search(self, query, limit=None):
+        """
+        Find shortcuts whose shortcut or snippet text matches a query
+
+        Args:
+            query: Words to search for (every word must match, prefix match on the last one)
+            limit: Maximum number of results (None for all of them)
+
+        Returns:
+            list: Matching shortcuts, best matches first
+        """
+        words = query.split()
+        if not words:
+            return []
+        if limit is None:
+            limit = -1  # SQLite: no limit
+
+        if self.has_fts:
+            # Quote each word so user input can't inject FTS5 syntax
+            terms = ['"' + word.replace('"', '""') + '"' for word in words]
+            terms[-1] += '*'
+            rows = self._connection.execute(
+                'SELECT s.shortcut FROM shortcuts_fts f JOIN shortcuts s ON s.id = f.rowid '
+                'WHERE shortcuts_fts MATCH ? ORDER BY f.rank LIMIT ?',
+                (' '.join(terms), limit))
+        else:
+            conditions = ' AND '.join(['(text LIKE ? OR shortcut LIKE ?)'] * len(words))
+            patterns = [f'%{word}%' for word in words for _ in range(2)]
+            rows = self._connection.execute(
+                f'SELECT shortcut FROM shortcuts WHERE {conditions} LIMIT ?', patterns + [limit])
+        return [row[0] for row in rows]
+
+    def import_ini(self, path):
+        """Replace the library with the contents of an INI file"""
+        self.replace_all(*parse_ini(path))
+
+    def export_ini(self, path):
+        """Write the library to an INI file"""
+        atomic_write(path, serialize_ini(*self.load()))
+
+    def close(self):
+        self._connection.close()
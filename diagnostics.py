@@ -0,0 +1,258 @@
+"""
+ezText Diagnostics
+
+PhaseTimer records how long each startup step takes. Steps are marked
+with lap(name) at the end of each step, so the code being measured
+doesn't need to be restructured. The result can be shown in the
+diagnostics dialog and dumped to a JSON file that users can attach to a
+field report.
+
+LatencyStats keeps end-to-end hotkey latency in fixed-size histograms per
+shortcut and stage: key event to callback (hook thread), callback to
+injection start (queueing) and injection duration (worker thread).
+Recording a sample is a bisect and an increment, so it can run on the
+hook path.
+"""
+
+import bisect
+import json
+import os
+import platform
+import sys
+import time
+
+from storage import atomic_write
+
+
+# Number of earlier runs kept in the dump file
+DUMP_HISTORY = 20
+
+# Hotkey latency stages, in the order they happen
+LATENCY_KEY_TO_CALLBACK = 'key_to_callback'
+LATENCY_CALLBACK_TO_INJECTION = 'callback_to_injection'
+LATENCY_INJECTION = 'injection'
+LATENCY_STAGES = (LATENCY_KEY_TO_CALLBACK, LATENCY_CALLBACK_TO_INJECTION, LATENCY_INJECTION)
+
+# Histogram bucket upper bounds in seconds: 10 us to ~60 s, 15% apart
+LATENCY_BOUNDS = []
+_bound = 10e-6
+while _bound < 60:
+    LATENCY_BOUNDS.append(_bound)
+    _bound *= 1.15
+del _bound
+
+
+class PhaseTimer:
+    """Sequential phase timings measured with lap()"""
+
+    def __init__(self, origin=None):
+        """
+        Args:
+            origin: perf_counter() value the first phase starts from
+                (defaults to now)
+        """
+        self.origin = time.perf_counter() if origin is None else origin
+        self.started_at = time.time() - (time.perf_counter() - self.origin)
+        self.phases = []    # (name, start offset, duration) in seconds
+        self._last = self.origin
+
+    def lap(self, name):
+        """Record the time since the previous lap as phase 'name'"""
+        now = time.perf_counter()
+        self.phases.append((name, self._last - self.origin, now - self._last))
+        self._last = now
+
+    def skip(self):
+        """Exclude the time since the previous lap from the next phase"""
+        self._last = time.perf_counter()
+
+    @property
+    def total(self):
+        """Seconds from origin to the end of the last phase"""
+        return self._last - self.origin
+
+    def as_dict(self):
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'total_ms': round(self.total * 1000, 2),
+            'phases': [
+                {'name': name, 'start_ms': round(start * 1000, 2), 'duration_ms': round(duration * 1000, 2)}
+                for name, start, duration in self.phases
+            ],
+        }
+
+    def format(self):
+        """Plain-text table of the phases, slowest marked"""
+        if not self.phases:
+            return ''
+        slowest = max(self.phases, key=lambda phase: phase[2])[0]
+        lines = []
+        for name, start, duration in self.phases:
+            marker = '  <- slowest' if name == slowest else ''
+            lines.append(f"{name:<20} {duration * 1000:>9,.1f} ms  (at {start * 1000:>8,.1f} ms){marker}")
+        lines.append(f"{'total':<20} {self.total * 1000:>9,.1f} ms")
+        return '\n'.join(lines)
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of durations with logarithmic buckets"""
+
+    __slots__ = ('counts', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BOUNDS) + 1)   # last bucket: beyond the bounds
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS, seconds)] += 1
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent):
+        """
+        Upper bound of the bucket holding a percentile (within 15%)
+
+        Returns:
+            float: Seconds, or None without samples
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                # The exact maximum is known, so never report more than it
+                if index == len(LATENCY_BOUNDS):
+                    return self.max
+                return min(LATENCY_BOUNDS[index], self.max)
+        return self.max
+
+    def summary(self):
+        """Sample count and p50/p95/p99/max in milliseconds"""
+        result = {'count': self.count}
+        for percent in (50, 95, 99):
+            value = self.percentile(percent)
+            result[f'p{percent}_ms'] = None if value is None else round(value * 1000, 3)
+        result['max_ms'] = round(self.max * 1000, 3)
+        return result
+
+
+class LatencyStats:
+    """Hotkey latency histograms per shortcut and stage, plus overall ones"""
+
+    def __init__(self):
+        # Each stage is recorded by a single thread (hook or injection
+        # worker), so histograms are updated without locking
+        self._overall = {stage: LatencyHistogram() for stage in LATENCY_STAGES}
+        self._shortcuts = {}    # shortcut -> {stage: LatencyHistogram}
+
+    def record(self, shortcut, stage, seconds):
+        """Add one sample (negative clock differences count as zero)"""
+        if seconds < 0:
+            seconds = 0.0
+        self._overall[stage].record(seconds)
+        histograms = self._shortcuts.get(shortcut)
+        if histograms is None:
+            histograms = self._shortcuts.setdefault(
+                shortcut, {name: LatencyHistogram() for name in LATENCY_STAGES})
+        histograms[stage].record(seconds)
+
+    def clear(self):
+        for histogram in self._overall.values():
+            histogram.__init__()
+        self._shortcuts.clear()
+
+    def as_dict(self):
+        """Summaries for export: overall and per shortcut"""
+        return {
+            'overall': {stage: histogram.summary() for stage, histogram in self._overall.items()},
+            'shortcuts': {
+                shortcut: {stage: histogram.summary() for stage, histogram in histograms.items()}
+                for shortcut, histograms in list(self._shortcuts.items())
+            },
+        }
+
+    def format(self, top=20):
+        """Plain-text percentile table: overall, then the most fired shortcuts"""
+        def rows(label, histograms):
+            lines = []
+            for stage in LATENCY_STAGES:
+                summary = histograms[stage].summary()
+                if not summary['count']:
+                    continue
+                lines.append(f"{label:<16} {stage:<22} {summary['count']:>7,} "
+                             f"{summary['p50_ms']:>9,.2f} {summary['p95_ms']:>9,.2f} "
+                             f"{summary['p99_ms']:>9,.2f} {summary['max_ms']:>9,.2f}")
+                label = ''
+            return lines
+
+        lines = [f"{'shortcut':<16} {'stage (ms)':<22} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        lines.extend(rows('(all)', self._overall))
+        busiest = sorted(list(self._shortcuts.items()),
+                         key=lambda item: item[1][LATENCY_CALLBACK_TO_INJECTION].count, reverse=True)
+        for shortcut, histograms in busiest[:top]:
+            lines.extend(rows(shortcut[:16], histograms))
+        return '\n'.join(lines)
+
+
+def environment_info(version):
+    """Version and platform details included in every dump"""
+    return {
+        'version': version,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'frozen': bool(getattr(sys, 'frozen', False)),
+    }
+
+
+def resident_memory():
+    """Resident set size of this process in bytes (0 if unknown)"""
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return 0
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def write_dump(path, report):
+    """
+    Write a diagnostics dump, keeping a short history of earlier startups
+
+    Args:
+        path: JSON file path
+        report: Dict for this run; its 'startup' entry is added to the history
+    """
+    history = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        history = previous.get('history', [])
+        if previous.get('startup'):
+            history.append(previous['startup'])
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    report = dict(report, history=history[-DUMP_HISTORY:])
+    atomic_write(path, json.dumps(report, ensure_ascii=False, indent=2))
+
@@ -0,0 +1,955 @@
+"""
+ezText Engine
+
+ShortcutEngine is everything ezText does without a window: it loads the
+library, registers hotkeys on the keyboard hook, injects snippets, saves
+changes and answers the command channel. TextShortcutApp is a view on an
+engine; with --headless the engine runs alone and the window is only
+created when a SHOW request arrives.
+
+The engine reports to the window through Qt signals, so it never touches
+widgets. Status messages are sent as translation keys with their format
+arguments, because the translations live with the window.
+
+The library file is watched: when another program (a sync tool, an
+editor) changes it, the file is parsed in the background once it has
+settled and only the added, removed and changed entries are applied to
+the hotkeys and the table. Explicit loads take the same path.
+"""
+
+import configparser
+import json
+import os
+import shutil
+import threading
+import time
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QSettings, QTimer, pyqtSignal
+
+from command_server import CommandServer, CommandError, DEFERRED, SERVER_NAME
+from diagnostics import (LatencyStats, environment_info, resident_memory, write_dump,
+                         LATENCY_KEY_TO_CALLBACK, LATENCY_CALLBACK_TO_INJECTION, LATENCY_INJECTION)
+from hotkeys import (ChordDispatcher, HotkeyRegistry, HookWatchdog, RegistrationQueue, UsageStats,
+                     TRIGGER_ABBREVIATION, TRIGGERS)
+from injector import (TextInjector, InjectionWorker, DEFAULT_PASTE_THRESHOLD, DEFAULT_MAX_PENDING,
+                      MODES as INJECTION_MODES)
+from snippets import SnippetStore, DEFAULT_COMPRESS_THRESHOLD
+from storage import (AutosaveWriter, ShortcutJournal, SnapshotCache, atomic_write, is_database_file, serialize_ini,
+                     diff_library, stat_key, STORAGE_JOURNAL, DEFAULT_COMPACT_THRESHOLD)
+
+
+# Windows system reserved shortcuts
+RESERVED_SHORTCUTS = frozenset({
+    'ctrl+c', 'ctrl+v', 'ctrl+x', 'ctrl+z', 'ctrl+y', 'ctrl+a',
+    'ctrl+s', 'ctrl+n', 'ctrl+o', 'ctrl+p', 'ctrl+w', 'ctrl+q',
+    'ctrl+f', 'ctrl+h', 'alt+f4', 'alt+tab', 'win+d', 'win+e',
+    'win+r', 'win+l', 'win+i', 'win+s', 'win+x', 'win+tab',
+    'ctrl+alt+del', 'ctrl+shift+esc', 'win+p', 'win+k'
+})
+
+
+class InjectionSignals(QObject):
+    """Signals emitted from the injection worker thread"""
+    queue_depth_changed = pyqtSignal(int)
+
+
+class AutosaveSignals(QObject):
+    """Signals emitted from the autosave writer thread"""
+    save_failed = pyqtSignal(str, str)
+
+
+class ReloadSignals(QObject):
+    """Signals emitted from the library reload thread"""
+    # Request, parsed (shortcuts, engines, triggers) or None, error or None
+    parsed = pyqtSignal(object, object, object)
+
+
+def valid_library(shortcuts, engines, triggers):
+    """Drop unknown engine and trigger values from a parsed library"""
+    engines = {shortcut: engine for shortcut, engine in engines.items() if engine in INJECTION_MODES}
+    triggers = {shortcut: trigger for shortcut, trigger in triggers.items()
+                if trigger == TRIGGER_ABBREVIATION}
+    return shortcuts, engines, triggers
+
+
+class ShortcutEngine(QObject):
+    """Shortcut library, hotkeys, injection, storage and command channel"""
+
+    # Translation key, format arguments, status bar duration in ms (0: until replaced)
+    status = pyqtSignal(str, object, int)
+    # The library was (re)loaded; views rebuild from the engine's mappings
+    library_loaded = pyqtSignal()
+    # put_shortcut() added (True) or replaced (False) a shortcut
+    shortcut_put = pyqtSignal(str, bool)
+    # A reload applied a LibraryDiff (views update only those rows)
+    library_diffed = pyqtSignal(object)
+    # A SHOW request arrived (a second instance was started)
+    show_requested = pyqtSignal()
+    # A QUIT request arrived; the owner shuts down and quits the application
+    quit_requested = pyqtSignal()
+
+    def __init__(self, version, startup_timer, headless=False, parent=None,
+                 hotkey_backend=None, injection_backend=None, server_name=SERVER_NAME):
+        """
+        Args:
+            version: Application version (reported in diagnostics)
+            startup_timer: PhaseTimer the engine's startup phases are added to
+            headless: Whether the engine runs without a window
+            hotkey_backend: Keyboard hook backend for the ChordDispatcher
+                (defaults to the keyboard library)
+            injection_backend: Backend for the TextInjector (defaults to
+                KeyboardBackend)
+            server_name: Local socket name of the command server
+        """
+        super().__init__(parent)
+        self.version = version
+        self.startup_timer = startup_timer
+        self.headless = headless
+
+        # Settings file in %LOCALAPPDATA%
+        self.settings = QSettings('gloriouslegacy', 'ezText')
+
+        # Get the directory where the script is located (for reference)
+        self.script_dir = os.path.dirname(os.path.abspath(__file__))
+
+        # Use %localAppData%\ezText\ for config file to persist across updates
+        local_app_data = os.environ.get('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
+        self.config_dir = os.path.join(local_app_data, 'ezText')
+
+        # Create config directory if it doesn't exist
+        if not os.path.exists(self.config_dir):
+            os.makedirs(self.config_dir, exist_ok=True)
+
+        default_config = os.path.join(self.config_dir, 'ezTextShortcut.ini')
+
+        # Migration: Check for old config file in script directory and move it
+        old_config = os.path.join(self.script_dir, 'ezTextShortcut.ini')
+        if os.path.exists(old_config) and not os.path.exists(default_config):
+            try:
+                shutil.copy2(old_config, default_config)
+            except Exception:
+                pass  # If migration fails, just use the new location
+
+        # Load last opened file or use default
+        last_file = self.settings.value('last_file', default_config)
+        # If last file doesn't exist, fall back to default
+        if not os.path.exists(last_file):
+            self.config_file = default_config
+            self.settings.setValue('last_file', default_config)
+        else:
+            self.config_file = last_file
+        self.startup_timer.lap('config')
+
+        # Shortcut -> text (one copy per unique text, long texts compressed)
+        self.shortcuts_dict = SnippetStore(
+            compress_threshold=int(self.settings.value('compress_threshold', DEFAULT_COMPRESS_THRESHOLD))
+        )
+
+        # Per-snippet injection mode overrides (shortcut -> 'auto'/'type'/'paste')
+        self.shortcut_engines = {}
+
+        # Non-chord trigger types (shortcut -> 'abbreviation'); chords are the default
+        self.shortcut_triggers = {}
+
+        self.reserved_shortcuts = RESERVED_SHORTCUTS
+
+        # Set by the window: returns True while a hotkey must not fire
+        # (e.g. one of the window's own text fields has focus)
+        self.fire_guard = None
+
+        # Callables returning extra diagnostics counters (the window's updater)
+        self.counter_providers = []
+
+        # Single keyboard hook dispatching every chord through one lookup table
+        self.hotkey_dispatcher = ChordDispatcher(hotkey_backend)
+        self.hotkey_dispatcher.install()
+
+        # Registered hotkeys (parsed once, refreshed differentially)
+        self.hotkey_registry = HotkeyRegistry(self.make_hotkey_callback, backend=self.hotkey_dispatcher)
+
+        # Hook liveness watchdog (re-arms hotkeys only when the hook is dead)
+        self.hook_watchdog = HookWatchdog(
+            self.hotkey_registry,
+            probe_key=self.settings.value('watchdog_probe_key', 'f24')
+        )
+        self.hook_watchdog.install()
+
+        # Hotkeys of a loaded library are registered incrementally from the
+        # event loop, most used first, so the window appears immediately
+        self.usage_stats = UsageStats(os.path.join(self.config_dir, 'usage.json'))
+        self.registration_queue = RegistrationQueue(self.register_pending_hotkey)
+        self.registration_timer = QTimer(self)
+        self.registration_timer.setInterval(0)
+        self.registration_timer.timeout.connect(self.register_next_batch)
+        self.registration_progress_at = 0.0
+
+        # Text injection (typing or clipboard paste, chosen per snippet)
+        self.injector = TextInjector(
+            injection_backend,
+            mode=self.settings.value('injection_mode', 'auto'),
+            paste_threshold=int(self.settings.value('paste_threshold', DEFAULT_PASTE_THRESHOLD))
+        )
+
+        # Per-shortcut hotkey latency (key event -> callback -> injection)
+        self.latency_stats = LatencyStats()
+
+        # Injection runs on its own thread; hotkey callbacks only enqueue jobs
+        self.injection_signals = InjectionSignals(self)
+        self.injection_worker = InjectionWorker(
+            self.injector,
+            max_pending=int(self.settings.value('injection_queue_size', DEFAULT_MAX_PENDING)),
+            policy=self.settings.value('injection_policy', 'queue'),
+            on_depth_changed=self.injection_signals.queue_depth_changed.emit,
+            on_injected=self.record_injection_latency
+        )
+        self.injection_worker.start()
+
+        # Typed abbreviations are matched by the dispatcher's hook as well;
+        # matching pauses while an injection is running so expansions can't re-trigger
+        self.hotkey_dispatcher.on_abbreviation = self.on_abbreviation_typed
+        self.hotkey_dispatcher.abbreviation_guard = lambda: self.injection_worker.depth > 0
+
+        # Abbreviation edits are collected and published to the hook thread
+        # as one freshly built automaton per event loop pass
+        self.abbreviation_timer = QTimer(self)
+        self.abbreviation_timer.setSingleShot(True)
+        self.abbreviation_timer.setInterval(0)
+        self.abbreviation_timer.timeout.connect(self.hotkey_dispatcher.abbreviations.publish)
+
+        # Write-behind autosave: edits within the debounce window are coalesced
+        # into one background write that atomically replaces the file
+        self.autosave_signals = AutosaveSignals(self)
+        self.autosave_signals.save_failed.connect(self.on_autosave_failed)
+        self.autosave_writer = AutosaveWriter(on_error=self.autosave_signals.save_failed.emit)
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.setInterval(int(self.settings.value('autosave_delay', 1000)))
+        self.autosave_timer.timeout.connect(self.write_autosave)
+
+        # Storage mode: 'snapshot' rewrites the INI, 'journal' appends change records
+        self.storage_mode = self.settings.value('storage_mode', 'snapshot')
+        self.journal = None
+
+        # SQLite library (only when config_file is a database)
+        self.database = None
+
+        # Parsed-library cache: skips INI parsing while the file is unchanged
+        self.snapshot_cache = SnapshotCache(os.path.join(self.config_dir, 'cache'))
+
+        # Shortcuts edited since the last autosave was handed to the writer
+        # (None after Delete All); they win over a file changed meanwhile
+        self.unsaved_shortcuts = set()
+
+        # Live reload: change events are debounced, then the file is parsed
+        # on a worker thread and applied as a diff
+        self.library_watcher = QFileSystemWatcher(self)
+        self.library_watcher.fileChanged.connect(self.on_library_file_changed)
+        self.library_watcher.directoryChanged.connect(self.on_library_file_changed)
+        self.library_stat = None   # stat_key() of the file as last loaded
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(int(self.settings.value('reload_delay', 500)))
+        self.reload_timer.timeout.connect(self.check_library_file)
+        self.reload_signals = ReloadSignals(self)
+        self.reload_signals.parsed.connect(self.finish_reload)
+        self.reload_running = False
+        self.reload_requests = []  # Requests arriving while a reload runs
+        self.live_reloads = 0
+
+        self.startup_timer.lap('engine')
+
+        # Single instance server, which also takes commands from scripts
+        self.command_server = CommandServer(self)
+        for command, handler in (('SHOW', self.command_show), ('STATS', self.command_stats),
+                                 ('RELOAD', self.command_reload), ('FIRE', self.command_fire),
+                                 ('ADD', self.command_add), ('EXPORT', self.command_export),
+                                 ('DUMP-PROFILE', self.command_dump_profile), ('QUIT', self.command_quit)):
+            self.command_server.register(command, handler)
+        self.command_server.listen(server_name)
+        self.startup_timer.lap('single_instance')
+
+        # Watchdog timer: retries failed registrations and checks hook liveness
+        # (the liveness check itself only runs every check_interval seconds)
+        self.hook_watchdog_timer = QTimer(self)
+        self.hook_watchdog_timer.timeout.connect(self.check_hook_health)
+        self.hook_watchdog_timer.start(5000)  # Tick every 5 seconds
+
+    def load_shortcuts(self):
+        """Load shortcuts from ini file or database"""
+        if is_database_file(self.config_file):
+            shortcuts, engines, triggers = self.open_database().load()
+        else:
+            # If config file doesn't exist, create an empty one
+            if not os.path.exists(self.config_file):
+                config = configparser.ConfigParser()
+                with open(self.config_file, 'w', encoding='utf-8') as f:
+                    config.write(f)
+                self.watch_library()
+                return
+
+            # Parsed library (from the snapshot cache while the INI is unchanged)
+            shortcuts, engines, triggers = self.snapshot_cache.load(self.config_file)
+
+        shortcuts, engines, triggers = self.replay_journal(shortcuts, engines, triggers)
+
+        # Clear existing shortcuts
+        self.unregister_all_hotkeys()
+
+        self.shortcuts_dict.clear()
+        self.shortcut_engines.clear()
+        self.shortcut_triggers.clear()
+
+        # Load shortcuts
+        self.shortcuts_dict.update(shortcuts)
+        self.shortcut_engines.update(engines)
+        self.shortcut_triggers.update(triggers)
+
+        # Register in the background, most used shortcuts first
+        self.start_hotkey_registration()
+
+        self.unsaved_shortcuts = set()
+        self.watch_library()
+        self.library_loaded.emit()
+
+    def reload_shortcuts(self, path=None, done=None, external=False):
+        """
+        Read a library in the background and apply only what changed
+
+        Args:
+            path: Library file to switch to (default: re-read config_file)
+            done: Optional callback(diff, error), called once applied
+            external: Triggered by the file watcher rather than the user
+        """
+        request = (path or self.config_file, done, external)
+        if self.reload_running:
+            self.reload_requests.append(request)
+            return
+        self.start_reload(request)
+
+    def start_reload(self, request):
+        """Parse a library file on a worker thread"""
+        path, done, external = request
+        if not external:
+            # Explicit loads read what was edited so far
+            self.flush_autosave()
+        self.reload_running = True
+
+        def parse():
+            try:
+                if is_database_file(path):
+                    from database import ShortcutDatabase
+                    # A connection of its own (SQLite connections are per thread)
+                    database = ShortcutDatabase(path)
+                    try:
+                        library = database.load()
+                    finally:
+                        database.close()
+                else:
+                    if not os.path.exists(path):
+                        # configparser would read a missing file as an empty library
+                        raise FileNotFoundError(f"No such file: {path}")
+                    library = self.snapshot_cache.load(path)
+            except Exception as e:
+                self.reload_signals.parsed.emit(request, None, e)
+            else:
+                self.reload_signals.parsed.emit(request, library, None)
+
+        threading.Thread(target=parse, name='ezText-reload', daemon=True).start()
+
+    def finish_reload(self, request, library, error):
+        """Apply a parsed library (GUI thread) and start the next queued reload"""
+        path, done, external = request
+        self.reload_running = False
+        diff = None
+        if external and path != self.config_file:
+            # Another file was loaded meanwhile
+            pass
+        elif error is not None:
+            print(f"Error reloading {path}: {error}")
+            self.status.emit('reload_failed', (os.path.basename(path), str(error)), 10000)
+        else:
+            if path != self.config_file:
+                # Switching files: finish pending writes to the current one first
+                self.flush_autosave()
+                self.config_file = path
+                self.settings.setValue('last_file', path)
+            diff = self.apply_library(*library)
+            self.watch_library()
+            if not external:
+                self.status.emit('loaded', (), 3000)
+            elif diff:
+                self.live_reloads += 1
+                self.status.emit('library_reloaded',
+                                 (len(diff.added), len(diff.removed), len(diff.changed)), 5000)
+
+        if done is not None:
+            done(diff, error)
+        if self.reload_requests:
+            self.start_reload(self.reload_requests.pop(0))
+
+    def apply_library(self, shortcuts, engines, triggers):
+        """
+        Change the loaded library to the given one, touching only entries that differ
+
+        Returns:
+            LibraryDiff: What was applied
+        """
+        shortcuts, engines, triggers = self.replay_journal(shortcuts, engines, triggers)
+
+        diff = diff_library((self.shortcuts_dict, self.shortcut_engines, self.shortcut_triggers),
+                            (shortcuts, engines, triggers))
+        if self.unsaved_shortcuts is None:
+            # A pending Delete All: the autosave is about to overwrite the file
+            diff.exclude(set(shortcuts) | set(self.shortcuts_dict))
+        elif self.unsaved_shortcuts:
+            diff.exclude(self.unsaved_shortcuts)
+
+        # Unregister under the old trigger type before it changes
+        for shortcut in diff.removed:
+            self.unregister_hotkey(shortcut)
+            del self.shortcuts_dict[shortcut]
+            self.shortcut_engines.pop(shortcut, None)
+            self.shortcut_triggers.pop(shortcut, None)
+
+        for shortcut in diff.changed:
+            # Hotkeys read the text when they fire; only a new trigger type re-registers
+            retrigger = self.shortcut_triggers.get(shortcut) != triggers.get(shortcut)
+            if retrigger:
+                self.unregister_hotkey(shortcut)
+            self.set_entry(shortcut, shortcuts[shortcut], engines.get(shortcut), triggers.get(shortcut))
+            if retrigger:
+                self.register_hotkey(shortcut)
+
+        for shortcut in diff.added:
+            self.set_entry(shortcut, shortcuts[shortcut], engines.get(shortcut), triggers.get(shortcut))
+        if diff.added:
+            # Registered in the background like a fresh load, most used first
+            self.queue_hotkeys(diff.added)
+
+        print(f"Library reload: {len(diff.added)} added, {len(diff.removed)} removed, "
+              f"{len(diff.changed)} changed")
+        self.library_diffed.emit(diff)
+        return diff
+
+    def replay_journal(self, shortcuts, engines, triggers):
+        """
+        Bring a library read from config_file up to date with its journal
+
+        Changes journaled after the file was written are replayed onto the
+        given dicts, and unknown engine and trigger values are dropped. A
+        journal left over from journal mode is then folded into the INI.
+
+        Returns:
+            tuple: (shortcuts, engines, triggers) to load
+        """
+        journal = None if is_database_file(self.config_file) else self.open_journal()
+        replayed = journal is not None and journal.exists()
+        if replayed:
+            journal.replay(shortcuts, engines, triggers)
+        library = valid_library(shortcuts, engines, triggers)
+
+        if replayed and self.storage_mode != STORAGE_JOURNAL:
+            # Journal left over from journal mode: fold it into the INI. Edits
+            # still waiting for the autosave are written after it as usual
+            self.autosave_writer.flush()
+            self.autosave_writer.submit(self.config_file, *library)
+            self.autosave_writer.flush()
+            journal.reset()
+        return library
+
+    def set_entry(self, shortcut, text, engine=None, trigger=None):
+        """Store a shortcut's text, engine and trigger (no hotkey or persistence changes)"""
+        self.shortcuts_dict[shortcut] = text
+        if engine:
+            self.shortcut_engines[shortcut] = engine
+        else:
+            self.shortcut_engines.pop(shortcut, None)
+        if trigger == TRIGGER_ABBREVIATION:
+            self.shortcut_triggers[shortcut] = trigger
+        else:
+            self.shortcut_triggers.pop(shortcut, None)
+
+    def watch_library(self):
+        """Watch the current library file for changes made by other programs"""
+        watched = self.library_watcher.files() + self.library_watcher.directories()
+        if watched:
+            self.library_watcher.removePaths(watched)
+        self.reload_timer.stop()
+        self.library_stat = stat_key(self.config_file)
+        if self.library_stat is None or is_database_file(self.config_file):
+            return
+        # Atomic saves replace the file, which ends a file watch; the
+        # directory watch sees the replacement
+        path = os.path.abspath(self.config_file)
+        self.library_watcher.addPaths([path, os.path.dirname(path)])
+
+    def on_library_file_changed(self, path):
+        """Restart the debounce window on every change event"""
+        watched = os.path.abspath(self.config_file)
+        if watched not in self.library_watcher.files() and os.path.exists(watched):
+            self.library_watcher.addPath(watched)
+        self.reload_timer.start()
+
+    def check_library_file(self):
+        """Reload the library once its file has settled, unless the change was our own save"""
+        stat = stat_key(self.config_file)
+        if stat is None or stat == self.library_stat:
+            return
+        if stat == self.autosave_writer.written_stat(self.config_file):
+            self.library_stat = stat
+            return
+        self.reload_shortcuts(external=True)
+
+    def clear_shortcuts(self):
+        """Unregister and forget every shortcut (does not persist)"""
+        self.unregister_all_hotkeys()
+        self.shortcuts_dict.clear()
+        self.shortcut_engines.clear()
+        self.shortcut_triggers.clear()
+
+    def put_shortcut(self, shortcut, text, engine=None, trigger=None):
+        """
+        Add a shortcut, or replace an existing one's text, engine and trigger
+
+        Returns:
+            bool: True if the shortcut was added
+        """
+        created = shortcut not in self.shortcuts_dict
+        if not created:
+            # The trigger type may change, so register from scratch
+            self.unregister_hotkey(shortcut)
+
+        self.set_entry(shortcut, text, engine, trigger)
+        self.register_hotkey(shortcut, text)
+        self.persist_set(shortcut)
+        self.shortcut_put.emit(shortcut, created)
+        return created
+
+    def fire_shortcut(self, shortcut, erase=0, event_time=None):
+        """
+        Queue the snippet of a shortcut for injection (runs on the hook thread)
+
+        Args:
+            shortcut: Shortcut that fired
+            erase: Number of typed characters to erase first (abbreviations)
+            event_time: time.time() of the key event, if fired from the hook
+        """
+        fired = time.perf_counter()
+        if self.fire_guard is not None and self.fire_guard():
+            return
+        # Look up the text at fire time so text edits need no re-registration
+        text = self.shortcuts_dict.get(shortcut)
+        if text is None:
+            return
+        self.usage_stats.record(shortcut)
+        if event_time is not None:
+            self.latency_stats.record(shortcut, LATENCY_KEY_TO_CALLBACK, time.time() - event_time)
+        # Hand off to the injection worker and return to the hook immediately
+        self.injection_worker.submit(text, self.shortcut_engines.get(shortcut), shortcut, erase, fired)
+
+    def record_injection_latency(self, shortcut, queued, duration):
+        """Record the worker's part of a fire (runs on the injection thread)"""
+        self.latency_stats.record(shortcut, LATENCY_CALLBACK_TO_INJECTION, queued)
+        self.latency_stats.record(shortcut, LATENCY_INJECTION, duration)
+
+    def make_hotkey_callback(self, shortcut):
+        """Create the keyboard callback for a shortcut"""
+        def callback(event_time=None):
+            self.fire_shortcut(shortcut, event_time=event_time)
+        return callback
+
+    def on_abbreviation_typed(self, abbreviation, event_time):
+        """Expand a typed abbreviation, erasing what was typed first"""
+        self.fire_shortcut(abbreviation, erase=len(abbreviation), event_time=event_time)
+
+    def chord_shortcuts(self):
+        """Shortcuts that are registered as key chords"""
+        return [sc for sc in self.shortcuts_dict if sc not in self.shortcut_triggers]
+
+    def register_hotkey(self, shortcut, text=None):
+        """Register keyboard hotkey"""
+        if self.shortcut_triggers.get(shortcut) == TRIGGER_ABBREVIATION:
+            self.hotkey_dispatcher.abbreviations.add(shortcut)
+            self.abbreviation_timer.start()
+        else:
+            self.hotkey_registry.register(shortcut)
+
+    def unregister_hotkey(self, shortcut):
+        """Unregister keyboard hotkey"""
+        if self.shortcut_triggers.get(shortcut) == TRIGGER_ABBREVIATION:
+            self.hotkey_dispatcher.abbreviations.remove(shortcut)
+            self.abbreviation_timer.start()
+        else:
+            self.hotkey_registry.unregister(shortcut)
+            self.hotkey_registry.forget(shortcut)
+
+    def start_hotkey_registration(self):
+        """Queue every loaded shortcut for incremental registration"""
+        self.registration_queue.start(self.shortcuts_dict, priority=self.usage_stats.counts)
+        self.registration_progress_at = time.monotonic()
+        if self.registration_queue.total:
+            self.registration_timer.start()
+
+    def queue_hotkeys(self, shortcuts):
+        """Register more shortcuts incrementally from the event loop, most used first"""
+        self.registration_queue.extend(shortcuts, priority=self.usage_stats.counts)
+        if self.registration_queue.pending and not self.registration_timer.isActive():
+            self.registration_progress_at = time.monotonic()
+            self.registration_timer.start()
+
+    def register_pending_hotkey(self, shortcut):
+        """Register a queued shortcut unless it was deleted or renamed meanwhile"""
+        if shortcut in self.shortcuts_dict:
+            self.register_hotkey(shortcut)
+
+    def register_next_batch(self):
+        """Register one time-boxed batch and report progress"""
+        queue = self.registration_queue
+        more = queue.run_batch()
+        now = time.monotonic()
+        # Only libraries that take noticeable time get progress messages
+        if now - self.registration_progress_at < 0.2:
+            if not more:
+                self.registration_timer.stop()
+            return
+        self.registration_progress_at = now
+        if more:
+            self.status.emit('hotkeys_registering', (f"{queue.done:,}", f"{queue.total:,}"), 0)
+        else:
+            self.registration_timer.stop()
+            self.status.emit('hotkeys_registered', (f"{queue.total:,}",), 3000)
+
+    def unregister_all_hotkeys(self):
+        """Unregister every chord and abbreviation"""
+        self.registration_queue.cancel()
+        self.registration_timer.stop()
+        self.hotkey_registry.unregister_all()
+        self.hotkey_dispatcher.abbreviations.clear()
+        self.hotkey_dispatcher.abbreviations.publish()
+
+    def refresh_hotkeys(self):
+        """
+        Re-apply hotkeys, touching only entries that are missing, removed or broken
+
+        Removed chords are unregistered right away; missing chords and due
+        retries go through the registration queue, so a refresh never
+        registers a large set synchronously.
+        """
+        try:
+            stats = self.hotkey_registry.refresh(self.chord_shortcuts(), defer=self.queue_hotkeys)
+            if stats.touched or stats.failed:
+                print(f"Hotkey refresh #{self.hotkey_registry.refresh_count}: {stats}")
+                self.status.emit('hotkeys_refreshed', (stats.touched, f"{stats.duration * 1000:.1f}"), 2000)
+        except Exception as e:
+            print(f"Error refreshing hotkeys: {e}")
+
+    def check_hook_health(self):
+        """Retry failed registrations and probe the keyboard hook if idle"""
+        if self.hotkey_registry.pending_retries:
+            self.refresh_hotkeys()
+
+        if self.hook_watchdog.check():
+            QTimer.singleShot(int(self.hook_watchdog.probe_timeout * 1000), self.finish_hook_probe)
+
+    def finish_hook_probe(self):
+        """Re-arm hotkeys if the probe key never reached the hook"""
+        if self.hook_watchdog.finish_probe():
+            return
+
+        stats = self.hook_watchdog.rearm(self.chord_shortcuts())
+        print(f"Keyboard hook was dead (failure #{self.hook_watchdog.hook_failures}), re-armed: {stats}")
+        self.status.emit('hook_rearmed', (self.hook_watchdog.hook_failures,), 3000)
+
+    def snapshot_shortcuts(self):
+        """Copy the shortcut data for serialization off the GUI thread"""
+        # The store copy shares compressed texts; the writer decompresses them
+        return self.shortcuts_dict.copy(), dict(self.shortcut_engines), dict(self.shortcut_triggers)
+
+    def schedule_autosave(self):
+        """Restart the debounce window; the file is written once edits settle"""
+        self.autosave_timer.start()
+
+    def write_autosave(self):
+        """Hand the current shortcuts to the background writer"""
+        self.autosave_timer.stop()
+        self.unsaved_shortcuts = set()
+        if is_database_file(self.config_file):
+            self.open_database().replace_all(*self.snapshot_shortcuts())
+            return
+        self.autosave_writer.submit(self.config_file, *self.snapshot_shortcuts())
+
+    def flush_autosave(self):
+        """Write any pending autosave now and wait for it to finish"""
+        if self.autosave_timer.isActive():
+            self.write_autosave()
+        self.autosave_writer.flush()
+
+    def on_autosave_failed(self, path, message):
+        """Report a failed background save"""
+        self.status.emit('save_failed', (os.path.basename(path), message), 10000)
+
+    def open_database(self):
+        """Get the database belonging to the current config file"""
+        if self.database is None or self.database.path != self.config_file:
+            from database import ShortcutDatabase  # sqlite3 is only loaded for database libraries
+            if self.database is not None:
+                self.database.close()
+            self.database = ShortcutDatabase(self.config_file)
+        return self.database
+
+    def close_database(self):
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+    def open_journal(self):
+        """Get the change journal belonging to the current config file"""
+        if self.journal is None or self.journal.config_file != self.config_file:
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = ShortcutJournal(
+                self.config_file,
+                compact_threshold=int(self.settings.value('journal_compact_threshold',
+                                                          DEFAULT_COMPACT_THRESHOLD))
+            )
+        return self.journal
+
+    def persist_set(self, shortcut):
+        """Persist an added or edited shortcut"""
+        if is_database_file(self.config_file):
+            self.open_database().set(
+                shortcut, self.shortcuts_dict[shortcut],
+                self.shortcut_engines.get(shortcut), self.shortcut_triggers.get(shortcut)
+            )
+            return
+        if self.storage_mode != STORAGE_JOURNAL:
+            if self.unsaved_shortcuts is not None:
+                self.unsaved_shortcuts.add(shortcut)
+            self.schedule_autosave()
+            return
+        self.open_journal().record_set(
+            shortcut, self.shortcuts_dict[shortcut],
+            self.shortcut_engines.get(shortcut), self.shortcut_triggers.get(shortcut)
+        )
+        self.compact_journal_if_needed()
+
+    def persist_delete(self, shortcuts):
+        """Persist deleted shortcuts"""
+        if is_database_file(self.config_file):
+            self.open_database().delete(shortcuts)
+            return
+        if self.storage_mode != STORAGE_JOURNAL:
+            if self.unsaved_shortcuts is not None:
+                self.unsaved_shortcuts.update(shortcuts)
+            self.schedule_autosave()
+            return
+        journal = self.open_journal()
+        for shortcut in shortcuts:
+            journal.record_delete(shortcut)
+        self.compact_journal_if_needed()
+
+    def persist_clear(self):
+        """Persist deletion of every shortcut"""
+        if is_database_file(self.config_file):
+            self.open_database().clear()
+            return
+        if self.storage_mode != STORAGE_JOURNAL:
+            self.unsaved_shortcuts = None
+            self.schedule_autosave()
+            return
+        self.open_journal().record_clear()
+        self.compact_journal_if_needed()
+
+    def compact_journal_if_needed(self):
+        """Fold a large journal into a fresh INI snapshot in the background"""
+        journal = self.open_journal()
+        if not journal.needs_compaction:
+            return
+        # Records appended from now on go to a new journal; the rotated one is
+        # deleted once the snapshot containing its records is on disk
+        journal.rotate()
+        self.autosave_writer.forget(self.config_file)
+        self.autosave_writer.submit(self.config_file, *self.snapshot_shortcuts(),
+                                    after=journal.finish_compaction)
+
+    def set_storage_mode(self, mode):
+        """Switch between whole-file saves and the change journal"""
+        if mode != STORAGE_JOURNAL:
+            # Fold outstanding journal records into the INI
+            self.flush_autosave()
+            self.write_autosave()
+            self.autosave_writer.flush()
+            self.open_journal().reset()
+        self.storage_mode = mode
+        self.settings.setValue('storage_mode', mode)
+
+    def diagnostics_report(self):
+        """Machine-readable diagnostics: startup phases and runtime counters"""
+        report = {
+            'environment': environment_info(self.version),
+            'mode': 'headless' if self.headless else 'gui',
+            'resident_bytes': resident_memory(),
+            'startup': self.startup_timer.as_dict(),
+            'library': {
+                'file': os.path.basename(self.config_file),
+                'entries': len(self.shortcuts_dict),
+                'storage_mode': self.storage_mode,
+            },
+            'counters': {
+                'hotkey_refreshes': self.hotkey_registry.refresh_count,
+                'hotkey_refresh_ms': round(self.hotkey_registry.total_refresh_time * 1000, 2),
+                'hotkey_registration_failures': self.hotkey_registry.registration_failures,
+                'hook_failures': self.hook_watchdog.hook_failures,
+                'hook_rearms': self.hook_watchdog.rearm_count,
+                'injections_completed': self.injection_worker.completed,
+                'injections_dropped': self.injection_worker.dropped,
+                'injections_failed': self.injection_worker.failed,
+                'autosave_writes': self.autosave_writer.writes,
+                'autosave_skipped': self.autosave_writer.skipped,
+                'snapshot_cache_hits': self.snapshot_cache.hits,
+                'snapshot_cache_misses': self.snapshot_cache.misses,
+                'live_reloads': self.live_reloads,
+                'commands': self.command_server.requests,
+                'command_errors': self.command_server.errors,
+            },
+            'latency': self.latency_stats.as_dict(),
+        }
+        for provider in self.counter_providers:
+            report['counters'].update(provider())
+        return report
+
+    def finish_startup_profile(self, phase='first_paint'):
+        """Record the time to the first event loop pass and dump the startup profile"""
+        self.startup_timer.lap(phase)
+        try:
+            write_dump(os.path.join(self.config_dir, 'startup-profile.json'), self.diagnostics_report())
+        except OSError as e:
+            print(f"Error writing startup profile: {e}")
+
+    def shutdown(self):
+        """Stop the hook, worker threads and timers and write pending changes"""
+        self.hook_watchdog_timer.stop()
+        self.reload_timer.stop()
+        self.hook_watchdog.uninstall()
+        self.command_server.close()
+
+        # Cleanup hotkeys
+        self.unregister_all_hotkeys()
+        self.hotkey_dispatcher.uninstall()
+
+        # Stop injection worker
+        self.injection_worker.stop()
+
+        # Write pending changes before quitting
+        self.flush_autosave()
+        self.autosave_writer.stop()
+        if self.journal is not None:
+            self.journal.close()
+        self.close_database()
+        try:
+            self.usage_stats.save()
+        except OSError as e:
+            print(f"Error saving usage statistics: {e}")
+
+    def command_show(self, argument, reply):
+        """SHOW: bring the window to the front (sent by a second instance)"""
+        self.show_requested.emit()
+        return {}
+
+    def command_stats(self, argument, reply):
+        """STATS: library size, runtime counters, memory and overall hotkey latency"""
+        report = self.diagnostics_report()
+        return {
+            'version': self.version,
+            'mode': report['mode'],
+            'resident_bytes': report['resident_bytes'],
+            'startup_ms': report['startup']['total_ms'],
+            'library': report['library'],
+            'counters': report['counters'],
+            'latency': report['latency']['overall'],
+        }
+
+    def command_reload(self, argument, reply):
+        """RELOAD: re-read the current library file and apply what changed"""
+        def done(diff, error):
+            if error is not None:
+                reply(False, error)
+            else:
+                reply(True, {'entries': len(self.shortcuts_dict), 'added': len(diff.added),
+                             'removed': len(diff.removed), 'changed': len(diff.changed)})
+
+        self.reload_shortcuts(done=done)
+        return DEFERRED
+
+    def command_fire(self, argument, reply):
+        """FIRE <shortcut>: inject a shortcut's snippet as if its hotkey was pressed"""
+        if argument not in self.shortcuts_dict:
+            raise CommandError(f"Unknown shortcut: {argument}")
+        self.fire_shortcut(argument)
+        return {'depth': self.injection_worker.depth}
+
+    def command_add(self, argument, reply):
+        """ADD {"shortcut": ..., "text": ..., "engine": ..., "trigger": ...}: add or replace a shortcut"""
+        try:
+            request = json.loads(argument)
+            shortcut = request['shortcut'].strip()
+            text = request['text']
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise CommandError('ADD expects {"shortcut": ..., "text": ...}')
+        engine = request.get('engine')
+        trigger = request.get('trigger')
+        if not shortcut or not isinstance(text, str) or not text:
+            raise CommandError('Shortcut and text must not be empty')
+        if engine is not None and engine not in INJECTION_MODES:
+            raise CommandError(f"Unknown engine: {engine}")
+        if trigger is not None and trigger not in TRIGGERS:
+            raise CommandError(f"Unknown trigger: {trigger}")
+        if trigger != TRIGGER_ABBREVIATION:
+            if shortcut.lower() in self.reserved_shortcuts:
+                raise CommandError(f"Reserved system shortcut: {shortcut}")
+            try:
+                self.hotkey_dispatcher.parse_hotkey(shortcut)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        created = self.put_shortcut(shortcut, text, engine, trigger)
+        self.status.emit('shortcut_added', (shortcut,), 3000)
+        return {'created': created}
+
+    def command_export(self, argument, reply):
+        """EXPORT <path>: write the library to an INI or database file (in the background)"""
+        if not argument:
+            raise CommandError('EXPORT expects a file path')
+        path = os.path.abspath(argument)
+        snapshot = self.snapshot_shortcuts()
+
+        def export():
+            try:
+                if is_database_file(path):
+                    from database import ShortcutDatabase
+                    database = ShortcutDatabase(path)
+                    try:
+                        database.replace_all(*snapshot)
+                    finally:
+                        database.close()
+                else:
+                    atomic_write(path, serialize_ini(*snapshot))
+            except Exception as e:
+                reply(False, e)
+            else:
+                reply(True, {'path': path, 'entries': len(snapshot[0])})
+
+        threading.Thread(target=export, name='ezText-export', daemon=True).start()
+        return DEFERRED
+
+    def command_dump_profile(self, argument, reply):
+        """DUMP-PROFILE [path]: write the diagnostics report (startup profile included)"""
+        path = os.path.abspath(argument) if argument else os.path.join(self.config_dir, 'startup-profile.json')
+        write_dump(path, self.diagnostics_report())
+        return {'path': path}
+
+    def command_quit(self, argument, reply):
+        """QUIT: shut down, e.g. to stop a headless engine"""
+        # Give the event loop time to write this reply first
+        QTimer.singleShot(100, self.quit_requested.emit)
+        return {}
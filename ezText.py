@@ -1,21 +1,30 @@
 import sys
 import os
-import configparser
-import winreg
-import webbrowser
-import subprocess
+import time
+
+# Reference point for startup phase timing (before the Qt imports)
+PROCESS_START = time.perf_counter()
+
+import json
+import threading
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLabel, QLineEdit, QTextEdit,
-                             QTableWidget, QTableWidgetItem, QHeaderView,
+                             QTableView, QHeaderView,
                              QMessageBox, QMenu, QFileDialog, QCheckBox, QSystemTrayIcon,
-                             QComboBox)
-from PyQt6.QtCore import Qt, QSettings, QThread, pyqtSignal, QTimer
+                             QComboBox, QDialog, QPlainTextEdit)
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer
 from PyQt6.QtGui import QKeySequence, QShortcut, QPalette, QColor, QFont, QAction, QIcon
-from PyQt6.QtNetwork import QLocalServer, QLocalSocket
-import keyboard
-import darkdetect
-from updater import AutoUpdater
+# QtNetwork is needed before the window exists (single-instance check in main)
+from PyQt6.QtNetwork import QLocalSocket
+from command_server import SERVER_NAME
+from engine import ShortcutEngine
+from hotkeys import TRIGGER_ABBREVIATION, TRIGGERS
+from storage import atomic_write, is_database_file, serialize_ini, STORAGE_JOURNAL, STORAGE_MODES
+from table_model import ShortcutTableModel, ShortcutFilterProxyModel, COLUMN_TEXT, COLUMN_SHORTCUT
+from theme import create_theme_watcher, detect_dark, stylesheet as theme_stylesheet, palette as theme_palette
+from diagnostics import PhaseTimer
+from injector import MODES as INJECTION_MODES, POLICIES as INJECTION_POLICIES
 
 # Application version - automatically set during build
 def get_version():
@@ -39,13 +48,19 @@ class UpdateCheckThread(QThread):
     no_update = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, updater):
+    def __init__(self, updater, manual=False):
         super().__init__()
         self.updater = updater
+        # Manual checks bypass the check interval (the request stays conditional)
+        self.manual = manual
 
     def run(self):
         try:
-            available, release_info = self.updater.check_for_updates()
+            if not self.manual:
+                # Startup check: undo a half-applied update and clear its
+                # leftovers before anything new is downloaded
+                self.updater.recover_staging()
+            available, release_info = self.updater.check_for_updates(force=self.manual)
             if available:
                 self.update_available.emit(release_info)
             else:
@@ -54,84 +69,159 @@ class UpdateCheckThread(QThread):
             self.error.emit(str(e))
 
 
-class TextShortcutApp(QMainWindow):
-    def __init__(self):
+class InstallerDownloadThread(QThread):
+    """Thread downloading (or reusing) the installer of a release"""
+    progress = pyqtSignal(object, object)    # downloaded, total bytes (may exceed int32)
+    downloaded = pyqtSignal(str)             # installer path
+    failed = pyqtSignal(str)
+
+    def __init__(self, release_info, installer_path):
         super().__init__()
+        self.release_info = release_info
+        self.installer_path = installer_path
+        self.cancel_event = threading.Event()
 
-        # Settings file in %LOCALAPPDATA%
-        self.settings = QSettings('gloriouslegacy', 'ezText')
+    def run(self):
+        from updater import DownloadCancelled, download_file
+        try:
+            download_file(self.release_info['download_url'], self.installer_path,
+                          sha256=self.release_info.get('sha256'),
+                          progress=self.progress.emit, cancel_event=self.cancel_event)
+            self.downloaded.emit(self.installer_path)
+        except DownloadCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
 
-        # Initialize updater
-        self.updater = AutoUpdater(
-            current_version=VERSION,
-            repo_owner='gloriouslegacy',
-            repo_name='ezText'
-        )
+    def cancel(self):
+        self.cancel_event.set()
 
-        # Load saved language or default to Korean
-        self.current_language = self.settings.value('language', 'ko')
 
-        # Get the directory where the script is located (for reference)
-        self.script_dir = os.path.dirname(os.path.abspath(__file__))
+class DeltaUpdateThread(QThread):
+    """Thread applying a release's changed bundle files in place"""
+    progress = pyqtSignal(object, object)    # downloaded, total bytes
+    applied = pyqtSignal(int)                # number of files updated
+    failed = pyqtSignal(str)
 
-        # Use %localAppData%\ezText\ for config file to persist across updates
-        local_app_data = os.environ.get('LOCALAPPDATA', os.path.expanduser('~\\AppData\\Local'))
-        self.config_dir = os.path.join(local_app_data, 'ezText')
+    def __init__(self, updater, release_info):
+        super().__init__()
+        self.updater = updater
+        self.release_info = release_info
+        self.cancel_event = threading.Event()
 
-        # Create config directory if it doesn't exist
-        if not os.path.exists(self.config_dir):
-            os.makedirs(self.config_dir, exist_ok=True)
+    def run(self):
+        from updater import DownloadCancelled
+        try:
+            manifest = self.updater.fetch_manifest(self.release_info['manifest_url'],
+                                                   self.release_info['version'])
+            count = self.updater.apply_delta(manifest, progress=self.progress.emit,
+                                             cancel_event=self.cancel_event)
+            self.applied.emit(count)
+        except DownloadCancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))
 
-        default_config = os.path.join(self.config_dir, 'ezTextShortcut.ini')
+    def cancel(self):
+        self.cancel_event.set()
 
-        # Migration: Check for old config file in script directory and move it
-        old_config = os.path.join(self.script_dir, 'ezTextShortcut.ini')
-        if os.path.exists(old_config) and not os.path.exists(default_config):
-            try:
-                import shutil
-                shutil.copy2(old_config, default_config)
-            except Exception:
-                pass  # If migration fails, just use the new location
-
-        # Load last opened file or use default
-        last_file = self.settings.value('last_file', default_config)
-        # If last file doesn't exist, fall back to default
-        if not os.path.exists(last_file):
-            self.config_file = default_config
-            self.settings.setValue('last_file', default_config)
-        else:
-            self.config_file = last_file
-        self.shortcuts_dict = {}
-        self.active_shortcuts = []
+
+class ThemeSignals(QObject):
+    """Signals emitted from the system theme watcher thread"""
+    system_theme_changed = pyqtSignal(bool)
+
+
+class DiagnosticsDialog(QDialog):
+    """Read-only diagnostics text with an export button"""
+
+    def __init__(self, parent, title, text, export_label, on_export, close_label='Close'):
+        """
+        Args:
+            parent: Parent window
+            title: Window title
+            text: Report text
+            export_label: Label of the export button
+            on_export: Callback() that exports the machine-readable report
+            close_label: Label of the close button
+        """
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(640, 420)
+
+        layout = QVBoxLayout(self)
+
+        self.report = QPlainTextEdit()
+        self.report.setReadOnly(True)
+        self.report.setFont(QFont('Consolas', 10))
+        self.report.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.report.setPlainText(text)
+        layout.addWidget(self.report)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+
+        export_button = QPushButton(export_label)
+        export_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        export_button.clicked.connect(on_export)
+        button_layout.addWidget(export_button)
+
+        close_button = QPushButton(close_label)
+        close_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+
+
+class TextShortcutApp(QMainWindow):
+    def __init__(self, startup_timer=None, engine=None):
+        """
+        Args:
+            startup_timer: PhaseTimer for the startup profile
+            engine: Running ShortcutEngine to attach to (headless mode);
+                by default the window starts its own
+        """
+        super().__init__()
+
+        # Startup phase timing (see ShortcutEngine.finish_startup_profile); a
+        # window attached to a running engine times only its own construction
+        self.startup_timer = startup_timer if startup_timer is not None else PhaseTimer()
+
+        # Library, hotkeys, injection and storage (see engine.py)
+        self.attached = engine is not None
+        if engine is None:
+            engine = ShortcutEngine(VERSION, self.startup_timer)
+        self.engine = engine
+
+        # The engine's mappings are shared, never replaced
+        self.settings = engine.settings
+        self.config_dir = engine.config_dir
+        self.shortcuts_dict = engine.shortcuts_dict
+        self.shortcut_engines = engine.shortcut_engines
+        self.shortcut_triggers = engine.shortcut_triggers
+
+        # Updater is created on first use (see the updater property)
+        self._updater = None
+        self.update_thread = None
+        self.download_thread = None
+        engine.counter_providers.append(self.updater_counters)
+
+        # Load saved language or default to Korean
+        self.current_language = self.settings.value('language', 'ko')
+
+        self.startup_timer.lap('settings')
 
         # System tray icon (will be initialized after translations)
         self.tray_icon = None
 
-        # Single instance server
-        self.server = QLocalServer(self)
-        self.server.newConnection.connect(self.handle_new_connection)
-        # Remove any existing server with the same name
-        QLocalServer.removeServer('ezText_SingleInstance')
-        self.server.listen('ezText_SingleInstance')
+        # Set by exit_app so closing the window doesn't ask again
+        self.exiting = False
 
         # Theme tracking
         self.current_theme = None
         self.theme_mode = self.settings.value('theme_mode', 'auto')  # auto, light, dark
-        
-        # Keepalive timer for hotkeys (prevents hotkeys from becoming inactive)
-        self.hotkey_keepalive_timer = QTimer(self)
-        self.hotkey_keepalive_timer.timeout.connect(self.refresh_hotkeys)
-        self.hotkey_keepalive_timer.start(60000)  # Refresh every 60 seconds
-
-        # Windows system reserved shortcuts
-        self.reserved_shortcuts = {
-            'ctrl+c', 'ctrl+v', 'ctrl+x', 'ctrl+z', 'ctrl+y', 'ctrl+a', 
-            'ctrl+s', 'ctrl+n', 'ctrl+o', 'ctrl+p', 'ctrl+w', 'ctrl+q',
-            'ctrl+f', 'ctrl+h', 'alt+f4', 'alt+tab', 'win+d', 'win+e',
-            'win+r', 'win+l', 'win+i', 'win+s', 'win+x', 'win+tab',
-            'ctrl+alt+del', 'ctrl+shift+esc', 'win+p', 'win+k'
-        }
-        
+        self.theme_watcher = None  # Runs only in auto mode
+
         self.translations = {
             'ko': {
                 'title': 'ezText',
@@ -166,7 +256,10 @@ class TextShortcutApp(QMainWindow):
                 'empty_fields': '텍스트와 단축키를 모두 입력해주세요.',
                 'saved': '단축키가 저장되었습니다.',
                 'saved_as': '{0}에 저장되었습니다.',
+                'save_failed': '저장 실패: {0}: {1}',
                 'loaded': '단축키를 불러왔습니다.',
+                'library_reloaded': '단축키 파일이 변경되어 다시 불러왔습니다 (추가 {0}, 삭제 {1}, 변경 {2})',
+                'reload_failed': '불러오기 실패: {0}: {1}',
                 'autostart_enabled': '자동 실행이 등록되었습니다.',
                 'autostart_disabled': '자동 실행이 해제되었습니다.',
                 'record_shortcut': '단축키 입력... (Esc로 취소)',
@@ -189,6 +282,39 @@ class TextShortcutApp(QMainWindow):
                 'theme_auto': '자동 (시스템 설정)',
                 'theme_light': '라이트 테마',
                 'theme_dark': '다크 테마',
+                'injection_mode': '입력 방식',
+                'injection_default': '기본 입력 방식',
+                'injection_auto': '자동 (길이에 따라 선택)',
+                'injection_type': '키보드 입력',
+                'injection_paste': '클립보드 붙여넣기',
+                'injection_changed': '입력 방식이 변경되었습니다: {0}',
+                'injection_policy': '연속 입력 처리',
+                'injection_policy_queue': '순서대로 모두 입력',
+                'injection_policy_drop': '입력 중이면 무시',
+                'injection_policy_replace': '마지막 입력만 유지',
+                'injection_policy_changed': '연속 입력 처리 방식이 변경되었습니다: {0}',
+                'injection_queue': '입력 대기: {0}',
+                'hotkeys_refreshed': '단축키 {0}개를 다시 등록했습니다 ({1} ms)',
+                'hook_rearmed': '키보드 후크가 중지되어 단축키를 다시 등록했습니다 (누적 {0}회)',
+                'search': '검색...',
+                'hotkeys_registering': '단축키 등록 중... {0}/{1}',
+                'hotkeys_registered': '단축키 {0}개 등록 완료',
+                'diagnostics': '진단 정보',
+                'startup_phases': '시작 단계별 소요 시간',
+                'counters': '실행 통계',
+                'hotkey_latency': '단축키 지연 시간',
+                'export': '내보내기',
+                'close': '닫기',
+                'diagnostics_exported': '진단 정보를 내보냈습니다: {0}',
+                'library_filter': '단축키 파일 (*.ini *.db *.sqlite *.sqlite3);;INI 파일 (*.ini);;SQLite 데이터베이스 (*.db *.sqlite *.sqlite3)',
+                'save_filter': 'INI 파일 (*.ini);;SQLite 데이터베이스 (*.db)',
+                'storage_mode': '저장 방식',
+                'storage_mode_snapshot': '전체 파일 저장',
+                'storage_mode_journal': '변경 내역 기록 (대용량)',
+                'storage_mode_changed': '저장 방식이 변경되었습니다: {0}',
+                'trigger_chord': '단축키 조합',
+                'trigger_abbreviation': '약어 입력',
+                'abbreviation': '약어 (예: ;sig)',
                 'update_available_title': '업데이트 사용 가능',
                 'update_available_text': '새 버전 ({0}) 사용 가능합니다!\n\n현재 버전: {1}',
                 'update_confirm': '지금 업데이트를 다운로드하고 설치하시겠습니까?',
@@ -207,6 +333,8 @@ class TextShortcutApp(QMainWindow):
                 'update_success_msg': '업데이트 다운로드 성공!\n\n설치 프로그램이 지금 열립니다.\n설치 마법사를 따라주세요.',
                 'update_error_title': '업데이트 오류',
                 'update_error_msg': '업데이트 다운로드에 실패했습니다.',
+                'update_delta_applied': '업데이트 {0} 적용 완료 (파일 {1}개). 다시 시작합니다.',
+                'update_delta_failed': '부분 업데이트 실패, 전체 설치 프로그램을 다운로드합니다: {0}',
                 'update_checking': '업데이트 확인 중...',
                 'no_updates': '최신 버전을 사용 중입니다',
                 'up_to_date': '최신 버전',
@@ -249,7 +377,10 @@ class TextShortcutApp(QMainWindow):
                 'empty_fields': 'Please enter both text and shortcut.',
                 'saved': 'Shortcuts have been saved.',
                 'saved_as': 'Saved to {0}.',
+                'save_failed': 'Save failed: {0}: {1}',
                 'loaded': 'Shortcuts have been loaded.',
+                'library_reloaded': 'Shortcut file changed and was reloaded ({0} added, {1} removed, {2} changed)',
+                'reload_failed': 'Load failed: {0}: {1}',
                 'autostart_enabled': 'Autostart has been enabled.',
                 'autostart_disabled': 'Autostart has been disabled.',
                 'record_shortcut': 'Recording shortcut... (Esc to cancel)',
@@ -272,6 +403,39 @@ class TextShortcutApp(QMainWindow):
                 'theme_auto': 'Auto (Follow System)',
                 'theme_light': 'Light Theme',
                 'theme_dark': 'Dark Theme',
+                'injection_mode': 'Input Method',
+                'injection_default': 'Default Method',
+                'injection_auto': 'Auto (By Length)',
+                'injection_type': 'Keyboard Typing',
+                'injection_paste': 'Clipboard Paste',
+                'injection_changed': 'Input method changed to {0}',
+                'injection_policy': 'Overlapping Input',
+                'injection_policy_queue': 'Queue All',
+                'injection_policy_drop': 'Ignore While Busy',
+                'injection_policy_replace': 'Keep Latest Only',
+                'injection_policy_changed': 'Overlapping input policy changed to {0}',
+                'injection_queue': 'Input queue: {0}',
+                'hotkeys_refreshed': 'Re-registered {0} hotkey(s) in {1} ms',
+                'hook_rearmed': 'Keyboard hook stopped responding; hotkeys re-armed ({0} so far)',
+                'search': 'Search...',
+                'hotkeys_registering': 'Registering hotkeys... {0}/{1}',
+                'hotkeys_registered': 'Registered {0} hotkeys',
+                'diagnostics': 'Diagnostics',
+                'startup_phases': 'Startup phases',
+                'counters': 'Counters',
+                'hotkey_latency': 'Hotkey latency',
+                'export': 'Export',
+                'close': 'Close',
+                'diagnostics_exported': 'Diagnostics exported: {0}',
+                'library_filter': 'Shortcut Libraries (*.ini *.db *.sqlite *.sqlite3);;INI Files (*.ini);;SQLite Database (*.db *.sqlite *.sqlite3)',
+                'save_filter': 'INI Files (*.ini);;SQLite Database (*.db)',
+                'storage_mode': 'Storage Mode',
+                'storage_mode_snapshot': 'Save Whole File',
+                'storage_mode_journal': 'Change Journal (Large Libraries)',
+                'storage_mode_changed': 'Storage mode changed to {0}',
+                'trigger_chord': 'Key Chord',
+                'trigger_abbreviation': 'Abbreviation',
+                'abbreviation': 'Abbreviation (e.g. ;sig)',
                 'update_available_title': 'Update Available',
                 'update_available_text': 'A new version ({0}) is available!\n\nCurrent version: {1}',
                 'update_confirm': 'Do you want to download and install the update now?',
@@ -290,6 +454,8 @@ class TextShortcutApp(QMainWindow):
                 'update_success_msg': 'Update downloaded successfully!\n\nThe installer will open now.\nPlease follow the installation wizard.',
                 'update_error_title': 'Update Error',
                 'update_error_msg': 'Failed to download update.',
+                'update_delta_applied': 'Update {0} applied ({1} files). Restarting.',
+                'update_delta_failed': 'Delta update failed, downloading the full installer: {0}',
                 'update_checking': 'Checking for updates...',
                 'no_updates': 'No updates available',
                 'up_to_date': 'Up to Date',
@@ -301,45 +467,65 @@ class TextShortcutApp(QMainWindow):
             }
         }
         
+        self.startup_timer.lap('translations')
+
         self.init_ui()
+        self.startup_timer.lap('init_ui')
         self.setup_tray_icon()
-        self.load_shortcuts()
+        self.startup_timer.lap('tray')
+
+        # The engine reports through signals; hotkeys don't fire while one
+        # of the window's own text fields has focus
+        engine.status.connect(self.on_engine_status)
+        engine.library_loaded.connect(self.on_library_loaded)
+        engine.shortcut_put.connect(self.on_shortcut_put)
+        engine.library_diffed.connect(self.on_library_diffed)
+        engine.show_requested.connect(self.show_window)
+        if not self.attached:
+            engine.quit_requested.connect(self.exit_app)
+        engine.fire_guard = self.input_has_focus
+
+        if self.attached:
+            # Headless engine: the library is loaded already
+            self.on_library_loaded()
+        else:
+            engine.load_shortcuts()
+            self.startup_timer.lap('load_shortcuts')
 
         # Apply theme after UI is fully initialized
         self.apply_theme()
+        self.startup_timer.lap('apply_theme')
 
         # Setup theme monitoring timer
         self.setup_theme_monitor()
+        self.startup_timer.lap('theme_monitor')
+
+        # Check for updates on startup (silent), once the window is up
+        QTimer.singleShot(int(self.settings.value('update_check_delay', 3000)),
+                          self.check_for_updates_silent)
+        self.startup_timer.lap('update_check')
+
+        # Runs once the event loop has shown the window (the startup
+        # profile of a headless engine was written when it started)
+        if not self.attached:
+            QTimer.singleShot(0, self.engine.finish_startup_profile)
+
+    @property
+    def updater(self):
+        """AutoUpdater, created (and its module imported) on first use"""
+        if self._updater is None:
+            from updater import AutoUpdater
+            self._updater = AutoUpdater(
+                current_version=VERSION,
+                repo_owner='gloriouslegacy',
+                repo_name='ezText',
+                cache_path=os.path.join(self.config_dir, 'update-cache.json'),
+                check_interval=int(self.settings.value('update_check_interval', 6 * 60 * 60)),
+                # Only the installed onedir bundle can be updated file by file
+                install_dir=os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else None
+            )
+        return self._updater
 
-        # Check for updates on startup (silent)
-        self.check_for_updates_silent()
-        
-        # Setup timer for periodic hotkey refresh to maintain stability on Windows
-        self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.refresh_hotkeys)
-        
-        # Run every 5 minutes (300,000ms) to prevent Windows from dropping the hook
-        self.refresh_timer.start(300000)
-        
-    def refresh_hotkeys(self):
-        
-            """
-            Periodically re-registers all hotkeys to prevent Windows from disconnecting idle hooks.
-            """
-            if not self.shortcuts_dict:
-                return
-                
-            try:
-                for shortcut in list(self.active_shortcuts):
-                    self.unregister_hotkey(shortcut)
-                
-                for shortcut, text in self.shortcuts_dict.items():
-                    self.register_hotkey(shortcut, text)
-                
-                self.log_status("Shortcuts refreshed for stability", 2000)
-            except Exception as e:
-                print(f"Error during hotkey refresh: {e}")
- 
     def tr(self, key):
         """Get translated text"""
         return self.translations[self.current_language].get(key, key)
@@ -347,6 +533,10 @@ class TextShortcutApp(QMainWindow):
     def log_status(self, message, duration=3000):
         """Log message to status bar"""
         self.status_bar.showMessage(message, duration)
+
+    def on_engine_status(self, key, args, duration):
+        """Show an engine status message in the current language"""
+        self.log_status(self.tr(key).format(*args), duration)
     
     def setup_tray_icon(self):
         """Setup system tray icon"""
@@ -402,16 +592,17 @@ class TextShortcutApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            # Finish pending writes to the current file first
+            self.engine.flush_autosave()
+
             # Clear all shortcuts
-            for shortcut in list(self.active_shortcuts):
-                self.unregister_hotkey(shortcut)
-            
-            self.shortcuts_dict.clear()
-            self.table.setRowCount(0)
+            self.engine.clear_shortcuts()
+            self.table_model.clear()
 
             # Reset to default config file
             default_config = os.path.join(self.config_dir, 'ezTextShortcut.ini')
-            self.config_file = default_config
+            self.engine.config_file = default_config
+            self.engine.watch_library()
 
             self.log_status("New file created")
     
@@ -456,6 +647,13 @@ class TextShortcutApp(QMainWindow):
         # Status bar for logs
         self.status_bar = self.statusBar()
         self.status_bar.setFont(QFont('Segoe UI', 9))
+
+        # Injection queue depth (hidden while the queue is empty)
+        self.queue_label = QLabel()
+        self.queue_label.setFont(QFont('Segoe UI', 9))
+        self.queue_label.setVisible(False)
+        self.status_bar.addPermanentWidget(self.queue_label)
+        self.engine.injection_signals.queue_depth_changed.connect(self.on_queue_depth_changed)
         
         # Input section - Text input (first row)
         text_layout = QHBoxLayout()
@@ -491,6 +689,20 @@ class TextShortcutApp(QMainWindow):
         shortcut_label = QLabel(self.tr('shortcut') + ':')
         shortcut_label.setFont(QFont('Segoe UI', 10))
 
+        # Trigger type: modifier chord or typed abbreviation
+        self.trigger_combo = QComboBox()
+        self.trigger_combo.setFont(QFont('Segoe UI', 10))
+        self.trigger_combo.setMinimumHeight(35)
+        self.trigger_combo.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.populate_trigger_combo()
+        self.trigger_combo.currentIndexChanged.connect(self.on_trigger_type_changed)
+
+        # Abbreviation input (shown instead of the chord inputs)
+        self.abbrev_input = QLineEdit()
+        self.abbrev_input.setFont(QFont('Segoe UI', 10))
+        self.abbrev_input.setPlaceholderText(self.tr('abbreviation'))
+        self.abbrev_input.setVisible(False)
+
         # Modifier keys checkboxes
         self.ctrl_checkbox = QCheckBox('Ctrl')
         self.ctrl_checkbox.setFont(QFont('Segoe UI', 10))
@@ -534,6 +746,13 @@ class TextShortcutApp(QMainWindow):
         self.key_combo.addItems(keys)
         self.key_combo.setCurrentIndex(0)  # Default to 'A'
 
+        # Per-snippet injection mode (empty = follow the global setting)
+        self.engine_combo = QComboBox()
+        self.engine_combo.setFont(QFont('Segoe UI', 10))
+        self.engine_combo.setMinimumHeight(35)
+        self.engine_combo.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.populate_engine_combo()
+
         # Add button (create early to add to shortcut layout)
         self.add_button = QPushButton(self.tr('add'))
         self.add_button.setFont(QFont('Segoe UI', 10))
@@ -543,11 +762,14 @@ class TextShortcutApp(QMainWindow):
         self.add_button.setObjectName("addButton")
 
         shortcut_layout.addWidget(shortcut_label)
+        shortcut_layout.addWidget(self.trigger_combo)
+        shortcut_layout.addWidget(self.abbrev_input)
         shortcut_layout.addWidget(self.ctrl_checkbox)
         shortcut_layout.addWidget(self.win_checkbox)
         shortcut_layout.addWidget(self.alt_checkbox)
         shortcut_layout.addWidget(self.shift_checkbox)
         shortcut_layout.addWidget(self.key_combo)
+        shortcut_layout.addWidget(self.engine_combo)
         shortcut_layout.addWidget(self.add_button)
 
         # Warning label
@@ -600,27 +822,45 @@ class TextShortcutApp(QMainWindow):
         button_layout.addStretch()
         button_layout.addWidget(self.restart_button)
         
-        # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(['', self.tr('text'), self.tr('shortcut')])
+        # Table (model/view; rows live in a compact store, not per-cell widgets)
+        self.table_model = ShortcutTableModel(self.shortcuts_dict, self)
+        self.table_model.set_headers(['', self.tr('text'), self.tr('shortcut')])
+        self.table_model.edit_requested.connect(self.on_item_changed)
+        self.table_filter = ShortcutFilterProxyModel(self)
+        self.table_filter.setSourceModel(self.table_model)
+        self.table = QTableView()
+        self.table.setModel(self.table_filter)
+
+        # Search box (full-text search for database libraries), applied once typing pauses
+        self.search_input = QLineEdit()
+        self.search_input.setFont(QFont('Segoe UI', 10))
+        self.search_input.setPlaceholderText(self.tr('search'))
+        self.search_input.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
         self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
         self.table.setFont(QFont('Segoe UI', 10))
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.NoSelection)
         self.table.setAlternatingRowColors(True)
         self.table.setFocusPolicy(Qt.FocusPolicy.NoFocus)
-        self.table.itemChanged.connect(self.on_item_changed)  # Connect item change signal
-        self.table.setEditTriggers(QTableWidget.EditTrigger.DoubleClicked)  # Enable double-click editing
+        self.table.setEditTriggers(QTableView.EditTrigger.DoubleClicked)  # Enable double-click editing
+        self.table.setWordWrap(False)
         self.table.verticalHeader().setVisible(False)  # Hide row numbers
+        # Fixed row height: no per-row size hint computation on large tables
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         
         # Add layouts to main layout
         main_layout.addLayout(text_layout)
         main_layout.addLayout(shortcut_layout)
         main_layout.addLayout(warning_layout)
         main_layout.addLayout(button_layout)
+        main_layout.addWidget(self.search_input)
         main_layout.addWidget(self.table)
         
     def create_menu_bar(self):
@@ -664,9 +904,24 @@ class TextShortcutApp(QMainWindow):
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
         
-        # Settings menu
-        settings_menu = menubar.addMenu(self.tr('settings'))
-        
+        # Settings and Help menus have no keyboard shortcuts, so their
+        # actions are only built the first time they are opened
+        self.add_lazy_menu(self.tr('settings'), self.populate_settings_menu)
+        self.add_lazy_menu(self.tr('help'), self.populate_help_menu)
+
+    def add_lazy_menu(self, title, populate):
+        """Add a menu bar menu whose actions are created on first open"""
+        menu = self.menuBar().addMenu(title)
+
+        def build():
+            if menu.isEmpty():
+                populate(menu)
+
+        menu.aboutToShow.connect(build)
+        return menu
+
+    def populate_settings_menu(self, settings_menu):
+        """Build the Settings menu"""
         # Language submenu
         language_menu = QMenu(self.tr('language'), self)
         
@@ -704,9 +959,44 @@ class TextShortcutApp(QMainWindow):
 
         settings_menu.addMenu(theme_menu)
 
-        # Help menu
-        help_menu = menubar.addMenu(self.tr('help'))
-        
+        # Injection mode submenu
+        injection_menu = QMenu(self.tr('injection_mode'), self)
+
+        for mode in INJECTION_MODES:
+            injection_action = QAction(self.tr(f'injection_{mode}'), self)
+            injection_action.triggered.connect(lambda checked, m=mode: self.change_injection_mode(m))
+            injection_menu.addAction(injection_action)
+
+        settings_menu.addMenu(injection_menu)
+
+        # Overlapping fire policy submenu
+        policy_menu = QMenu(self.tr('injection_policy'), self)
+
+        for policy in INJECTION_POLICIES:
+            policy_action = QAction(self.tr(f'injection_policy_{policy}'), self)
+            policy_action.triggered.connect(lambda checked, p=policy: self.change_injection_policy(p))
+            policy_menu.addAction(policy_action)
+
+        settings_menu.addMenu(policy_menu)
+
+        # Storage mode submenu
+        storage_menu = QMenu(self.tr('storage_mode'), self)
+
+        for mode in STORAGE_MODES:
+            storage_action = QAction(self.tr(f'storage_mode_{mode}'), self)
+            storage_action.triggered.connect(lambda checked, m=mode: self.change_storage_mode(m))
+            storage_menu.addAction(storage_action)
+
+        settings_menu.addMenu(storage_menu)
+
+    def populate_help_menu(self, help_menu):
+        """Build the Help menu"""
+        diagnostics_action = QAction(self.tr('diagnostics'), self)
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        help_menu.addAction(diagnostics_action)
+
+        help_menu.addSeparator()
+
         check_update_action = QAction(self.tr('check_update'), self)
         check_update_action.triggered.connect(self.check_for_updates)
         help_menu.addAction(check_update_action)
@@ -715,23 +1005,76 @@ class TextShortcutApp(QMainWindow):
         visit_github_action.triggered.connect(self.visit_github)
         help_menu.addAction(visit_github_action)
     
+    def populate_engine_combo(self):
+        """Fill the per-snippet injection mode combobox"""
+        current = self.engine_combo.currentData()
+        self.engine_combo.clear()
+        self.engine_combo.addItem(self.tr('injection_default'), '')
+        for mode in INJECTION_MODES:
+            self.engine_combo.addItem(self.tr(f'injection_{mode}'), mode)
+        index = self.engine_combo.findData(current if current is not None else '')
+        self.engine_combo.setCurrentIndex(max(index, 0))
+
+    def populate_trigger_combo(self):
+        """Fill the trigger type combobox"""
+        current = self.trigger_combo.currentData()
+        self.trigger_combo.blockSignals(True)
+        self.trigger_combo.clear()
+        for trigger in TRIGGERS:
+            self.trigger_combo.addItem(self.tr(f'trigger_{trigger}'), trigger)
+        index = self.trigger_combo.findData(current)
+        self.trigger_combo.setCurrentIndex(max(index, 0))
+        self.trigger_combo.blockSignals(False)
+
+    def on_trigger_type_changed(self):
+        """Switch the shortcut inputs between chord and abbreviation"""
+        is_abbreviation = self.trigger_combo.currentData() == TRIGGER_ABBREVIATION
+        self.abbrev_input.setVisible(is_abbreviation)
+        for widget in (self.ctrl_checkbox, self.win_checkbox, self.alt_checkbox,
+                       self.shift_checkbox, self.key_combo):
+            widget.setVisible(not is_abbreviation)
+
+    def change_injection_mode(self, mode):
+        """Change the global injection mode (auto, type, paste)"""
+        self.engine.injector.mode = mode
+        self.settings.setValue('injection_mode', mode)
+        self.log_status(self.tr('injection_changed').format(self.tr(f'injection_{mode}')))
+
+    def change_injection_policy(self, policy):
+        """Change how hotkeys fired during a running injection are handled"""
+        self.engine.injection_worker.policy = policy
+        self.settings.setValue('injection_policy', policy)
+        self.log_status(self.tr('injection_policy_changed').format(self.tr(f'injection_policy_{policy}')))
+
+    def change_storage_mode(self, mode):
+        """Switch between whole-file saves and the change journal"""
+        self.engine.set_storage_mode(mode)
+        self.log_status(self.tr('storage_mode_changed').format(self.tr(f'storage_mode_{mode}')))
+
+    def on_queue_depth_changed(self, depth):
+        """Show the number of pending injections in the status bar"""
+        self.queue_label.setText(self.tr('injection_queue').format(depth))
+        self.queue_label.setVisible(depth > 0)
+
     def setup_theme_monitor(self):
-        """Setup timer to monitor system theme changes"""
-        self.theme_timer = QTimer(self)
-        self.theme_timer.timeout.connect(self.check_theme_change)
-        self.theme_timer.start(1000)  # Check every 1 second
-
-    def check_theme_change(self):
-        """Check if system theme has changed and update if necessary"""
-        # Only check if in auto mode
+        """Watch system theme changes while the theme mode is 'auto'"""
         if self.theme_mode != 'auto':
+            if self.theme_watcher is not None:
+                self.theme_watcher.stop()
             return
 
-        is_dark = darkdetect.isDark()
-        new_theme = 'dark' if is_dark else 'light'
+        if self.theme_watcher is None:
+            self.theme_signals = ThemeSignals(self)
+            self.theme_signals.system_theme_changed.connect(self.on_system_theme_changed)
+            self.theme_watcher = create_theme_watcher()
+        # The watcher thread only reports flips; the signal queues them to the GUI thread
+        self.theme_watcher.start(self.theme_signals.system_theme_changed.emit)
 
-        if self.current_theme != new_theme:
-            self.current_theme = new_theme
+    def on_system_theme_changed(self, is_dark):
+        """Apply a system theme flip (auto mode only)"""
+        if self.theme_mode != 'auto':
+            return
+        if self.current_theme != ('dark' if is_dark else 'light'):
             self.apply_theme()
 
     def change_theme(self, mode):
@@ -739,6 +1082,7 @@ class TextShortcutApp(QMainWindow):
         self.theme_mode = mode
         self.settings.setValue('theme_mode', mode)
         self.apply_theme()
+        self.setup_theme_monitor()
 
         mode_names = {
             'auto': self.tr('theme_auto'),
@@ -747,183 +1091,37 @@ class TextShortcutApp(QMainWindow):
         }
         self.log_status(f"Theme changed to {mode_names.get(mode, mode)}")
 
-    def apply_theme(self):
+    def apply_theme(self, force=False):
+        """Apply the effective light/dark theme (no-op if it is already applied)"""
         # Determine theme based on mode
         if self.theme_mode == 'auto':
-            is_dark = darkdetect.isDark()
+            watcher = self.theme_watcher
+            if watcher is not None and watcher.running and watcher.is_dark is not None:
+                is_dark = watcher.is_dark
+            else:
+                is_dark = detect_dark()
         elif self.theme_mode == 'dark':
             is_dark = True
         else:  # light
             is_dark = False
 
-        self.current_theme = 'dark' if is_dark else 'light'
-
-        if is_dark:
-            # Dark theme colors 
-            bg_color = "#202020"
-            surface_color = "#2b2b2b"
-            text_color = "#ffffff"
-            border_color = "#3d3d3d"
-            hover_color = "#363636"
-            accent_color = "#0078d4"
-            table_alternate = "#252525"
-        else:
-            # Light theme colors
-            bg_color = "#f3f3f3"
-            surface_color = "#ffffff"
-            text_color = "#000000"
-            border_color = "#e0e0e0"
-            hover_color = "#e8e8e8"
-            accent_color = "#0067c0"
-            table_alternate = "#f9f9f9"
-        
-        style = f"""
-            QMainWindow {{
-                background-color: {bg_color};
-            }}
-            QWidget {{
-                background-color: {bg_color};
-                color: {text_color};
-                font-family: 'Segoe UI';
-            }}
-            QLineEdit {{
-                background-color: {surface_color};
-                border: 1px solid {border_color};
-                border-radius: 4px;
-                padding: 5px 10px;
-                color: {text_color};
-                min-height: 25px;
-            }}
-            QLineEdit:focus {{
-                border: 2px solid {accent_color};
-                background-color: {surface_color};
-            }}
-            QLineEdit:disabled {{
-                background-color: {bg_color};
-                color: {border_color};
-                border: 1px solid {border_color};
-            }}
-            QLineEdit[readOnly="true"] {{
-                background-color: {surface_color};
-                color: {text_color};
-            }}
-            QLineEdit[readOnly="true"]:disabled {{
-                background-color: {bg_color};
-                color: {border_color};
-            }}
-            QTextEdit {{
-                background-color: {surface_color};
-                border: 1px solid {border_color};
-                border-radius: 4px;
-                padding: 5px 10px;
-                color: {text_color};
-            }}
-            QTextEdit:focus {{
-                border: 2px solid {accent_color};
-                background-color: {surface_color};
-            }}
-            QPushButton {{
-                background-color: {surface_color};
-                border: 1px solid {border_color};
-                border-radius: 4px;
-                padding: 8px 15px;
-                color: {text_color};
-            }}
-            QPushButton:hover {{
-                background-color: {hover_color};
-            }}
-            QPushButton:pressed {{
-                background-color: {border_color};
-            }}
-            QPushButton#addButton {{
-                background-color: {accent_color};
-                color: #ffffff;
-                font-weight: bold;
-                border: none;
-            }}
-            QPushButton#addButton:hover {{
-                background-color: {'#1a86d9' if is_dark else '#0078d4'};
-            }}
-            QPushButton#addButton:pressed {{
-                background-color: {'#0067c0' if is_dark else '#005a9e'};
-            }}
-            QTableWidget {{
-                background-color: {surface_color};
-                alternate-background-color: {table_alternate};
-                border: 1px solid {border_color};
-                border-radius: 4px;
-                gridline-color: {border_color};
-                color: {text_color};
-            }}
-            QTableWidget::item {{
-                padding: 8px;
-                border: none;
-            }}
-            QTableWidget::item:hover {{
-                background-color: {hover_color};
-            }}
-            QTableWidget::item:focus {{
-                background-color: transparent;
-                outline: none;
-            }}
-            QHeaderView::section {{
-                background-color: {surface_color};
-                border: 1px solid {border_color};
-                padding: 8px;
-                font-weight: bold;
-                color: {text_color};
-            }}
-            QMenuBar {{
-                background-color: {bg_color};
-                color: {text_color};
-                border-bottom: 1px solid {border_color};
-            }}
-            QMenuBar::item:selected {{
-                background-color: {hover_color};
-            }}
-            QMenu {{
-                background-color: {surface_color};
-                border: 1px solid {border_color};
-                color: {text_color};
-            }}
-            QMenu::item:selected {{
-                background-color: {hover_color};
-            }}
-            QLabel {{
-                color: {text_color};
-                background-color: transparent;
-            }}
-            QLabel#warningLabel {{
-                color: #ff9800;
-                background-color: transparent;
-                padding: 5px;
-            }}
-            QCheckBox {{
-                color: {text_color};
-                spacing: 5px;
-            }}
-            QCheckBox::indicator {{
-                width: 18px;
-                height: 18px;
-                border-radius: 3px;
-                border: 2px solid {border_color};
-                background-color: {surface_color};
-            }}
-            QCheckBox::indicator:hover {{
-                border-color: #10a37f;
-            }}
-            QCheckBox::indicator:checked {{
-                background-color: #10a37f;
-                border-color: #10a37f;
-                image: url(data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTIiIGhlaWdodD0iOSIgdmlld0JveD0iMCAwIDEyIDkiIGZpbGw9Im5vbmUiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+PHBhdGggZD0iTTEgNEw0LjUgNy41TDExIDEiIHN0cm9rZT0id2hpdGUiIHN0cm9rZS13aWR0aD0iMiIgc3Ryb2tlLWxpbmVjYXA9InJvdW5kIiBzdHJva2UtbGluZWpvaW49InJvdW5kIi8+PC9zdmc+);
-            }}
-        """
-        self.setStyleSheet(style)
+        theme = 'dark' if is_dark else 'light'
+
+        # Restyling re-polishes every widget, so only do it on an actual change
+        if theme == self.current_theme and not force:
+            return
+        self.current_theme = theme
+
+        # Both themes' stylesheets and palettes are built once and cached
+        self.setPalette(theme_palette(theme))
+        self.setStyleSheet(theme_stylesheet(theme))
     
     def add_shortcut(self):
         """Add new shortcut"""
         text = self.text_input.toPlainText().strip()
 
+        trigger = self.trigger_combo.currentData()
+
         # Build shortcut from checkboxes and combobox
         modifiers = []
         if self.ctrl_checkbox.isChecked():
@@ -938,17 +1136,23 @@ class TextShortcutApp(QMainWindow):
         main_key = self.key_combo.currentText().lower()
 
         # Build shortcut string
-        if modifiers:
+        if trigger == TRIGGER_ABBREVIATION:
+            shortcut = self.abbrev_input.text().strip()
+        elif modifiers:
             shortcut = '+'.join(modifiers) + '+' + main_key
         else:
             shortcut = main_key
 
+        if not shortcut:
+            self.log_status(self.tr('empty_fields'))
+            return
+
         if not text:
             self.log_status(self.tr('empty_fields'))
             return
         
         # Check if shortcut is reserved
-        if shortcut.lower() in self.reserved_shortcuts:
+        if trigger != TRIGGER_ABBREVIATION and shortcut.lower() in self.engine.reserved_shortcuts:
             self.log_status(self.tr('reserved_shortcut'))
             return
         
@@ -957,32 +1161,8 @@ class TextShortcutApp(QMainWindow):
             self.log_status(self.tr('duplicate_shortcut'))
             return
         
-        # Add to dictionary and table
-        self.shortcuts_dict[shortcut] = text
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        
-        # Temporarily disconnect signal to prevent triggering during setup
-        self.table.itemChanged.disconnect(self.on_item_changed)
-        
-        # Add checkbox
-        checkbox = QCheckBox()
-        checkbox.setStyleSheet("QCheckBox { margin-left: 7px; }")
-        self.table.setCellWidget(row, 0, checkbox)
-        
-        # Add text - editable
-        text_item = QTableWidgetItem(text)
-        self.table.setItem(row, 1, text_item)
-        
-        # Add shortcut - editable
-        shortcut_item = QTableWidgetItem(shortcut)
-        self.table.setItem(row, 2, shortcut_item)
-        
-        # Reconnect signal
-        self.table.itemChanged.connect(self.on_item_changed)
-        
-        # Register hotkey
-        self.register_hotkey(shortcut, text)
+        # Add to dictionary and table, register the hotkey and save
+        self.engine.put_shortcut(shortcut, text, self.engine_combo.currentData(), trigger)
 
         # Clear inputs and reset checkboxes
         self.text_input.clear()
@@ -991,96 +1171,77 @@ class TextShortcutApp(QMainWindow):
         self.alt_checkbox.setChecked(False)
         self.shift_checkbox.setChecked(False)
         self.key_combo.setCurrentIndex(0)  # Reset to first item (A)
-
-        # Auto save
-        self.save_shortcuts(silent=True)
+        self.engine_combo.setCurrentIndex(0)  # Reset to default method
+        self.abbrev_input.clear()
 
         # Log status
         self.log_status(self.tr('shortcut_added').format(shortcut))
-    
-    def on_item_changed(self, item):
-        """Handle table item changes (editing)"""
-        if item is None:
+
+    def on_item_changed(self, row_id, col, value):
+        """Handle table edits (the model only changes once the edit is accepted)"""
+        row = self.table_model.row_of(row_id)
+        if row is None:
             return
-        
-        row = item.row()
-        col = item.column()
-        
-        # Get old and new values
-        if col == 1:  # Text column
-            old_shortcut = self.table.item(row, 2).text()
-            new_text = item.text().strip()
+
+        if col == COLUMN_TEXT:  # Text column
+            old_shortcut = self.table_model.shortcut_at(row)
+            new_text = value.strip()
             
             if not new_text:
                 self.log_status(self.tr('empty_fields'))
-                # Restore old value
-                self.table.itemChanged.disconnect(self.on_item_changed)
-                item.setText(self.shortcuts_dict[old_shortcut])
-                self.table.itemChanged.connect(self.on_item_changed)
                 return
             
-            # Update dictionary
+            # Update dictionary (the hotkey callback reads the text when it fires,
+            # so the registration itself does not change)
             self.shortcuts_dict[old_shortcut] = new_text
+            self.table_model.text_changed(row)
+            self.engine.persist_set(old_shortcut)
             
-            # Re-register hotkey with new text
-            self.unregister_hotkey(old_shortcut)
-            self.register_hotkey(old_shortcut, new_text)
-            
-        elif col == 2:  # Shortcut column
-            old_shortcut = None
-            # Find old shortcut
-            for sc in self.shortcuts_dict.keys():
-                if self.shortcuts_dict[sc] == self.table.item(row, 1).text():
-                    old_shortcut = sc
-                    break
-            
-            new_shortcut = item.text().strip()
+        elif col == COLUMN_SHORTCUT:  # Shortcut column
+            old_shortcut = self.table_model.shortcut_at(row)
+            new_shortcut = value.strip()
             
             if not new_shortcut:
                 self.log_status(self.tr('empty_fields'))
-                # Restore old value
-                self.table.itemChanged.disconnect(self.on_item_changed)
-                item.setText(old_shortcut)
-                self.table.itemChanged.connect(self.on_item_changed)
+                return
+
+            if new_shortcut == old_shortcut:
                 return
             
             # Check if new shortcut is reserved
-            if new_shortcut.lower() in self.reserved_shortcuts:
+            if (old_shortcut not in self.shortcut_triggers and
+                    new_shortcut.lower() in self.engine.reserved_shortcuts):
                 self.log_status(self.tr('reserved_shortcut'))
-                # Restore old value
-                self.table.itemChanged.disconnect(self.on_item_changed)
-                item.setText(old_shortcut)
-                self.table.itemChanged.connect(self.on_item_changed)
                 return
             
             # Check if new shortcut already exists (but not the same row)
-            if new_shortcut in self.shortcuts_dict and new_shortcut != old_shortcut:
+            if new_shortcut in self.shortcuts_dict:
                 self.log_status(self.tr('duplicate_shortcut'))
-                # Restore old value
-                self.table.itemChanged.disconnect(self.on_item_changed)
-                item.setText(old_shortcut)
-                self.table.itemChanged.connect(self.on_item_changed)
                 return
             
+            # Re-register hotkey (before the trigger type moves to the new name)
+            self.engine.unregister_hotkey(old_shortcut)
+
             # Update dictionary
-            text = self.shortcuts_dict.pop(old_shortcut)
-            self.shortcuts_dict[new_shortcut] = text
-            
-            # Re-register hotkey
-            self.unregister_hotkey(old_shortcut)
-            self.register_hotkey(new_shortcut, text)
+            self.shortcuts_dict.rename(old_shortcut, new_shortcut)
+            self.engine.usage_stats.rename(old_shortcut, new_shortcut)
+            if old_shortcut in self.shortcut_engines:
+                self.shortcut_engines[new_shortcut] = self.shortcut_engines.pop(old_shortcut)
+            if old_shortcut in self.shortcut_triggers:
+                self.shortcut_triggers[new_shortcut] = self.shortcut_triggers.pop(old_shortcut)
+            self.table_model.set_shortcut(row, new_shortcut)
+
+            self.engine.register_hotkey(new_shortcut)
+
+            # Auto save
+            self.engine.persist_delete([old_shortcut])
+            self.engine.persist_set(new_shortcut)
         
-        # Auto save
-        self.save_shortcuts(silent=True)
         self.log_status("Updated successfully")
     
     def delete_selected_shortcuts(self):
         """Delete selected shortcuts"""
-        selected_rows = []
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 0)
-            if checkbox and checkbox.isChecked():
-                selected_rows.append(row)
+        selected_rows = self.table_model.checked_rows()
         
         if not selected_rows:
             self.log_status(self.tr('no_selection'))
@@ -1095,42 +1256,39 @@ class TextShortcutApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            # Delete in reverse order to maintain correct indices
-            for row in reversed(selected_rows):
-                shortcut = self.table.item(row, 2).text()
+            deleted = []
+            for row in selected_rows:
+                shortcut = self.table_model.shortcut_at(row)
+                deleted.append(shortcut)
                 
                 # Unregister hotkey
-                self.unregister_hotkey(shortcut)
+                self.engine.unregister_hotkey(shortcut)
                 
                 # Remove from dictionary
                 del self.shortcuts_dict[shortcut]
-                
-                # Remove from table
-                self.table.removeRow(row)
+                self.shortcut_engines.pop(shortcut, None)
+                self.shortcut_triggers.pop(shortcut, None)
+            
+            # Remove from table in one model operation
+            self.table_model.remove_rows(selected_rows)
             
             # Auto save
-            self.save_shortcuts(silent=True)
+            self.engine.persist_delete(deleted)
             
             # Log status
             self.log_status(self.tr('shortcut_deleted').format(len(selected_rows)))
     
     def select_all(self):
         """Select all checkboxes"""
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 0)
-            if checkbox:
-                checkbox.setChecked(True)
+        self.table_model.set_all_checked(True)
     
     def deselect_all(self):
         """Deselect all checkboxes"""
-        for row in range(self.table.rowCount()):
-            checkbox = self.table.cellWidget(row, 0)
-            if checkbox:
-                checkbox.setChecked(False)
+        self.table_model.set_all_checked(False)
     
     def delete_all_shortcuts(self):
         """Delete all shortcuts"""
-        if self.table.rowCount() == 0:
+        if self.table_model.rowCount() == 0:
             return
         
         # Confirm deletion
@@ -1142,100 +1300,82 @@ class TextShortcutApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            # Unregister all hotkeys
-            for shortcut in list(self.active_shortcuts):
-                self.unregister_hotkey(shortcut)
-            
-            # Clear dictionary and table
-            self.shortcuts_dict.clear()
-            self.table.setRowCount(0)
+            # Unregister all hotkeys and clear dictionary and table
+            self.engine.clear_shortcuts()
+            self.table_model.clear()
             
             # Auto save
-            self.save_shortcuts(silent=True)
+            self.engine.persist_clear()
             
             # Log status
             self.log_status(self.tr('all_deleted'))
     
-    def register_hotkey(self, shortcut, text):
-        """Register keyboard hotkey"""
-        try:
-            def callback():
-                # Don't trigger if any input field in the app has focus
-                focused_widget = QApplication.focusWidget()
-                if focused_widget and (
-                    isinstance(focused_widget, (QLineEdit, QTextEdit)) or
-                    self.text_input.hasFocus()
-                ):
-                    return
-                keyboard.write(text)
-            
-            keyboard.add_hotkey(shortcut, callback)
-            
-            if shortcut not in self.active_shortcuts:
-                self.active_shortcuts.append(shortcut)
-        except Exception as e:
-            print(f"Error registering hotkey {shortcut}: {e}")
-    
-    def unregister_hotkey(self, shortcut):
-        """Unregister keyboard hotkey"""
-        try:
-            keyboard.remove_hotkey(shortcut)
-            if shortcut in self.active_shortcuts:
-                self.active_shortcuts.remove(shortcut)
-        except Exception as e:
-            print(f"Error unregistering hotkey {shortcut}: {e}")
-    
-    def refresh_hotkeys(self):
-        """Refresh all hotkeys to keep them active (prevents timeout issues)"""
-        try:
-            # Store current shortcuts
-            current_shortcuts = dict(self.shortcuts_dict)
-            
-            # Unregister and re-register all active shortcuts
-            for shortcut in list(self.active_shortcuts):
-                if shortcut in current_shortcuts:
-                    self.unregister_hotkey(shortcut)
-                    self.register_hotkey(shortcut, current_shortcuts[shortcut])
-        except Exception as e:
-            print(f"Error refreshing hotkeys: {e}")
-    
+    def input_has_focus(self):
+        """Whether one of the window's text fields has focus (hotkeys must not fire)"""
+        focused_widget = QApplication.focusWidget()
+        return bool(focused_widget and (
+            isinstance(focused_widget, (QLineEdit, QTextEdit)) or
+            self.text_input.hasFocus()
+        ))
+
+    def apply_search(self):
+        """Filter the table by the search box"""
+        query = self.search_input.text().strip()
+        if query and is_database_file(self.engine.config_file):
+            self.table_filter.set_query(query, set(self.engine.open_database().search(query, limit=None)))
+        else:
+            self.table_filter.set_query(query)
+
     def save_shortcuts(self, silent=False):
         """Save shortcuts to ini file"""
-        config = configparser.ConfigParser()
-        
-        for shortcut, text in self.shortcuts_dict.items():
-            config[shortcut] = {'text': text}
-        
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            config.write(f)
-        
-        if not silent:
-            self.log_status(self.tr('saved'))
+        if silent:
+            # Autosave: coalesced and written in the background
+            self.engine.schedule_autosave()
+            return
+
+        self.engine.write_autosave()
+        self.engine.autosave_writer.flush()
+        if self.engine.storage_mode == STORAGE_JOURNAL and not is_database_file(self.engine.config_file):
+            # The snapshot now contains every journal record
+            self.engine.open_journal().reset()
+        self.log_status(self.tr('saved'))
     
     def save_shortcuts_as(self):
         """Save shortcuts to a new file with dialog"""
-        file_path, _ = QFileDialog.getSaveFileName(
+        file_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             self.tr('save_as'),
             '',
-            'INI Files (*.ini)'
+            self.tr('save_filter')
         )
         
         if file_path:
-            # Ensure .ini extension
-            if not file_path.endswith('.ini'):
-                file_path += '.ini'
-            
-            config = configparser.ConfigParser()
-            
-            for shortcut, text in self.shortcuts_dict.items():
-                config[shortcut] = {'text': text}
+            # Ensure an extension matching the chosen format
+            if not file_path.endswith('.ini') and not is_database_file(file_path):
+                file_path += '.db' if '*.db' in selected_filter else '.ini'
+
+            # Finish pending writes to the current file first
+            self.engine.flush_autosave()
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                config.write(f)
+            if is_database_file(file_path):
+                from database import ShortcutDatabase
+                # INI -> database import (or database copy) in one transaction
+                database = ShortcutDatabase(file_path)
+                try:
+                    database.replace_all(*self.engine.snapshot_shortcuts())
+                finally:
+                    database.close()
+            else:
+                # Database -> INI export, or a plain INI copy
+                atomic_write(file_path, serialize_ini(*self.engine.snapshot_shortcuts()))
             
             # Update current config file path
-            self.config_file = file_path
+            self.engine.config_file = file_path
+            self.engine.watch_library()
+
+            if not is_database_file(file_path):
+                # Records of an older journal at this path are superseded by the new file
+                self.engine.open_journal().reset()
             
             # Save last opened file path
             self.settings.setValue('last_file', file_path)
@@ -1244,71 +1384,44 @@ class TextShortcutApp(QMainWindow):
             filename = os.path.basename(file_path)
             self.log_status(self.tr('saved_as').format(filename))
     
-    def load_shortcuts(self):
-        """Load shortcuts from ini file"""
-        # If config file doesn't exist, create an empty one
-        if not os.path.exists(self.config_file):
-            config = configparser.ConfigParser()
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                config.write(f)
-            return
+    def on_library_loaded(self):
+        """Fill the table from the engine's library in a single model reset"""
+        self.table_model.reset_rows(self.shortcuts_dict)
+        self.apply_search()
+
+    def on_library_diffed(self, diff):
+        """Update only the rows a reload added, removed or changed"""
+        model = self.table_model
+        removed = [model.row_of_shortcut(shortcut) for shortcut in diff.removed]
+        model.remove_rows([row for row in removed if row is not None])
+        for shortcut in diff.changed:
+            row = model.row_of_shortcut(shortcut)
+            if row is not None:
+                model.text_changed(row)
+        model.append_rows(diff.added)
+        if self.search_input.text().strip():
+            self.apply_search()
+
+    def on_shortcut_put(self, shortcut, created):
+        """Show a shortcut the engine added or replaced"""
+        if created:
+            self.table_model.append_row(shortcut)
+        else:
+            self.table_model.text_changed(self.table_model.row_of_shortcut(shortcut))
 
-        config = configparser.ConfigParser()
-        config.read(self.config_file, encoding='utf-8')
-        
-        # Clear existing shortcuts
-        for shortcut in list(self.active_shortcuts):
-            self.unregister_hotkey(shortcut)
-        
-        self.shortcuts_dict.clear()
-        self.table.setRowCount(0)
-        
-        # Temporarily disconnect signal
-        self.table.itemChanged.disconnect(self.on_item_changed)
-        
-        # Load shortcuts
-        for idx, shortcut in enumerate(config.sections()):
-            text = config[shortcut]['text']
-            self.shortcuts_dict[shortcut] = text
-            
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            # Add checkbox
-            checkbox = QCheckBox()
-            checkbox.setStyleSheet("QCheckBox { margin-left: 7px; }")
-            self.table.setCellWidget(row, 0, checkbox)
-            
-            # Add text - editable
-            text_item = QTableWidgetItem(text)
-            self.table.setItem(row, 1, text_item)
-            
-            # Add shortcut - editable
-            shortcut_item = QTableWidgetItem(shortcut)
-            self.table.setItem(row, 2, shortcut_item)
-            
-            self.register_hotkey(shortcut, text)
-        
-        # Reconnect signal
-        self.table.itemChanged.connect(self.on_item_changed)
-    
     def load_shortcuts_dialog(self):
         """Load shortcuts with dialog"""
         file_path, _ = QFileDialog.getOpenFileName(
             self, 
             self.tr('load'), 
             '', 
-            'INI Files (*.ini)'
+            self.tr('library_filter')
         )
         
         if file_path:
-            self.config_file = file_path
-            
-            # Save last opened file path
-            self.settings.setValue('last_file', file_path)
-            
-            self.load_shortcuts()
-            self.log_status(self.tr('loaded'))
+            # Parsed in the background; only entries that differ from the
+            # loaded library are re-registered and redrawn
+            self.engine.reload_shortcuts(file_path)
     
     def change_language(self, lang):
         """Change application language"""
@@ -1331,7 +1444,11 @@ class TextShortcutApp(QMainWindow):
         self.deselect_all_button.setText(self.tr('deselect_all'))
         self.restart_button.setText(self.tr('restart_program'))
         self.warning_label.setText(self.tr('shortcut_conflict_warning'))
-        self.table.setHorizontalHeaderLabels(['', self.tr('text'), self.tr('shortcut')])
+        self.abbrev_input.setPlaceholderText(self.tr('abbreviation'))
+        self.search_input.setPlaceholderText(self.tr('search'))
+        self.populate_trigger_combo()
+        self.populate_engine_combo()
+        self.table_model.set_headers(['', self.tr('text'), self.tr('shortcut')])
 
         # Recreate menu bar
         self.menuBar().clear()
@@ -1339,6 +1456,8 @@ class TextShortcutApp(QMainWindow):
     
     def is_autostart_enabled(self):
         """Check if autostart is currently enabled"""
+        import winreg
+
         try:
             key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
             app_name = "TextShortcutApp"
@@ -1363,6 +1482,8 @@ class TextShortcutApp(QMainWindow):
 
     def set_autostart(self, enable):
         """Enable or disable autostart on Windows login"""
+        import winreg
+
         try:
             key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
             app_name = "TextShortcutApp"
@@ -1395,6 +1516,9 @@ class TextShortcutApp(QMainWindow):
     
     def check_for_updates_silent(self):
         """Check for updates automatically on startup"""
+        # A check already in flight answers this one too
+        if self.update_thread is not None and self.update_thread.isRunning():
+            return
         self.update_thread = UpdateCheckThread(self.updater)
         self.update_thread.update_available.connect(self.on_update_available_auto)
         self.update_thread.start()
@@ -1423,33 +1547,11 @@ class TextShortcutApp(QMainWindow):
 
         if result == QMessageBox.StandardButton.Yes:
             # User confirmed - download and install
-            if release_info['download_url']:
-                self.log_status(self.tr('update_downloading').format(release_info['version']))
-                QApplication.processEvents()  # Force UI update
-                success = self.download_and_run_installer(release_info['download_url'])
-
-                if success:
-                    # Show message that installer is running
-                    if self.tray_icon:
-                        self.tray_icon.showMessage(
-                            self.tr('title'),
-                            self.tr('update_downloaded'),
-                            QSystemTrayIcon.MessageIcon.Information,
-                            3000
-                        )
-                    self.log_status(self.tr('update_installer_launched'))
-                else:
-                    # Show error notification
-                    if self.tray_icon:
-                        self.tray_icon.showMessage(
-                            self.tr('title'),
-                            self.tr('update_failed_msg'),
-                            QSystemTrayIcon.MessageIcon.Warning,
-                            5000
-                        )
-                    self.log_status(self.tr('update_auto_failed'))
+            if release_info['download_url'] or release_info.get('manifest_url'):
+                self.start_update(release_info, manual=False)
             else:
                 # No download URL - open releases page
+                import webbrowser
                 webbrowser.open(release_info['html_url'])
         else:
             # User declined update
@@ -1460,7 +1562,17 @@ class TextShortcutApp(QMainWindow):
         self.log_status(self.tr('update_checking'))
         QApplication.processEvents()  # Force UI update
 
-        self.update_thread = UpdateCheckThread(self.updater)
+        thread = self.update_thread
+        if thread is not None and thread.isRunning():
+            # Reuse the running check instead of replacing it; a startup check
+            # already shows the update dialog, so only add the manual replies
+            if not thread.manual:
+                thread.manual = True
+                thread.no_update.connect(self.on_no_update)
+                thread.error.connect(self.on_update_error)
+            return
+
+        self.update_thread = UpdateCheckThread(self.updater, manual=True)
         self.update_thread.update_available.connect(self.on_update_available)
         self.update_thread.no_update.connect(self.on_no_update)
         self.update_thread.error.connect(self.on_update_error)
@@ -1478,63 +1590,99 @@ class TextShortcutApp(QMainWindow):
         result = msg.exec()
 
         if result == QMessageBox.StandardButton.Yes:
-            if release_info['download_url']:
-                self.log_status(self.tr('update_downloading').format(release_info['version']))
-                QApplication.processEvents()  # Force UI update
-
+            if release_info['download_url'] or release_info.get('manifest_url'):
                 # Setup version: Download and run installer directly (no updater.exe)
                 # The installer will handle closing the app and updating files
-                success = self.download_and_run_installer(release_info['download_url'])
-
-                if success:
-                    QMessageBox.information(
-                        self,
-                        self.tr('update_title'),
-                        self.tr('update_success_msg')
-                    )
-                    # Don't exit here - let the installer close us
-                else:
-                    QMessageBox.warning(self, self.tr('update_error_title'), self.tr('update_error_msg'))
+                self.start_update(release_info, manual=True)
             else:
                 # Open releases page if no direct download
+                import webbrowser
                 webbrowser.open(release_info['html_url'])
 
-    def download_and_run_installer(self, download_url):
+    def start_update(self, release_info, manual):
         """
-        Download and run installer directly (for setup version only)
-        Does not use updater.exe - installer handles everything
+        Update in place from the release manifest if possible, otherwise
+        with the installer
 
         Args:
-            download_url: URL to download the installer
+            release_info: Release dict from the update check
+            manual: Whether the update was started from the menu
+        """
+        if self.download_thread is not None and self.download_thread.isRunning():
+            return
+        if not (release_info.get('manifest_url') and self.updater.can_apply_delta()):
+            self.start_installer_download(release_info, manual)
+            return
 
-        Returns:
-            bool: True if successful, False otherwise
+        self.log_status(self.tr('update_downloading').format(release_info['version']))
+        thread = DeltaUpdateThread(self.updater, release_info)
+        thread.progress.connect(self.on_download_progress)
+        thread.applied.connect(lambda count: self.on_delta_applied(release_info, count, manual))
+        thread.failed.connect(lambda error: self.on_delta_failed(release_info, error, manual))
+        self.download_thread = thread
+        thread.start()
+
+    def on_delta_applied(self, release_info, count, manual):
+        """Restart into the updated bundle"""
+        self.download_thread.wait()
+        message = self.tr('update_delta_applied').format(release_info['version'], count)
+        self.log_status(message)
+        if manual:
+            QMessageBox.information(self, self.tr('update_title'), message)
+        elif self.tray_icon:
+            self.tray_icon.showMessage(self.tr('title'), message, QSystemTrayIcon.MessageIcon.Information, 3000)
+        self.restart_program()
+
+    def on_delta_failed(self, release_info, error, manual):
+        """Fall back to the full installer (the install directory is unchanged)"""
+        # The signal can arrive just before run() returns
+        self.download_thread.wait()
+        self.log_status(self.tr('update_delta_failed').format(error))
+        print(f"Delta update failed: {error}")
+        if release_info['download_url']:
+            self.start_installer_download(release_info, manual)
+        else:
+            self.on_installer_download_failed(error, manual)
+
+    def start_installer_download(self, release_info, manual):
         """
-        import tempfile
-        import urllib.request
-
-        def download_progress(block_count, block_size, total_size):
-            """Show download progress"""
-            if total_size > 0:
-                downloaded = block_count * block_size
-                percent = min(100, (downloaded * 100) // total_size)
-                downloaded_mb = downloaded / (1024 * 1024)
-                total_mb = total_size / (1024 * 1024)
-                self.log_status(self.tr('download_progress').format(percent, f"{downloaded_mb:.1f}", f"{total_mb:.1f}"))
-                QApplication.processEvents()  # Force UI update
+        Download the installer on a worker thread, then run it
+        (for setup version only; does not use updater.exe)
 
-        try:
-            # Create temp directory
-            temp_dir = tempfile.gettempdir()
-            installer_path = os.path.join(temp_dir, 'ezText_Setup.exe')
+        Args:
+            release_info: Release dict from the update check
+            manual: Whether the update was started from the menu (reported
+                with dialogs instead of tray messages)
+        """
+        import tempfile
 
-            # Download the installer with progress
-            self.log_status(self.tr('download_starting'))
-            QApplication.processEvents()  # Force UI update
-            urllib.request.urlretrieve(download_url, installer_path, reporthook=download_progress)
-            self.log_status(self.tr('download_completed').format(installer_path))
-            QApplication.processEvents()  # Force UI update
+        if self.download_thread is not None and self.download_thread.isRunning():
+            return
 
+        self.log_status(self.tr('update_downloading').format(release_info['version']))
+        # Versioned name: a leftover partial download of another release is never resumed
+        installer_path = os.path.join(tempfile.gettempdir(), f"ezText_Setup_{release_info['version']}.exe")
+        thread = InstallerDownloadThread(release_info, installer_path)
+        thread.progress.connect(self.on_download_progress)
+        thread.downloaded.connect(lambda path: self.on_installer_downloaded(path, manual))
+        thread.failed.connect(lambda error: self.on_installer_download_failed(error, manual))
+        self.download_thread = thread
+        thread.start()
+
+    def on_download_progress(self, downloaded, total):
+        """Show download progress (the worker throttles these to a few per second)"""
+        if total > 0:
+            percent = min(100, (downloaded * 100) // total)
+            downloaded_mb = downloaded / (1024 * 1024)
+            total_mb = total / (1024 * 1024)
+            self.log_status(self.tr('download_progress').format(percent, f"{downloaded_mb:.1f}", f"{total_mb:.1f}"))
+
+    def on_installer_downloaded(self, installer_path, manual):
+        """Run the downloaded (and verified) installer"""
+        import subprocess
+
+        self.log_status(self.tr('download_completed').format(installer_path))
+        try:
             # Run the installer in normal mode (not silent)
             # The installer will:
             # 1. Show installation wizard to user
@@ -1542,18 +1690,48 @@ class TextShortcutApp(QMainWindow):
             # 3. Update all files
             # 4. Optionally restart the app
             self.log_status(self.tr('installer_launching'))
-            QApplication.processEvents()  # Force UI update
             subprocess.Popen([installer_path])
             self.log_status(self.tr('installer_started'))
-            QApplication.processEvents()  # Force UI update
-
-            return True
-
         except Exception as e:
-            error_msg = f"{self.tr('update_error_msg')} {e}"
-            self.log_status(error_msg)
-            print(error_msg)
-            return False
+            self.on_installer_download_failed(str(e), manual)
+            return
+
+        if manual:
+            QMessageBox.information(
+                self,
+                self.tr('update_title'),
+                self.tr('update_success_msg')
+            )
+            # Don't exit here - let the installer close us
+        else:
+            # Show message that installer is running
+            if self.tray_icon:
+                self.tray_icon.showMessage(
+                    self.tr('title'),
+                    self.tr('update_downloaded'),
+                    QSystemTrayIcon.MessageIcon.Information,
+                    3000
+                )
+            self.log_status(self.tr('update_installer_launched'))
+
+    def on_installer_download_failed(self, error, manual):
+        """Report a failed download, hash mismatch or installer launch"""
+        error_msg = f"{self.tr('update_error_msg')} {error}"
+        self.log_status(error_msg)
+        print(error_msg)
+
+        if manual:
+            QMessageBox.warning(self, self.tr('update_error_title'), self.tr('update_error_msg'))
+        else:
+            # Show error notification
+            if self.tray_icon:
+                self.tray_icon.showMessage(
+                    self.tr('title'),
+                    self.tr('update_failed_msg'),
+                    QSystemTrayIcon.MessageIcon.Warning,
+                    5000
+                )
+            self.log_status(self.tr('update_auto_failed'))
 
     def on_no_update(self):
         """Handle no update available"""
@@ -1573,24 +1751,68 @@ class TextShortcutApp(QMainWindow):
         )
         self.log_status(f"{self.tr('update_check_failed')}: {error_msg}")
     
+    def updater_counters(self):
+        """Update check counters, once an update check has created the updater"""
+        if self._updater is None:
+            return {}
+        return {
+            'update_requests': self._updater.requests,
+            'update_not_modified': self._updater.not_modified,
+            'update_cache_hits': self._updater.cache_hits,
+        }
+
+    def show_diagnostics(self):
+        """Show startup phases and runtime counters"""
+        report = self.engine.diagnostics_report()
+        lines = [f"ezText {VERSION} - {report['environment']['platform']}", '',
+                 self.tr('startup_phases'), self.engine.startup_timer.format(), '',
+                 self.tr('counters')]
+        lines.extend(f"{name:<30} {value:>12,}" for name, value in report['counters'].items())
+        lines.extend(['', self.tr('hotkey_latency'), self.engine.latency_stats.format()])
+
+        dialog = DiagnosticsDialog(
+            self, self.tr('diagnostics'), '\n'.join(lines),
+            self.tr('export'), self.export_diagnostics, close_label=self.tr('close')
+        )
+        dialog.exec()
+
+    def export_diagnostics(self):
+        """Save the diagnostics report as JSON"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            self.tr('export'),
+            'ezText-diagnostics.json',
+            'JSON Files (*.json)'
+        )
+        if file_path:
+            atomic_write(file_path, json.dumps(self.engine.diagnostics_report(), ensure_ascii=False, indent=2))
+            self.log_status(self.tr('diagnostics_exported').format(os.path.basename(file_path)))
+
     def visit_github(self):
         """Visit GitHub repository"""
+        import webbrowser
+
         github_url = self.tr('github_url')
         webbrowser.open(github_url)
         self.log_status("Opening GitHub repository...")
     
     def exit_app(self):
         """Exit the application completely"""
+        self.exiting = True
+
         # Save window geometry
         self.settings.setValue('geometry', self.saveGeometry())
-        
-        # Stop keepalive timer
-        if hasattr(self, 'hotkey_keepalive_timer'):
-            self.hotkey_keepalive_timer.stop()
-        
-        # Cleanup hotkeys
-        for shortcut in list(self.active_shortcuts):
-            self.unregister_hotkey(shortcut)
+
+        # Stop the system theme watcher
+        if self.theme_watcher is not None:
+            self.theme_watcher.stop()
+
+        # Abort an installer download; its .part file is resumed next time
+        if self.download_thread is not None:
+            self.download_thread.cancel()
+
+        # Stop hotkeys and injection and write pending changes
+        self.engine.shutdown()
         
         # Hide tray icon
         if self.tray_icon:
@@ -1603,7 +1825,8 @@ class TextShortcutApp(QMainWindow):
         """Restart the program"""
         try:
             # Save current shortcuts before restart
-            self.save_shortcuts(silent=True)
+            self.engine.flush_autosave()
+            self.engine.usage_stats.save()
 
             # Get the current executable path
             python = sys.executable
@@ -1613,17 +1836,16 @@ class TextShortcutApp(QMainWindow):
 
             # Restart using the same executable and arguments
             if getattr(sys, 'frozen', False):
-                # Running as compiled executable
-                os.execl(sys.executable, sys.executable)
+                # Running as compiled executable (keeps e.g. --headless)
+                os.execl(sys.executable, sys.executable, *sys.argv[1:])
             else:
                 # Running as Python script
                 os.execl(python, python, *sys.argv)
         except Exception as e:
             QMessageBox.critical(self, self.tr('error'), f"Restart failed: {str(e)}")
 
-    def handle_new_connection(self):
-        """Handle new connection from another instance"""
-        # Show and activate the window
+    def show_window(self):
+        """Show and activate the window (a second instance was started)"""
         self.show()
         self.setWindowState(self.windowState() & ~Qt.WindowState.WindowMinimized | Qt.WindowState.WindowActive)
         self.activateWindow()
@@ -1631,6 +1853,11 @@ class TextShortcutApp(QMainWindow):
 
     def closeEvent(self, event):
         """Handle window close event"""
+        # Quitting (tray menu, QUIT request) closes the window without asking
+        if self.exiting:
+            event.accept()
+            return
+
         # Create custom message box
         msg_box = QMessageBox(self)
         msg_box.setWindowTitle(self.tr('exit_title'))
@@ -1663,26 +1890,81 @@ class TextShortcutApp(QMainWindow):
             event.ignore()
 
 def main():
+    startup_timer = PhaseTimer(origin=PROCESS_START)
+    startup_timer.lap('imports')
+
+    # --headless: only the engine runs; the window is created by the first
+    # SHOW request (starting ezText again) and can be closed to the tray
+    headless = '--headless' in sys.argv[1:]
+
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
+    startup_timer.lap('qapplication')
 
     # Check if another instance is already running
     socket = QLocalSocket()
-    socket.connectToServer('ezText_SingleInstance')
+    socket.connectToServer(SERVER_NAME)
 
     if socket.waitForConnected(500):
-        # Another instance is running, send signal and exit
-        socket.write(b'SHOW')
+        if headless:
+            # The running instance already provides the engine
+            socket.disconnectFromServer()
+            return 0
+        # Another instance is running, ask it to show its window and exit
+        socket.write(b'SHOW\n')
         socket.flush()
         socket.waitForBytesWritten(1000)
         socket.disconnectFromServer()
         return 0
 
+    startup_timer.lap('instance_check')
+
+    if headless:
+        sys.exit(run_headless(app, startup_timer))
+
     # First instance - start normally
-    window = TextShortcutApp()
+    window = TextShortcutApp(startup_timer)
     window.show()
 
     sys.exit(app.exec())
 
+
+def run_headless(app, startup_timer, engine=None):
+    """
+    Run the engine without a window until a SHOW request attaches one
+
+    Args:
+        app: QApplication
+        startup_timer: PhaseTimer for the startup profile
+        engine: Headless ShortcutEngine to run (created by default)
+    """
+    # Nothing is shown yet, and a hidden window must not end the engine
+    app.setQuitOnLastWindowClosed(False)
+
+    if engine is None:
+        engine = ShortcutEngine(VERSION, startup_timer, headless=True)
+    engine.load_shortcuts()
+    startup_timer.lap('load_shortcuts')
+    QTimer.singleShot(0, lambda: engine.finish_startup_profile('event_loop'))
+
+    windows = []
+
+    def attach():
+        # Later SHOW requests go to the window itself
+        if not windows:
+            windows.append(TextShortcutApp(engine=engine))
+            windows[0].show_window()
+
+    def quit_engine():
+        if windows:
+            windows[0].exit_app()
+        else:
+            engine.shutdown()
+            app.quit()
+
+    engine.show_requested.connect(attach)
+    engine.quit_requested.connect(quit_engine)
+    return app.exec()
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
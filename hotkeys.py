@@ -0,0 +1,856 @@
+"""
+ezText Hotkey Registration
+
+HotkeyRegistry keeps track of which hotkeys are registered with the keyboard
+library and applies only the differences when the shortcut set changes.
+Parsed hotkeys are cached, so a refresh with nothing to do costs one dict
+comparison per shortcut instead of a full unregister/re-register cycle.
+Failed registrations are retried with exponential backoff.
+
+ChordDispatcher installs a single keyboard hook for all hotkeys. It tracks
+the held modifiers as a bitmask and looks up (modifiers, key) in a dict, so
+the cost per key event does not grow with the number of shortcuts. It is
+used as the registry backend in place of keyboard.add_hotkey. Hotkeys that
+are not a single chord (multi-step 'ctrl+k, ctrl+c', multi-key 'a+b') are
+still handed to keyboard.add_hotkey.
+
+AbbreviationMatcher is a streaming Aho-Corasick automaton over typed
+abbreviations (hotstrings such as ';sig'). The dispatcher feeds it one
+character per key press at constant amortized cost, however many
+abbreviations exist.
+
+HookWatchdog checks that the low-level keyboard hook still receives events
+(heartbeat counter plus a synthetic probe key when the user is idle) and
+re-arms hotkeys only when the hook is actually dead.
+
+RegistrationQueue registers a large shortcut set incrementally, in time
+boxed batches driven by the caller's event loop, most used shortcuts
+first. UsageStats keeps the per-shortcut fire counts that order it.
+"""
+
+import json
+import re
+import time
+from collections import deque
+
+from storage import atomic_write
+
+
+# Trigger types stored next to 'text' in the INI sections
+TRIGGER_CHORD = 'chord'
+TRIGGER_ABBREVIATION = 'abbreviation'
+TRIGGERS = (TRIGGER_CHORD, TRIGGER_ABBREVIATION)
+
+# Modifier bits
+MOD_CTRL = 1
+MOD_SHIFT = 2
+MOD_ALT = 4
+MOD_WIN = 8
+
+# Hotkey string tokens -> modifier bit
+MODIFIER_TOKENS = {
+    'ctrl': MOD_CTRL, 'control': MOD_CTRL,
+    'shift': MOD_SHIFT,
+    'alt': MOD_ALT,
+    'win': MOD_WIN, 'windows': MOD_WIN, 'cmd': MOD_WIN, 'super': MOD_WIN,
+}
+
+# Canonical modifier key names -> modifier bit. They are resolved to scan
+# codes once per dispatcher, because the names reported in key events are
+# localized ('strg', 'maj', ...) and cannot identify modifiers reliably.
+MODIFIER_KEY_NAMES = {
+    'ctrl': MOD_CTRL,
+    'shift': MOD_SHIFT,
+    'alt': MOD_ALT,
+    'alt gr': MOD_ALT,
+    'windows': MOD_WIN,
+}
+
+
+class SequenceHotkey:
+    """A hotkey the dispatcher leaves to the backend's add_hotkey"""
+
+    __slots__ = ('hotkey', 'handle')
+
+    def __init__(self, hotkey, handle=None):
+        self.hotkey = hotkey
+        self.handle = handle
+
+    def __repr__(self):
+        return f"SequenceHotkey({self.hotkey!r})"
+
+
+class _Automaton:
+    """Immutable Aho-Corasick automaton; replaced as a whole, never modified"""
+
+    __slots__ = ('goto', 'fail', 'match', 'size')
+
+    def __init__(self, abbreviations):
+        goto = [{}]       # state -> {char: next state}
+        words = [None]    # state -> abbreviation ending exactly here
+        for abbreviation in abbreviations:
+            state = 0
+            for char in abbreviation:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto.append({})
+                    words.append(None)
+                    goto[state][char] = next_state
+                state = next_state
+            words[state] = abbreviation
+
+        # Failure links and longest suffix matches, breadth-first
+        fail = [0] * len(goto)
+        match = [None] * len(goto)
+        queue = deque()
+        for state in goto[0].values():
+            match[state] = words[state]
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                link = goto[fallback].get(char, 0)
+                fail[child] = link if link != child else 0
+                own = words[child]
+                match[child] = own if own is not None else match[fail[child]]
+                queue.append(child)
+
+        self.goto = tuple(goto)
+        self.fail = tuple(fail)
+        self.match = tuple(match)
+        self.size = len(abbreviations)
+
+
+class AbbreviationMatcher:
+    """
+    Streaming Aho-Corasick matcher for typed abbreviations
+
+    add, remove and clear run on the GUI thread and only edit the pending
+    abbreviation set; publish() builds a complete new automaton there and
+    swaps it in with a single reference assignment. feed and reset run on
+    the keyboard hook thread and only ever see a finished automaton.
+    """
+
+    def __init__(self):
+        self._abbreviations = set()
+        self._dirty = False
+        self._automaton = _Automaton(())
+        self._cursor = self._automaton  # automaton that _state belongs to
+        self._state = 0
+
+    def __len__(self):
+        return len(self._abbreviations)
+
+    def __contains__(self, abbreviation):
+        return abbreviation in self._abbreviations
+
+    @property
+    def active(self):
+        """True when the published automaton has abbreviations to match"""
+        return self._automaton.size > 0
+
+    @property
+    def pending(self):
+        """True when edits are waiting for publish()"""
+        return self._dirty
+
+    def add(self, abbreviation):
+        """Queue an abbreviation for the next publish()"""
+        if abbreviation and abbreviation not in self._abbreviations:
+            self._abbreviations.add(abbreviation)
+            self._dirty = True
+
+    def remove(self, abbreviation):
+        """Queue the removal of an abbreviation for the next publish()"""
+        if abbreviation in self._abbreviations:
+            self._abbreviations.discard(abbreviation)
+            self._dirty = True
+
+    def clear(self):
+        """Queue the removal of every abbreviation"""
+        if self._abbreviations:
+            self._abbreviations = set()
+            self._dirty = True
+
+    def publish(self):
+        """Build the automaton for the current abbreviations and swap it in"""
+        if self._dirty:
+            self._dirty = False
+            self._automaton = _Automaton(tuple(self._abbreviations))
+
+    def reset(self):
+        """Forget the characters typed so far"""
+        self._state = 0
+
+    def feed(self, char):
+        """
+        Advance the automaton by one typed character
+
+        Returns:
+            str: Abbreviation completed by this character, or None
+        """
+        automaton = self._automaton
+        state = self._state if self._cursor is automaton else 0
+        goto = automaton.goto
+        fail = automaton.fail
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        self._cursor = automaton
+        self._state = state
+        return automaton.match[state]
+
+
+class ChordDispatcher:
+    """Single-hook hotkey dispatcher with O(1) lookup per key event"""
+
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend: Module or object providing hook, unhook, send,
+                key_to_scan_codes, add_hotkey and remove_hotkey (defaults to
+                the keyboard library)
+        """
+        if backend is None:
+            import keyboard as backend
+        self.backend = backend
+
+        self._table = {}       # (modifier mask, scan code) -> (handle, callback)
+        self._observers = []   # callbacks that see every event (watchdog heartbeat)
+        self._modifiers = self._modifier_scan_codes()  # scan code -> modifier bit
+        self._held = {}        # scan code -> modifier bit, for modifiers currently down
+        self._mask = 0
+        self._hook = None
+
+        # Abbreviation triggers
+        self.abbreviations = AbbreviationMatcher()
+        self.on_abbreviation = None   # callback(abbreviation, event_time)
+        self.abbreviation_guard = None  # callable; True suspends matching (e.g. while injecting)
+
+    def __len__(self):
+        return len(self._table)
+
+    def _modifier_scan_codes(self):
+        """Map the scan codes of every modifier key (both sides) to its bit"""
+        modifiers = {}
+        for name, bit in MODIFIER_KEY_NAMES.items():
+            try:
+                scan_codes = self.backend.key_to_scan_codes(name)
+            except (ValueError, OSError):
+                # Key missing from this layout, or no key table available
+                continue
+            for scan_code in scan_codes:
+                modifiers.setdefault(scan_code, bit)
+        return modifiers
+
+    def install(self):
+        """Install the single keyboard hook"""
+        if self._hook is None:
+            self._hook = self.backend.hook(self.dispatch)
+
+    def uninstall(self):
+        """Remove the keyboard hook"""
+        if self._hook is not None:
+            try:
+                self.backend.unhook(self._hook)
+            except Exception:
+                pass
+            self._hook = None
+        self._held.clear()
+        self._mask = 0
+
+    def reinstall(self):
+        """Replace the keyboard hook (used when the old one stopped receiving events)"""
+        self.uninstall()
+        self.install()
+
+    def parse_hotkey(self, shortcut):
+        """
+        Parse a hotkey string such as 'ctrl+alt+a'
+
+        Hotkeys that are not a single chord can't be matched by one key event
+        and are returned as a SequenceHotkey for the backend's add_hotkey.
+
+        Returns:
+            tuple: (modifier mask, tuple of scan codes for the main key), or
+                SequenceHotkey
+        """
+        # Same step separator as keyboard.parse_hotkey
+        if len(re.split(r',\s?', shortcut)) > 1:
+            return SequenceHotkey(shortcut)
+        mask = 0
+        key = None
+        for token in shortcut.lower().split('+'):
+            token = token.strip()
+            if not token:
+                continue
+            bit = MODIFIER_TOKENS.get(token)
+            if bit is not None and key is None:
+                mask |= bit
+            elif key is None:
+                key = token
+            else:
+                return SequenceHotkey(shortcut)
+        if key is None:
+            raise ValueError(f"Hotkey has no main key: {shortcut!r}")
+        return mask, tuple(self.backend.key_to_scan_codes(key))
+
+    def add_hotkey(self, parsed, callback):
+        """
+        Add a chord to the lookup table
+
+        The callback receives the time.time() of the key event, so it can
+        measure the hook-to-callback latency. Sequences left to the
+        keyboard library are called without it.
+
+        Returns:
+            object: Handle for remove_hotkey
+        """
+        if isinstance(parsed, SequenceHotkey):
+            # Matched by the keyboard library's own hook
+            return SequenceHotkey(parsed.hotkey, self.backend.add_hotkey(parsed.hotkey, callback))
+        mask, scan_codes = parsed
+        handle = (mask, scan_codes, object())
+        for scan_code in scan_codes:
+            self._table[(mask, scan_code)] = (handle, callback)
+        return handle
+
+    def remove_hotkey(self, handle):
+        """Remove a chord added by add_hotkey"""
+        if isinstance(handle, SequenceHotkey):
+            self.backend.remove_hotkey(handle.handle)
+            return
+        mask, scan_codes, _ = handle
+        for scan_code in scan_codes:
+            entry = self._table.get((mask, scan_code))
+            if entry is not None and entry[0] is handle:
+                del self._table[(mask, scan_code)]
+
+    def hook(self, callback):
+        """Add a callback that sees every key event"""
+        self._observers.append(callback)
+        return callback
+
+    def unhook(self, callback):
+        """Remove a callback added by hook"""
+        self._observers.remove(callback)
+
+    def send(self, hotkey):
+        """Send a key or chord through the keyboard library"""
+        self.backend.send(hotkey)
+
+    def dispatch(self, event):
+        """Handle one key event (runs on the keyboard hook thread)"""
+        for observer in self._observers:
+            observer(event)
+
+        bit = self._modifiers.get(event.scan_code)
+        if bit is not None:
+            if event.event_type == 'down':
+                self._held[event.scan_code] = bit
+            else:
+                self._held.pop(event.scan_code, None)
+            mask = 0
+            for held_bit in self._held.values():
+                mask |= held_bit
+            self._mask = mask
+            return
+
+        if event.event_type != 'down':
+            return
+        entry = self._table.get((self._mask, event.scan_code))
+        if entry is not None:
+            self.abbreviations.reset()
+            try:
+                entry[1](event.time)
+            except Exception as e:
+                print(f"Error in hotkey callback: {e}")
+            return
+
+        if self.on_abbreviation is not None and self.abbreviations.active:
+            self._feed_abbreviation(event)
+
+    def _feed_abbreviation(self, event):
+        """Feed a typed character to the abbreviation matcher"""
+        name = event.name
+        if name == 'space':
+            name = ' '
+        if (self._mask & ~MOD_SHIFT) or name is None or len(name) != 1:
+            # Chords, navigation and editing keys break the typed sequence
+            self.abbreviations.reset()
+            return
+        if self.abbreviation_guard is not None and self.abbreviation_guard():
+            self.abbreviations.reset()
+            return
+
+        abbreviation = self.abbreviations.feed(name)
+        if abbreviation is not None:
+            self.abbreviations.reset()
+            try:
+                self.on_abbreviation(abbreviation, event.time)
+            except Exception as e:
+                print(f"Error in abbreviation callback: {e}")
+
+
+class RefreshStats:
+    """Timing and counts of a single refresh"""
+
+    __slots__ = ('duration', 'added', 'removed', 'repaired', 'failed', 'deferred')
+
+    def __init__(self):
+        self.duration = 0.0
+        self.added = 0
+        self.removed = 0
+        self.repaired = 0
+        self.failed = 0
+        self.deferred = 0
+
+    @property
+    def touched(self):
+        """Number of hotkeys registered or unregistered"""
+        return self.added + self.removed + self.repaired
+
+    def __repr__(self):
+        return (f"RefreshStats(duration={self.duration * 1000:.1f}ms, added={self.added}, "
+                f"removed={self.removed}, repaired={self.repaired}, failed={self.failed}, "
+                f"deferred={self.deferred})")
+
+
+class HotkeyRegistry:
+    """Registers hotkeys with the keyboard library and applies differential refreshes"""
+
+    def __init__(self, callback_factory, backend=None, retry_base=2.0, retry_max=300.0):
+        """
+        Args:
+            callback_factory: Function(shortcut) returning the hotkey callback
+            backend: Module or object providing parse_hotkey, add_hotkey and
+                remove_hotkey, such as ChordDispatcher (defaults to the
+                keyboard library)
+            retry_base: Seconds before the first retry of a failed registration
+            retry_max: Upper bound of the retry delay
+        """
+        if backend is None:
+            import keyboard as backend
+        self.backend = backend
+        self.callback_factory = callback_factory
+
+        self._parsed = {}      # shortcut -> parsed hotkey (cache)
+        self._handles = {}     # shortcut -> remove handle returned by add_hotkey
+        self.broken = set()    # shortcuts whose registration failed
+        self._retries = {}     # shortcut -> (attempts, next retry time)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        # Instrumentation
+        self.registration_failures = 0
+        self.refresh_count = 0
+        self.total_refresh_time = 0.0
+        self.last_refresh = None
+
+    @property
+    def registered(self):
+        """Shortcuts currently registered"""
+        return list(self._handles)
+
+    def __contains__(self, shortcut):
+        return shortcut in self._handles
+
+    def __len__(self):
+        return len(self._handles)
+
+    def parse(self, shortcut):
+        """Parse a hotkey string once and cache the result"""
+        parsed = self._parsed.get(shortcut)
+        if parsed is None:
+            parsed = self.backend.parse_hotkey(shortcut)
+            self._parsed[shortcut] = parsed
+        return parsed
+
+    def register(self, shortcut):
+        """
+        Register a hotkey (no-op if already registered)
+
+        Returns:
+            bool: True if the hotkey is registered
+        """
+        if shortcut in self._handles:
+            return True
+        try:
+            handle = self.backend.add_hotkey(self.parse(shortcut), self.callback_factory(shortcut))
+        except Exception as e:
+            self._schedule_retry(shortcut)
+            print(f"Error registering hotkey {shortcut}: {e}")
+            return False
+        self._handles[shortcut] = handle
+        self.broken.discard(shortcut)
+        self._retries.pop(shortcut, None)
+        return True
+
+    def _schedule_retry(self, shortcut):
+        """Record a failed registration and back off before the next attempt"""
+        attempts, _ = self._retries.get(shortcut, (0, 0.0))
+        delay = min(self.retry_base * (2 ** attempts), self.retry_max)
+        self._retries[shortcut] = (attempts + 1, time.monotonic() + delay)
+        self.broken.add(shortcut)
+        self.registration_failures += 1
+
+    def _retry_due(self, shortcut, now):
+        retry = self._retries.get(shortcut)
+        return retry is None or retry[1] <= now
+
+    @property
+    def pending_retries(self):
+        """Shortcuts waiting for a registration retry"""
+        return list(self._retries)
+
+    def unregister(self, shortcut):
+        """Unregister a hotkey (no-op if not registered)"""
+        self.broken.discard(shortcut)
+        self._retries.pop(shortcut, None)
+        handle = self._handles.pop(shortcut, None)
+        if handle is None:
+            return
+        try:
+            self.backend.remove_hotkey(handle)
+        except Exception as e:
+            print(f"Error unregistering hotkey {shortcut}: {e}")
+
+    def unregister_all(self):
+        """Unregister every hotkey"""
+        for shortcut in list(self._handles):
+            self.unregister(shortcut)
+        self.broken.clear()
+        self._retries.clear()
+
+    def forget(self, shortcut):
+        """Drop a shortcut from the parse cache"""
+        self._parsed.pop(shortcut, None)
+
+    def mark_broken(self, shortcut):
+        """Flag a registered hotkey for re-registration on the next refresh"""
+        if shortcut in self._handles:
+            self.broken.add(shortcut)
+
+    def refresh(self, shortcuts, defer=None):
+        """
+        Bring registrations in line with the given shortcuts
+
+        Only shortcuts that were added, removed or flagged as broken are
+        touched; everything else stays registered. Failed registrations are
+        retried only once their backoff delay has passed.
+
+        Args:
+            shortcuts: Iterable of shortcuts that should be registered
+            defer: Optional callback(list of shortcuts) taking the missing
+                and retried shortcuts instead of registering them here,
+                e.g. RegistrationQueue.extend; removals are always immediate
+
+        Returns:
+            RefreshStats: What the refresh did and how long it took
+        """
+        stats = RefreshStats()
+        start = time.perf_counter()
+
+        wanted = set(shortcuts)
+        now = time.monotonic()
+        later = []
+
+        for shortcut in [sc for sc in self._handles if sc not in wanted]:
+            self.unregister(shortcut)
+            self.forget(shortcut)
+            stats.removed += 1
+
+        for shortcut in list(self.broken):
+            if shortcut not in wanted:
+                self.broken.discard(shortcut)
+                self._retries.pop(shortcut, None)
+                continue
+            if not self._retry_due(shortcut, now):
+                continue
+            # Re-register from scratch
+            handle = self._handles.pop(shortcut, None)
+            if handle is not None:
+                try:
+                    self.backend.remove_hotkey(handle)
+                except Exception:
+                    pass
+            if defer is not None:
+                later.append(shortcut)
+            elif self.register(shortcut):
+                stats.repaired += 1
+            else:
+                stats.failed += 1
+
+        for shortcut in wanted:
+            if shortcut not in self._handles and shortcut not in self.broken:
+                if defer is not None:
+                    later.append(shortcut)
+                elif self.register(shortcut):
+                    stats.added += 1
+                else:
+                    stats.failed += 1
+
+        if later:
+            defer(later)
+            stats.deferred = len(later)
+
+        stats.duration = time.perf_counter() - start
+        self.refresh_count += 1
+        self.total_refresh_time += stats.duration
+        self.last_refresh = stats
+        return stats
+
+    def rearm(self, shortcuts):
+        """
+        Unregister and re-register every hotkey
+
+        Only used when the watchdog has detected a dead hook.
+
+        Returns:
+            RefreshStats: What the re-arm did and how long it took
+        """
+        self.unregister_all()
+        return self.refresh(shortcuts)
+
+
+class HookWatchdog:
+    """Detect a dead low-level keyboard hook and re-arm hotkeys only then"""
+
+    def __init__(self, registry, probe_key='f24', check_interval=60.0, probe_timeout=0.5):
+        """
+        Args:
+            registry: HotkeyRegistry whose hotkeys are re-armed on failure
+            probe_key: Key sent when no events were seen since the last check;
+                should be one no application reacts to
+            check_interval: Minimum seconds between liveness checks
+            probe_timeout: Seconds to wait for the probe to reach the hook
+        """
+        self.registry = registry
+        self.backend = registry.backend
+        self.probe_key = probe_key
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+
+        self.heartbeat = 0
+        self._last_seen = 0
+        self._last_check = time.monotonic()
+        self._probe_heartbeat = None
+        self._hook = None
+
+        # Counters for diagnostics
+        self.probes_sent = 0
+        self.hook_failures = 0
+        self.rearm_count = 0
+
+    def _on_event(self, event):
+        # Runs on the hook thread for every key event; keep it trivial
+        self.heartbeat += 1
+
+    def install(self):
+        """Install the heartbeat hook"""
+        if self._hook is None:
+            self._hook = self.backend.hook(self._on_event)
+
+    def uninstall(self):
+        """Remove the heartbeat hook"""
+        if self._hook is not None:
+            try:
+                self.backend.unhook(self._hook)
+            except Exception:
+                pass
+            self._hook = None
+
+    @property
+    def probing(self):
+        return self._probe_heartbeat is not None
+
+    def check(self, now=None):
+        """
+        Run a liveness check if one is due
+
+        Events seen since the last check prove the hook is alive. Otherwise
+        a probe key is sent; call finish_probe() after probe_timeout.
+
+        Returns:
+            bool: True if a probe was sent
+        """
+        now = time.monotonic() if now is None else now
+        if self.probing or now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        if self.heartbeat != self._last_seen:
+            self._last_seen = self.heartbeat
+            return False
+
+        self._probe_heartbeat = self.heartbeat
+        self.probes_sent += 1
+        try:
+            self.backend.send(self.probe_key)
+        except Exception as e:
+            print(f"Error sending hook probe: {e}")
+        return True
+
+    def finish_probe(self):
+        """
+        Evaluate a probe sent by check()
+
+        Returns:
+            bool: True if the hook is alive, False if it is dead
+        """
+        if self._probe_heartbeat is None:
+            return True
+        alive = self.heartbeat != self._probe_heartbeat
+        self._probe_heartbeat = None
+        self._last_seen = self.heartbeat
+        if not alive:
+            self.hook_failures += 1
+        return alive
+
+    def rearm(self, shortcuts):
+        """
+        Re-install the heartbeat hook and re-register every hotkey
+
+        Returns:
+            RefreshStats: Result of re-registering the hotkeys
+        """
+        self.rearm_count += 1
+        self.uninstall()
+        # A dispatcher backend owns the actual keyboard hook; replace it
+        reinstall = getattr(self.backend, 'reinstall', None)
+        if reinstall is not None:
+            reinstall()
+        stats = self.registry.rearm(shortcuts)
+        self.install()
+        return stats
+
+
+class RegistrationQueue:
+    """Incremental, prioritized registration of a shortcut set"""
+
+    def __init__(self, register, batch_size=500, time_budget=0.008):
+        """
+        Args:
+            register: Callback(shortcut) that registers one shortcut
+            batch_size: Maximum registrations per batch
+            time_budget: Seconds a batch may run before yielding
+        """
+        self.register = register
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self._pending = deque()
+        self._queued = set()   # shortcuts in _pending
+        self.done = 0
+        self.total = 0
+
+    def start(self, shortcuts, priority=None):
+        """
+        Replace the queue with a new shortcut set
+
+        Args:
+            shortcuts: Shortcuts to register
+            priority: Optional dict of shortcut -> weight; heavier ones go first
+        """
+        shortcuts = list(shortcuts)
+        if priority:
+            # Stable sort: equally weighted shortcuts keep their file order
+            shortcuts.sort(key=lambda shortcut: priority.get(shortcut, 0), reverse=True)
+        self._pending = deque(shortcuts)
+        self._queued = set(shortcuts)
+        self.done = 0
+        self.total = len(shortcuts)
+
+    def extend(self, shortcuts, priority=None):
+        """
+        Queue more shortcuts behind the ones still pending
+
+        Shortcuts that are already queued are skipped.
+
+        Args:
+            shortcuts: Shortcuts to register
+            priority: Optional dict of shortcut -> weight; heavier ones go first
+        """
+        shortcuts = [shortcut for shortcut in dict.fromkeys(shortcuts) if shortcut not in self._queued]
+        if priority:
+            shortcuts.sort(key=lambda shortcut: priority.get(shortcut, 0), reverse=True)
+        if not self._pending:
+            # Progress counts only the current run
+            self.done = 0
+            self.total = 0
+        self._pending.extend(shortcuts)
+        self._queued.update(shortcuts)
+        self.total += len(shortcuts)
+
+    def cancel(self):
+        """Drop everything not yet registered"""
+        self._pending.clear()
+        self._queued.clear()
+        self.total = self.done
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def run_batch(self):
+        """
+        Register the next batch
+
+        Returns:
+            bool: True while shortcuts remain queued
+        """
+        deadline = time.perf_counter() + self.time_budget
+        pending = self._pending
+        for _ in range(self.batch_size):
+            if not pending:
+                break
+            shortcut = pending.popleft()
+            self._queued.discard(shortcut)
+            try:
+                self.register(shortcut)
+            except Exception as e:
+                print(f"Error registering hotkey {shortcut}: {e}")
+            self.done += 1
+            if time.perf_counter() >= deadline:
+                break
+        return bool(pending)
+
+
+class UsageStats:
+    """Per-shortcut fire counts, persisted as JSON"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: JSON file holding the counts
+        """
+        self.path = path
+        self.counts = {}
+        self._dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                counts = json.load(f)
+            self.counts = {str(k): int(v) for k, v in counts.items()}
+        except (OSError, ValueError, AttributeError, TypeError):
+            pass
+
+    def record(self, shortcut):
+        """Count one fire (called from the hook thread)"""
+        self.counts[shortcut] = self.counts.get(shortcut, 0) + 1
+        self._dirty = True
+
+    def rename(self, shortcut, new_shortcut):
+        count = self.counts.pop(shortcut, None)
+        if count is not None:
+            self.counts[new_shortcut] = count
+            self._dirty = True
+
+    def save(self):
+        """Write the counts if they changed"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        atomic_write(self.path, json.dumps(dict(self.counts), ensure_ascii=False))
@@ -0,0 +1,426 @@
+"""
+ezText Text Injection
+
+Delivers snippet text to the focused application.
+
+Engines:
+- TypeEngine: synthesizes one key event per character (keyboard.write).
+  Works everywhere, but long snippets take seconds to type.
+- PasteEngine: places the text on the clipboard, sends a single paste chord
+  and restores the previous clipboard contents afterwards.
+
+TextInjector picks the engine per snippet. In 'auto' mode, snippets at or
+above the paste threshold are pasted and shorter ones are typed.
+
+InjectionWorker runs injections on a dedicated thread so hotkey callbacks
+only enqueue a job and return to the keyboard hook immediately.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+# Injection modes (global setting and per-snippet override)
+MODE_AUTO = 'auto'
+MODE_TYPE = 'type'
+MODE_PASTE = 'paste'
+MODES = (MODE_AUTO, MODE_TYPE, MODE_PASTE)
+
+# Default length (in characters) at which 'auto' switches to pasting
+DEFAULT_PASTE_THRESHOLD = 200
+
+# Policies for hotkeys fired while an injection is still pending or running
+POLICY_QUEUE = 'queue'      # Run every fire in order; drop new fires when the queue is full
+POLICY_DROP = 'drop'        # Ignore fires while anything is pending or running
+POLICY_REPLACE = 'replace'  # Discard pending fires and keep only the newest one
+POLICIES = (POLICY_QUEUE, POLICY_DROP, POLICY_REPLACE)
+
+# Default maximum number of pending (not yet running) injection jobs
+DEFAULT_MAX_PENDING = 8
+
+
+class KeyboardBackend:
+    """Real backend: keyboard library for key events, Win32 API for the clipboard"""
+
+    CF_UNICODETEXT = 13
+    GMEM_MOVEABLE = 0x0002
+
+    def __init__(self):
+        import keyboard
+        self._keyboard = keyboard
+        self._user32 = None
+        self._kernel32 = None
+
+    def write(self, text):
+        """Type text one character at a time"""
+        self._keyboard.write(text)
+
+    def send(self, hotkey):
+        """Send a single chord with the user's held modifiers released"""
+        state = self._keyboard.stash_state()
+        try:
+            self._keyboard.send(hotkey)
+        finally:
+            self._keyboard.restore_modifiers(state)
+
+    def _load_win32(self):
+        """Load and prototype the Win32 clipboard functions on first use"""
+        if self._user32 is not None:
+            return
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.WinDLL('user32', use_last_error=True)
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+        user32.OpenClipboard.argtypes = [wintypes.HWND]
+        user32.OpenClipboard.restype = wintypes.BOOL
+        user32.CloseClipboard.restype = wintypes.BOOL
+        user32.EmptyClipboard.restype = wintypes.BOOL
+        user32.GetClipboardData.argtypes = [wintypes.UINT]
+        user32.GetClipboardData.restype = wintypes.HANDLE
+        user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+        user32.SetClipboardData.restype = wintypes.HANDLE
+        kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+        kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+        kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalLock.restype = ctypes.c_void_p
+        kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalUnlock.restype = wintypes.BOOL
+        kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+        kernel32.GlobalFree.restype = wintypes.HGLOBAL
+
+        self._ctypes = ctypes
+        self._user32 = user32
+        self._kernel32 = kernel32
+
+    def _open_clipboard(self, attempts=10):
+        """Open the clipboard, retrying while another process holds it"""
+        for _ in range(attempts):
+            if self._user32.OpenClipboard(None):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def get_clipboard(self):
+        """
+        Get the current clipboard text
+
+        Returns:
+            str: Clipboard text, or None if the clipboard holds no text
+        """
+        self._load_win32()
+        if not self._open_clipboard():
+            return None
+        try:
+            handle = self._user32.GetClipboardData(self.CF_UNICODETEXT)
+            if not handle:
+                return None
+            pointer = self._kernel32.GlobalLock(handle)
+            if not pointer:
+                return None
+            try:
+                return self._ctypes.wstring_at(pointer)
+            finally:
+                self._kernel32.GlobalUnlock(handle)
+        finally:
+            self._user32.CloseClipboard()
+
+    def set_clipboard(self, text):
+        """
+        Replace the clipboard contents
+
+        Args:
+            text: Text to place on the clipboard, or None to clear it
+        """
+        self._load_win32()
+        if not self._open_clipboard():
+            raise OSError("Clipboard is in use by another application")
+        try:
+            self._user32.EmptyClipboard()
+            if text is None:
+                return
+            data = text.encode('utf-16-le') + b'\x00\x00'
+            handle = self._kernel32.GlobalAlloc(self.GMEM_MOVEABLE, len(data))
+            if not handle:
+                raise MemoryError("GlobalAlloc failed")
+            pointer = self._kernel32.GlobalLock(handle)
+            self._ctypes.memmove(pointer, data, len(data))
+            self._kernel32.GlobalUnlock(handle)
+            # On success the clipboard owns the memory
+            if not self._user32.SetClipboardData(self.CF_UNICODETEXT, handle):
+                self._kernel32.GlobalFree(handle)
+                raise OSError("SetClipboardData failed")
+        finally:
+            self._user32.CloseClipboard()
+
+
+class RecordingBackend:
+    """
+    Fake backend for benchmarks and tests
+
+    Records every call and charges a fixed cost per synthesized key event,
+    so engines can be compared without touching the real keyboard.
+    """
+
+    def __init__(self, event_cost=0.0):
+        self.event_cost = event_cost
+        self.calls = []
+        self.clipboard = None
+        self.key_events = 0
+
+    def _charge(self, events):
+        self.key_events += events
+        if self.event_cost:
+            time.sleep(events * self.event_cost)
+
+    def write(self, text):
+        self.calls.append(('write', text))
+        self._charge(len(text))
+
+    def send(self, hotkey):
+        self.calls.append(('send', hotkey))
+        self._charge(1)
+
+    def get_clipboard(self):
+        self.calls.append(('get_clipboard',))
+        return self.clipboard
+
+    def set_clipboard(self, text):
+        self.calls.append(('set_clipboard', text))
+        self.clipboard = text
+
+
+class TypeEngine:
+    """Inject text by typing it character by character"""
+
+    name = MODE_TYPE
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def inject(self, text):
+        self.backend.write(text)
+
+
+class PasteEngine:
+    """Inject text through the clipboard and a single paste chord"""
+
+    name = MODE_PASTE
+
+    def __init__(self, backend, paste_hotkey='ctrl+v', restore_delay=0.15):
+        """
+        Args:
+            backend: Injection backend
+            paste_hotkey: Chord that pastes in the target application
+            restore_delay: Seconds to wait before restoring the clipboard,
+                giving the target application time to read it
+        """
+        self.backend = backend
+        self.paste_hotkey = paste_hotkey
+        self.restore_delay = restore_delay
+
+    def inject(self, text):
+        previous = self.backend.get_clipboard()
+        self.backend.set_clipboard(text)
+        try:
+            self.backend.send(self.paste_hotkey)
+            if self.restore_delay:
+                time.sleep(self.restore_delay)
+        finally:
+            # Only text contents can be restored; anything else is cleared
+            self.backend.set_clipboard(previous)
+
+
+class TextInjector:
+    """Select an injection engine per snippet and inject text with it"""
+
+    def __init__(self, backend=None, mode=MODE_AUTO, paste_threshold=DEFAULT_PASTE_THRESHOLD,
+                 restore_delay=0.15):
+        """
+        Args:
+            backend: Injection backend (defaults to KeyboardBackend)
+            mode: Global injection mode ('auto', 'type' or 'paste')
+            paste_threshold: Text length at which 'auto' mode pastes
+            restore_delay: Clipboard restore delay for the paste engine
+        """
+        self.backend = backend if backend is not None else KeyboardBackend()
+        self.mode = mode if mode in MODES else MODE_AUTO
+        self.paste_threshold = paste_threshold
+        self.engines = {
+            MODE_TYPE: TypeEngine(self.backend),
+            MODE_PASTE: PasteEngine(self.backend, restore_delay=restore_delay),
+        }
+
+    def engine_for(self, text, mode=None):
+        """
+        Pick the engine for a snippet
+
+        Args:
+            text: Snippet text
+            mode: Per-snippet mode, or None to follow the global mode
+
+        Returns:
+            TypeEngine or PasteEngine
+        """
+        if mode not in MODES:
+            mode = self.mode
+        if mode == MODE_AUTO:
+            mode = MODE_PASTE if len(text) >= self.paste_threshold else MODE_TYPE
+        return self.engines[mode]
+
+    def inject(self, text, mode=None, erase=0):
+        """
+        Inject text using the engine selected for it
+
+        Args:
+            text: Text to inject
+            mode: Per-snippet mode, or None to follow the global mode
+            erase: Number of backspaces to send first (typed abbreviation)
+        """
+        for _ in range(erase):
+            self.backend.send('backspace')
+        self.engine_for(text, mode).inject(text)
+
+
+class InjectionJob:
+    """A single pending injection"""
+
+    __slots__ = ('text', 'mode', 'shortcut', 'erase', 'fired')
+
+    def __init__(self, text, mode=None, shortcut=None, erase=0, fired=None):
+        self.text = text
+        self.mode = mode
+        self.shortcut = shortcut
+        self.erase = erase
+        self.fired = fired      # perf_counter() when the hotkey callback ran
+
+
+class InjectionWorker:
+    """Dedicated injection thread fed by a bounded job queue"""
+
+    def __init__(self, injector, max_pending=DEFAULT_MAX_PENDING, policy=POLICY_QUEUE,
+                 on_depth_changed=None, on_injected=None):
+        """
+        Args:
+            injector: TextInjector used to run jobs
+            max_pending: Maximum number of jobs waiting to run
+            policy: Overlapping fire policy ('queue', 'drop' or 'replace')
+            on_depth_changed: Optional callback(depth), called from any thread
+                whenever the number of pending plus running jobs changes
+            on_injected: Optional callback(shortcut, queued, duration), called
+                on the worker thread after each successful injection with the
+                seconds from submit (or the job's fire time) to start, and the
+                injection time
+        """
+        self.injector = injector
+        self.max_pending = max(1, max_pending)
+        self.policy = policy if policy in POLICIES else POLICY_QUEUE
+        self.on_depth_changed = on_depth_changed
+        self.on_injected = on_injected
+
+        self._jobs = deque()
+        self._condition = threading.Condition()
+        self._busy = False
+        self._running = False
+        self._thread = None
+
+        # Counters for diagnostics
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def depth(self):
+        """Number of pending jobs plus the one currently running"""
+        with self._condition:
+            return len(self._jobs) + (1 if self._busy else 0)
+
+    def start(self):
+        """Start the worker thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='ezText-injection', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Discard pending jobs and stop the worker thread"""
+        with self._condition:
+            self._running = False
+            self._jobs.clear()
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, text, mode=None, shortcut=None, erase=0, fired=None):
+        """
+        Enqueue an injection without blocking
+
+        Args:
+            fired: perf_counter() when the hotkey fired (defaults to now)
+
+        Returns:
+            bool: True if the job was accepted, False if it was dropped
+        """
+        with self._condition:
+            if self.policy == POLICY_DROP and (self._jobs or self._busy):
+                accepted = False
+            elif self.policy == POLICY_REPLACE:
+                self.dropped += len(self._jobs)
+                self._jobs.clear()
+                accepted = True
+            else:
+                accepted = len(self._jobs) < self.max_pending
+
+            if accepted:
+                self._jobs.append(InjectionJob(text, mode, shortcut, erase,
+                                               time.perf_counter() if fired is None else fired))
+                self._condition.notify()
+            else:
+                self.dropped += 1
+            depth = len(self._jobs) + (1 if self._busy else 0)
+
+        if accepted:
+            self._notify_depth(depth)
+        return accepted
+
+    def _notify_depth(self, depth):
+        if self.on_depth_changed is not None:
+            try:
+                self.on_depth_changed(depth)
+            except Exception as e:
+                print(f"Error reporting injection queue depth: {e}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._jobs:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                job = self._jobs.popleft()
+                self._busy = True
+
+            try:
+                started = time.perf_counter()
+                self.injector.inject(job.text, job.mode, job.erase)
+                self.completed += 1
+                duration = time.perf_counter() - started
+            except Exception as e:
+                self.failed += 1
+                print(f"Error injecting text for {job.shortcut}: {e}")
+            else:
+                if self.on_injected is not None:
+                    try:
+                        self.on_injected(job.shortcut, started - job.fired, duration)
+                    except Exception as e:
+                        print(f"Error reporting injection latency: {e}")
+
+            with self._condition:
+                self._busy = False
+                depth = len(self._jobs)
+            self._notify_depth(depth)
@@ -0,0 +1,156 @@
+"""
+ezText Snippet Store
+
+SnippetStore is a dict-like shortcut -> text mapping that keeps one
+canonical copy of every unique snippet text. Texts whose UTF-8 encoding
+reaches the compression threshold are held zlib-compressed (when that
+saves space) and are only decompressed when read, i.e. when a hotkey
+fires or a row is displayed. A small cache keeps recently read texts decompressed.
+
+The table model and the hotkey callbacks read texts through the store
+instead of holding their own copies.
+"""
+
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+# Default UTF-8 size (in bytes) from which texts are compressed
+DEFAULT_COMPRESS_THRESHOLD = 512
+
+# Number of decompressed texts kept for repeated reads
+DEFAULT_CACHE_SIZE = 64
+
+
+class SnippetStore(MutableMapping):
+    """Shortcut -> text mapping with deduplicated, compressed storage"""
+
+    def __init__(self, compress_threshold=DEFAULT_COMPRESS_THRESHOLD, cache_size=DEFAULT_CACHE_SIZE,
+                 level=6):
+        """
+        Args:
+            compress_threshold: UTF-8 size in bytes at which texts are compressed
+            cache_size: Number of decompressed texts to cache
+            level: zlib compression level
+        """
+        self.compress_threshold = compress_threshold
+        self.cache_size = cache_size
+        self.level = level
+
+        self._values = {}       # shortcut -> blob (str, or zlib-compressed bytes)
+        self._canonical = {}    # blob -> the one shared blob object
+        self._refs = {}         # blob -> number of shortcuts using it
+        self._cache = OrderedDict()  # compressed blob -> text
+        self._cache_lock = threading.Lock()  # Hotkeys read from the hook thread
+
+    def _encode(self, text):
+        if len(text) * 4 < self.compress_threshold:
+            return text  # Too short to reach the threshold even as 4-byte UTF-8
+        encoded = text.encode('utf-8')
+        if len(encoded) >= self.compress_threshold:
+            compressed = zlib.compress(encoded, self.level)
+            # Compression is deterministic, so equal texts give equal blobs
+            if len(compressed) < len(encoded):
+                return compressed
+        return text
+
+    def _decode(self, blob):
+        if isinstance(blob, str):
+            return blob
+        with self._cache_lock:
+            text = self._cache.get(blob)
+            if text is not None:
+                self._cache.move_to_end(blob)
+                return text
+        text = zlib.decompress(blob).decode('utf-8')
+        if self.cache_size:
+            with self._cache_lock:
+                self._cache[blob] = text
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return text
+
+    def _release(self, blob):
+        refs = self._refs[blob] - 1
+        if refs:
+            self._refs[blob] = refs
+        else:
+            del self._refs[blob]
+            del self._canonical[blob]
+            with self._cache_lock:
+                self._cache.pop(blob, None)
+
+    def __getitem__(self, shortcut):
+        return self._decode(self._values[shortcut])
+
+    def __setitem__(self, shortcut, text):
+        blob = self._encode(text)
+        blob = self._canonical.setdefault(blob, blob)
+        self._refs[blob] = self._refs.get(blob, 0) + 1
+        old = self._values.get(shortcut)
+        self._values[shortcut] = blob
+        if old is not None:
+            self._release(old)
+
+    def __delitem__(self, shortcut):
+        self._release(self._values.pop(shortcut))
+
+    def __contains__(self, shortcut):
+        return shortcut in self._values
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def rename(self, shortcut, new_shortcut):
+        """Move a text to a new shortcut without decompressing it"""
+        blob = self._values.pop(shortcut)
+        old = self._values.get(new_shortcut)
+        self._values[new_shortcut] = blob
+        if old is not None:
+            self._release(old)
+
+    def clear(self):
+        self._values.clear()
+        self._canonical.clear()
+        self._refs.clear()
+        with self._cache_lock:
+            self._cache.clear()
+
+    def copy(self):
+        """
+        Cheap snapshot sharing the stored blobs
+
+        Texts are not decompressed, so the copy can be handed to a
+        background thread that reads (and decompresses) it there.
+        """
+        other = SnippetStore(self.compress_threshold, cache_size=0, level=self.level)
+        other._values = dict(self._values)
+        other._canonical = dict(self._canonical)
+        other._refs = dict(self._refs)
+        return other
+
+    def memory_report(self):
+        """
+        Compare stored size with plain per-entry strings
+
+        Returns:
+            dict: entries, unique texts, compressed texts, plain and stored
+                sizes in bytes (text objects only)
+        """
+        plain = 0
+        for blob in self._values.values():
+            plain += sys.getsizeof(self._decode(blob) if isinstance(blob, bytes) else blob)
+        stored = sum(sys.getsizeof(blob) for blob in self._canonical)
+        return {
+            'entries': len(self._values),
+            'unique': len(self._canonical),
+            'compressed': sum(1 for blob in self._canonical if isinstance(blob, bytes)),
+            'plain_bytes': plain,
+            'stored_bytes': stored,
+        }
@@ -0,0 +1,601 @@
+"""
+ezText Shortcut Storage
+
+Serialization of the shortcut library and the write-behind autosave.
+
+AutosaveWriter serializes snapshots on a background thread, skips the
+write when the content hash is unchanged, and replaces the file
+atomically (temp file in the same directory + os.replace), so a crash
+mid-write can never leave a truncated INI behind. Debouncing is done by
+the caller, which hands over one snapshot per burst of edits.
+
+ShortcutJournal is the alternative 'journal' storage mode: every add,
+edit or delete appends one small record next to the INI, startup replays
+the INI snapshot plus the journal, and the journal is folded into a fresh
+snapshot once it grows past a size threshold.
+
+SnapshotCache keeps a compact binary copy of the parsed library under the
+config directory, keyed on the INI's path, mtime, size and SHA-256, so a
+cold start can skip configparser entirely while the INI is unchanged.
+
+diff_library() compares the loaded library with a newly read one, so a
+reload only touches the entries that were added, removed or changed.
+"""
+
+import configparser
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+
+
+# Storage modes
+STORAGE_SNAPSHOT = 'snapshot'   # Rewrite the whole INI (debounced)
+STORAGE_JOURNAL = 'journal'     # Append change records, compact periodically
+STORAGE_MODES = (STORAGE_SNAPSHOT, STORAGE_JOURNAL)
+
+# Default journal size (bytes) that triggers compaction
+DEFAULT_COMPACT_THRESHOLD = 256 * 1024
+
+# File extensions opened with the database backend (database.py)
+DATABASE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+def is_database_file(path):
+    """Whether a library path uses the database backend"""
+    return os.path.splitext(path)[1].lower() in DATABASE_EXTENSIONS
+
+
+def serialize_ini(shortcuts, engines=None, triggers=None):
+    """
+    Serialize shortcuts to INI text
+
+    Args:
+        shortcuts: Dict of shortcut -> text
+        engines: Optional dict of shortcut -> injection mode override
+        triggers: Optional dict of shortcut -> non-chord trigger type
+
+    Returns:
+        str: INI file contents
+    """
+    engines = engines or {}
+    triggers = triggers or {}
+    config = configparser.ConfigParser()
+
+    for shortcut, text in shortcuts.items():
+        section = {'text': text}
+        if shortcut in engines:
+            section['engine'] = engines[shortcut]
+        if shortcut in triggers:
+            section['trigger'] = triggers[shortcut]
+        config[shortcut] = section
+
+    buffer = io.StringIO()
+    config.write(buffer)
+    return buffer.getvalue()
+
+
+def parse_ini(path):
+    """
+    Parse a shortcut INI file
+
+    Args:
+        path: INI file path
+
+    Returns:
+        tuple: (shortcuts, engines, triggers) dicts; engine and trigger
+            values are returned as stored, unvalidated
+    """
+    config = configparser.ConfigParser()
+    config.read(path, encoding='utf-8')
+    return _library_from_config(config)
+
+
+def parse_ini_text(text):
+    """Parse shortcut INI contents that were already read; see parse_ini()"""
+    config = configparser.ConfigParser()
+    config.read_string(text)
+    return _library_from_config(config)
+
+
+def _library_from_config(config):
+    shortcuts = {}
+    engines = {}
+    triggers = {}
+    for shortcut in config.sections():
+        section = config[shortcut]
+        shortcuts[shortcut] = section['text']
+        if section.get('engine'):
+            engines[shortcut] = section['engine']
+        if section.get('trigger'):
+            triggers[shortcut] = section['trigger']
+    return shortcuts, engines, triggers
+
+
+def stat_key(path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class LibraryDiff:
+    """Shortcuts that differ between two libraries"""
+
+    __slots__ = ('added', 'removed', 'changed')
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.changed = []     # Text, engine or trigger differs
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def exclude(self, shortcuts):
+        """Drop the given shortcuts from every list"""
+        self.added = [shortcut for shortcut in self.added if shortcut not in shortcuts]
+        self.removed = [shortcut for shortcut in self.removed if shortcut not in shortcuts]
+        self.changed = [shortcut for shortcut in self.changed if shortcut not in shortcuts]
+
+    def __repr__(self):
+        return (f"LibraryDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"changed={len(self.changed)})")
+
+
+def diff_library(current, target):
+    """
+    Compare the loaded library with a newly read one
+
+    Args:
+        current: (shortcuts, engines, triggers) currently loaded
+        target: (shortcuts, engines, triggers) to change to
+
+    Returns:
+        LibraryDiff: Added and changed shortcuts in target order,
+            removed ones in current order
+    """
+    shortcuts, engines, triggers = current
+    new_shortcuts, new_engines, new_triggers = target
+    diff = LibraryDiff()
+    for shortcut, text in new_shortcuts.items():
+        if shortcut not in shortcuts:
+            diff.added.append(shortcut)
+        elif (engines.get(shortcut) != new_engines.get(shortcut) or
+              triggers.get(shortcut) != new_triggers.get(shortcut) or
+              shortcuts[shortcut] != text):
+            diff.changed.append(shortcut)
+    diff.removed = [shortcut for shortcut in shortcuts if shortcut not in new_shortcuts]
+    return diff
+
+
+def atomic_write(path, data):
+    """
+    Replace a file atomically
+
+    Writes to a temporary file in the same directory, flushes it to disk
+    and renames it over the target.
+
+    Args:
+        path: Target file path
+        data: bytes or str (str is written as UTF-8)
+    """
+    import tempfile  # Only needed once something is saved, not at startup
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.ezText-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class AutosaveWriter:
+    """Background writer that coalesces snapshots and skips unchanged content"""
+
+    def __init__(self, serialize=serialize_ini, on_error=None):
+        """
+        Args:
+            serialize: Function(*snapshot) returning the file contents
+            on_error: Optional callback(path, message), called from the writer thread
+        """
+        self.serialize = serialize
+        self.on_error = on_error
+
+        self._pending = None      # (path, snapshot, after callbacks) waiting to be written
+        self._busy = False
+        self._running = True
+        self._digests = {}        # path -> hash of the last content written
+        self._stats = {}          # path -> stat_key() right after that write
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='ezText-autosave', daemon=True)
+        self._thread.start()
+
+        # Counters for diagnostics
+        self.writes = 0
+        self.skipped = 0
+
+    def submit(self, path, *snapshot, after=None):
+        """
+        Queue a snapshot for writing; replaces any snapshot not yet written
+
+        Args:
+            path: Target file path
+            *snapshot: Arguments for the serialize function
+            after: Optional callback() run on the writer thread once the
+                snapshot (or a newer one replacing it) is on disk
+        """
+        with self._condition:
+            afters = self._pending[2] if self._pending is not None else []
+            if after is not None:
+                afters.append(after)
+            self._pending = (path, snapshot, afters)
+            self._condition.notify_all()
+
+    def flush(self, timeout=5.0):
+        """
+        Wait until every submitted snapshot has been written
+
+        Returns:
+            bool: True if the writer is idle, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending is None and not self._busy, timeout)
+
+    def stop(self, timeout=5.0):
+        """Flush pending writes and stop the writer thread"""
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def forget(self, path):
+        """Drop the remembered hash for a path (forces the next write)"""
+        with self._condition:
+            self._digests.pop(path, None)
+
+    def written_stat(self, path):
+        """
+        stat_key() of a path right after this writer last wrote it
+
+        A file watcher compares it with the current stat_key() to tell its
+        own saves from changes made by other programs.
+        """
+        with self._condition:
+            return self._stats.get(path)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending is None:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                path, snapshot, afters = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                self._write(path, snapshot)
+                for after in afters:
+                    after()
+            except Exception as e:
+                print(f"Error saving {path}: {e}")
+                if self.on_error is not None:
+                    self.on_error(path, str(e))
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, path, snapshot):
+        content = self.serialize(*snapshot).encode('utf-8')
+        digest = hashlib.sha256(content).digest()
+        if self._digests.get(path) == digest and os.path.exists(path):
+            self.skipped += 1
+            return
+        atomic_write(path, content)
+        with self._condition:
+            self._digests[path] = digest
+            self._stats[path] = stat_key(path)
+        self.writes += 1
+
+
+class ShortcutJournal:
+    """Append-only change journal stored next to the shortcut INI"""
+
+    def __init__(self, config_file, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        """
+        Args:
+            config_file: Path of the INI snapshot the journal belongs to
+            compact_threshold: Journal size in bytes that triggers compaction
+        """
+        self.config_file = config_file
+        self.path = config_file + '.journal'
+        self.rotated_path = config_file + '.journal.old'
+        self.compact_threshold = compact_threshold
+        self._file = None
+        self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def exists(self):
+        """Whether there are journal records not yet folded into the snapshot"""
+        return os.path.exists(self.path) or os.path.exists(self.rotated_path)
+
+    def _append(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            if self._file.tell() and not self._ends_with_newline():
+                # Terminate a record cut short by a crash so the next one parses
+                self._file.write(b'\n')
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        self._file.write(line)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.size += len(line)
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def record_set(self, shortcut, text, engine=None, trigger=None):
+        """Record an added or edited shortcut"""
+        record = {'op': 'set', 'shortcut': shortcut, 'text': text}
+        if engine:
+            record['engine'] = engine
+        if trigger:
+            record['trigger'] = trigger
+        self._append(record)
+
+    def record_delete(self, shortcut):
+        """Record a deleted shortcut"""
+        self._append({'op': 'del', 'shortcut': shortcut})
+
+    def record_clear(self):
+        """Record deletion of every shortcut"""
+        self._append({'op': 'clear'})
+
+    def replay(self, shortcuts, engines, triggers):
+        """
+        Apply journal records on top of a loaded snapshot
+
+        A truncated last line (crash during append) is ignored.
+
+        Returns:
+            int: Number of records applied
+        """
+        applied = 0
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    op = record.get('op')
+                    shortcut = record.get('shortcut')
+                    if op == 'set':
+                        shortcuts[shortcut] = record.get('text', '')
+                        engines.pop(shortcut, None)
+                        triggers.pop(shortcut, None)
+                        if record.get('engine'):
+                            engines[shortcut] = record['engine']
+                        if record.get('trigger'):
+                            triggers[shortcut] = record['trigger']
+                    elif op == 'del':
+                        shortcuts.pop(shortcut, None)
+                        engines.pop(shortcut, None)
+                        triggers.pop(shortcut, None)
+                    elif op == 'clear':
+                        shortcuts.clear()
+                        engines.clear()
+                        triggers.clear()
+                    else:
+                        continue
+                    applied += 1
+        return applied
+
+    @property
+    def needs_compaction(self):
+        return self.size >= self.compact_threshold and not os.path.exists(self.rotated_path)
+
+    def rotate(self):
+        """
+        Start a compaction: move current records aside
+
+        New records go to a fresh journal while the snapshot is written;
+        call finish_compaction() once the snapshot is on disk.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.replace(self.path, self.rotated_path)
+        self.size = 0
+
+    def finish_compaction(self):
+        """Delete the records that are now part of the snapshot"""
+        try:
+            os.remove(self.rotated_path)
+        except FileNotFoundError:
+            pass
+
+    def reset(self):
+        """Delete every journal record (the snapshot holds all of them)"""
+        self.close()
+        for path in (self.path, self.rotated_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.size = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SnapshotCache:
+    """
+    Binary cache of parsed shortcut libraries
+
+    File layout (little endian):
+        header: magic, format version, source mtime_ns, source size,
+                source SHA-256, record count
+        record: shortcut, text, engine and trigger lengths (u32 each),
+                then the UTF-8 bytes
+    """
+
+    MAGIC = b'EZTC'
+    VERSION = 2
+    HEADER = struct.Struct('<4sHxxqQ32sI')
+    RECORD = struct.Struct('<IIII')
+
+    def __init__(self, cache_dir):
+        """
+        Args:
+            cache_dir: Directory holding the cache files
+        """
+        self.cache_dir = cache_dir
+
+        # Counters for diagnostics
+        self.hits = 0
+        self.misses = 0
+
+    def cache_path(self, source):
+        """Cache file for a source INI (one per absolute path)"""
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(source)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:16] + '.snapshot')
+
+    @staticmethod
+    def _read_source(source):
+        """
+        Read the source INI once
+
+        Returns:
+            tuple: (bytes, (mtime_ns, size)); the key is taken from the open
+                file, so it describes exactly the bytes that were read even
+                if the file is replaced meanwhile
+        """
+        with open(source, 'rb') as f:
+            data = f.read()
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        return data, (mtime_ns, len(data))
+
+    def load(self, source):
+        """
+        Load a library, from the cache when the source is unchanged
+
+        The source is read once; the cache check, the parse on a miss and
+        the regenerated cache all use those same bytes.
+
+        Returns:
+            tuple: (shortcuts, engines, triggers) as returned by parse_ini()
+        """
+        try:
+            data, key = self._read_source(source)
+        except OSError:
+            # Missing or unreadable: parse_ini() treats it as an empty library
+            self.misses += 1
+            return parse_ini(source)
+        digest = hashlib.sha256(data).digest()
+
+        try:
+            library = self._read(source, key, digest)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            library = None
+        if library is not None:
+            self.hits += 1
+            return library
+
+        self.misses += 1
+        library = parse_ini_text(data.decode('utf-8'))
+        try:
+            self.store(source, key, digest, *library)
+        except OSError as e:
+            print(f"Error writing snapshot cache for {source}: {e}")
+        return library
+
+    def _read(self, source, key, digest):
+        path = self.cache_path(source)
+        if not os.path.exists(path):
+            return None
+        mtime_ns, size = key
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            magic, version, cached_mtime, cached_size, cached_digest, count = \
+                self.HEADER.unpack_from(view, 0)
+            if magic != self.MAGIC or version != self.VERSION:
+                return None
+            if cached_mtime != mtime_ns or cached_size != size or cached_digest != digest:
+                return None
+
+            shortcuts = {}
+            engines = {}
+            triggers = {}
+            offset = self.HEADER.size
+            record = self.RECORD
+            for _ in range(count):
+                shortcut_len, text_len, engine_len, trigger_len = record.unpack_from(view, offset)
+                offset += record.size
+                shortcut = view[offset:offset + shortcut_len].decode('utf-8')
+                offset += shortcut_len
+                shortcuts[shortcut] = view[offset:offset + text_len].decode('utf-8')
+                offset += text_len
+                if engine_len:
+                    engines[shortcut] = view[offset:offset + engine_len].decode('utf-8')
+                    offset += engine_len
+                if trigger_len:
+                    triggers[shortcut] = view[offset:offset + trigger_len].decode('utf-8')
+                    offset += trigger_len
+            if offset != len(view):
+                return None
+        return shortcuts, engines, triggers
+
+    def store(self, source, key, digest, shortcuts, engines, triggers):
+        """
+        Write the cache for a source INI that was just parsed
+
+        Args:
+            source: INI file path
+            key: (mtime_ns, size) of the bytes that were parsed
+            digest: SHA-256 of the bytes that were parsed
+        """
+        mtime_ns, size = key
+        parts = [self.HEADER.pack(self.MAGIC, self.VERSION, mtime_ns, size, digest, len(shortcuts))]
+        for shortcut, text in shortcuts.items():
+            shortcut_bytes = shortcut.encode('utf-8')
+            text_bytes = text.encode('utf-8')
+            engine_bytes = engines.get(shortcut, '').encode('utf-8')
+            trigger_bytes = triggers.get(shortcut, '').encode('utf-8')
+            parts.append(self.RECORD.pack(len(shortcut_bytes), len(text_bytes),
+                                          len(engine_bytes), len(trigger_bytes)))
+            parts.extend((shortcut_bytes, text_bytes, engine_bytes, trigger_bytes))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        atomic_write(self.cache_path(source), b''.join(parts))
+
+    def invalidate(self, source):
+        """Remove the cache for a source INI"""
+        try:
+            os.remove(self.cache_path(source))
+        except FileNotFoundError:
+            pass
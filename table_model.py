@@ -0,0 +1,311 @@
+"""
+ezText Shortcut Table Model
+
+ShortcutTableModel backs the shortcut table with plain parallel lists
+instead of one QCheckBox widget and two QTableWidgetItems per row.
+The selection checkbox is a checkable role over a bytearray, so bulk
+select, deselect and reset are a single model operation. Snippet texts
+are not copied into the model: rows are read from the application's
+shortcut -> text mapping when displayed.
+
+Every row carries a stable ID that survives inserts, removals and
+renames. The model keeps ID -> row, ID -> shortcut and shortcut -> ID
+indexes, so rows are found without scanning. The ID -> row index is
+rebuilt lazily, once, after rows are removed.
+
+Edits made in the view are not applied directly: the model emits
+edit_requested(row_id, column, value) and the application validates the
+value, updates its mapping and notifies the model with
+text_changed/set_shortcut.
+
+ShortcutFilterProxyModel narrows the view to search results. It either
+matches a substring itself or shows a precomputed set of shortcuts (for
+example full-text search hits from a database library).
+"""
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+
+
+# Column indexes
+COLUMN_CHECK = 0
+COLUMN_TEXT = 1
+COLUMN_SHORTCUT = 2
+
+
+class ShortcutTableModel(QAbstractTableModel):
+    """Table model over a compact (shortcut, text, checked) store"""
+
+    edit_requested = pyqtSignal(int, int, str)  # (row ID, column, value)
+
+    def __init__(self, texts, parent=None):
+        """
+        Args:
+            texts: Mapping of shortcut -> text owned by the application
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self._texts = texts
+        self._shortcuts = []
+        self._checked = bytearray()
+        self._ids = []
+        self._headers = ['', '', '']
+
+        # Indexes
+        self._next_id = 1
+        self._id_by_shortcut = {}
+        self._shortcut_by_id = {}
+        self._row_by_id = {}
+        self._rows_stale = False  # ID -> row needs a rebuild after removals
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._shortcuts)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 3
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+
+        if column == COLUMN_CHECK:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Checked if self._checked[row] else Qt.CheckState.Unchecked
+            return None
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column == COLUMN_TEXT:
+                return self._texts[self._shortcuts[row]]
+            return self._shortcuts[row]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid():
+            return False
+        row = index.row()
+        column = index.column()
+
+        if column == COLUMN_CHECK and role == Qt.ItemDataRole.CheckStateRole:
+            checked = Qt.CheckState(value) == Qt.CheckState.Checked
+            self._checked[row] = 1 if checked else 0
+            self.dataChanged.emit(index, index, [role])
+            return True
+
+        if role == Qt.ItemDataRole.EditRole and column in (COLUMN_TEXT, COLUMN_SHORTCUT):
+            # Let the application validate before anything changes
+            self.edit_requested.emit(self._ids[row], column, str(value))
+            return False
+        return False
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if index.column() == COLUMN_CHECK:
+            return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self._headers[section]
+        return None
+
+    # Application interface
+
+    def set_headers(self, headers):
+        """Set the column header labels"""
+        self._headers = list(headers)
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self._headers) - 1)
+
+    def reset_rows(self, shortcuts):
+        """
+        Replace every row in one model reset
+
+        Args:
+            shortcuts: Iterable of shortcuts, in display order
+        """
+        self.beginResetModel()
+        self._shortcuts = list(shortcuts)
+        self._checked = bytearray(len(self._shortcuts))
+
+        first_id = self._next_id
+        self._next_id += len(self._shortcuts)
+        self._ids = list(range(first_id, self._next_id))
+        self._id_by_shortcut = dict(zip(self._shortcuts, self._ids))
+        self._shortcut_by_id = dict(zip(self._ids, self._shortcuts))
+        self._row_by_id = {row_id: row for row, row_id in enumerate(self._ids)}
+        self._rows_stale = False
+        self.endResetModel()
+
+    def clear(self):
+        """Remove every row"""
+        self.reset_rows(())
+
+    def append_row(self, shortcut):
+        """Append a row and return its index"""
+        row = len(self._shortcuts)
+        row_id = self._next_id
+        self._next_id += 1
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._shortcuts.append(shortcut)
+        self._checked.append(0)
+        self._ids.append(row_id)
+        self._id_by_shortcut[shortcut] = row_id
+        self._shortcut_by_id[row_id] = shortcut
+        if not self._rows_stale:
+            self._row_by_id[row_id] = row
+        self.endInsertRows()
+        return row
+
+    def append_rows(self, shortcuts):
+        """Append rows for several shortcuts in one model operation"""
+        shortcuts = list(shortcuts)
+        if not shortcuts:
+            return
+        first = len(self._shortcuts)
+        first_id = self._next_id
+        self._next_id += len(shortcuts)
+        self.beginInsertRows(QModelIndex(), first, first + len(shortcuts) - 1)
+        for offset, shortcut in enumerate(shortcuts):
+            row_id = first_id + offset
+            self._shortcuts.append(shortcut)
+            self._ids.append(row_id)
+            self._id_by_shortcut[shortcut] = row_id
+            self._shortcut_by_id[row_id] = shortcut
+            if not self._rows_stale:
+                self._row_by_id[row_id] = first + offset
+        self._checked.extend(bytes(len(shortcuts)))
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        """Remove the given row indexes"""
+        rows = sorted(set(rows))
+        if not rows:
+            return
+        for row in rows:
+            row_id = self._ids[row]
+            del self._id_by_shortcut[self._shortcuts[row]]
+            del self._shortcut_by_id[row_id]
+            self._row_by_id.pop(row_id, None)
+        if rows[0] < len(self._shortcuts) - len(rows):
+            # Rows after the first removed one shift up
+            self._rows_stale = True
+
+        if len(rows) > 32:
+            # Many scattered rows: rebuild the store once instead of N removals
+            drop = set(rows)
+            self.beginResetModel()
+            keep = [i for i in range(len(self._shortcuts)) if i not in drop]
+            self._shortcuts = [self._shortcuts[i] for i in keep]
+            self._checked = bytearray(self._checked[i] for i in keep)
+            self._ids = [self._ids[i] for i in keep]
+            self.endResetModel()
+            return
+        for row in reversed(rows):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._shortcuts[row]
+            del self._checked[row]
+            del self._ids[row]
+            self.endRemoveRows()
+
+    def shortcut_at(self, row):
+        return self._shortcuts[row]
+
+    def text_at(self, row):
+        return self._texts[self._shortcuts[row]]
+
+    def id_at(self, row):
+        return self._ids[row]
+
+    def id_of(self, shortcut):
+        """Row ID of a shortcut, or None"""
+        return self._id_by_shortcut.get(shortcut)
+
+    def shortcut_of(self, row_id):
+        """Shortcut of a row ID, or None"""
+        return self._shortcut_by_id.get(row_id)
+
+    def row_of(self, row_id):
+        """Current row index of a row ID, or None if the row is gone"""
+        if self._rows_stale:
+            self._row_by_id = {rid: row for row, rid in enumerate(self._ids)}
+            self._rows_stale = False
+        return self._row_by_id.get(row_id)
+
+    def row_of_shortcut(self, shortcut):
+        """Current row index of a shortcut, or None"""
+        row_id = self._id_by_shortcut.get(shortcut)
+        return None if row_id is None else self.row_of(row_id)
+
+    def text_changed(self, row):
+        """Redisplay the text of a row after the mapping changed"""
+        index = self.index(row, COLUMN_TEXT)
+        self.dataChanged.emit(index, index)
+
+    def set_shortcut(self, row, shortcut):
+        """Update the shortcut of a row (the row keeps its ID)"""
+        row_id = self._ids[row]
+        del self._id_by_shortcut[self._shortcuts[row]]
+        self._id_by_shortcut[shortcut] = row_id
+        self._shortcut_by_id[row_id] = shortcut
+        self._shortcuts[row] = shortcut
+        index = self.index(row, COLUMN_SHORTCUT)
+        self.dataChanged.emit(index, index)
+
+    def set_all_checked(self, checked):
+        """Check or uncheck every row in one operation"""
+        if not self._shortcuts:
+            return
+        value = b'\x01' if checked else b'\x00'
+        self._checked = bytearray(value * len(self._shortcuts))
+        self.dataChanged.emit(
+            self.index(0, COLUMN_CHECK),
+            self.index(len(self._shortcuts) - 1, COLUMN_CHECK),
+            [Qt.ItemDataRole.CheckStateRole]
+        )
+
+    def checked_rows(self):
+        """Indexes of checked rows"""
+        checked = self._checked
+        rows = []
+        row = checked.find(1)
+        while row != -1:
+            rows.append(row)
+            row = checked.find(1, row + 1)
+        return rows
+
+
+class ShortcutFilterProxyModel(QSortFilterProxyModel):
+    """Filter proxy showing only the rows matching a search"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._query = ''
+        self._matches = None
+
+    def set_query(self, query, matches=None):
+        """
+        Filter the rows
+
+        Args:
+            query: Case-insensitive substring of the text or shortcut ('' shows every row)
+            matches: Optional set of shortcuts to show instead of substring matching
+        """
+        self._query = query.casefold()
+        self._matches = matches
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._matches is not None:
+            return self.sourceModel().shortcut_at(source_row) in self._matches
+        if not self._query:
+            return True
+        model = self.sourceModel()
+        return (self._query in model.text_at(source_row).casefold()
+                or self._query in model.shortcut_at(source_row).casefold())
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root, next to ezText.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Qt tests run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def app():
+    """One QApplication for all tests; the headless engine needs widgets"""
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
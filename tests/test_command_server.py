@@ -0,0 +1,130 @@
+import socket
+import sys
+import threading
+import time
+import uuid
+
+import pytest
+
+from command_server import (DEFERRED, MAX_REQUEST_SIZE, CommandError, CommandServer, parse_response,
+                            send_command, server_path)
+
+
+# Raw byte streams are sent over the POSIX socket; Windows uses a named pipe
+posix_only = pytest.mark.skipif(sys.platform == 'win32', reason='raw AF_UNIX client')
+
+
+def run_client(app, function, timeout=10.0):
+    """Run a blocking client on a thread while the event loop serves it"""
+    result = {}
+
+    def target():
+        try:
+            result['value'] = function()
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while thread.is_alive() and time.monotonic() < deadline:
+        app.processEvents()
+        thread.join(0.001)
+    assert not thread.is_alive(), "client did not finish"
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+@pytest.fixture
+def server(app):
+    server = CommandServer()
+    server.name = f'ezText_test_{uuid.uuid4().hex[:12]}'
+    assert server.listen(server.name)
+    calls = []
+    server.calls = calls
+
+    def echo(argument, reply):
+        calls.append(('ECHO', argument))
+        return {'argument': argument}
+
+    def fail(argument, reply):
+        raise CommandError('it failed')
+
+    def later(argument, reply):
+        # Replies from another thread, after the requests behind it
+        threading.Timer(0.05, reply, (True, f'later {argument}')).start()
+        return DEFERRED
+
+    server.register('echo', echo)
+    server.register('FAIL', fail)
+    server.register('LATER', later)
+    yield server
+    server.close()
+
+
+def raw_exchange(server, payload, responses):
+    """Send raw bytes and read a number of response lines"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(5.0)
+        client.connect(server_path(server.name))
+        client.sendall(payload)
+        with client.makefile('rb') as stream:
+            return [stream.readline() for _ in range(responses)]
+
+
+def test_send_command_gets_handler_result(app, server):
+    result = run_client(app, lambda: send_command('echo', 'hello world', name=server.name))
+    assert result == {'argument': 'hello world'}
+    assert server.calls == [('ECHO', 'hello world')]
+    assert server.requests == 1 and server.errors == 0
+
+
+def test_handler_error_and_unknown_command_answer_err(app, server):
+    with pytest.raises(CommandError, match='it failed'):
+        run_client(app, lambda: send_command('FAIL', name=server.name))
+    with pytest.raises(CommandError, match='Unknown command: NOPE'):
+        run_client(app, lambda: send_command('NOPE', name=server.name))
+    assert server.errors == 2
+
+
+@posix_only
+def test_deferred_reply_keeps_request_order(app, server):
+    lines = run_client(app, lambda: raw_exchange(server, b'LATER 1\nECHO 2\nLATER 3\n', 3))
+    assert [parse_response(line) for line in lines] == ['later 1', {'argument': '2'}, 'later 3']
+
+
+@posix_only
+def test_malformed_lines_answer_err_and_connection_continues(app, server):
+    lines = run_client(app, lambda: raw_exchange(server, b'\n\xff\xfe\nECHO ok\n', 3))
+    assert lines[0].startswith(b'ERR Unknown command: (empty)')
+    assert lines[1].startswith(b'ERR ')
+    assert parse_response(lines[2]) == {'argument': 'ok'}
+
+
+@posix_only
+def test_oversized_request_gets_one_err(app, server):
+    payload = b'ECHO ' + b'x' * (MAX_REQUEST_SIZE + 1024) + b'\nECHO after\n'
+    lines = run_client(app, lambda: raw_exchange(server, payload, 2))
+    assert lines[0].startswith(b'ERR Request too long')
+    assert parse_response(lines[1]) == {'argument': 'after'}
+    assert server.calls == [('ECHO', 'after')]
+
+
+@posix_only
+def test_request_without_newline_runs_on_disconnect(app, server):
+    def legacy_show():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(server_path(server.name))
+            client.sendall(b'ECHO legacy')
+
+    run_client(app, legacy_show)
+    deadline = time.monotonic() + 5.0
+    while not server.calls and time.monotonic() < deadline:
+        app.processEvents()
+    assert server.calls == [('ECHO', 'legacy')]
+
+
+def test_send_command_rejects_newlines():
+    with pytest.raises(ValueError):
+        send_command('ECHO', 'two\nlines', name='unused')
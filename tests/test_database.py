@@ -0,0 +1,54 @@
+import sqlite3
+
+from database import ShortcutDatabase
+
+
+def make_database(tmp_path, shortcuts):
+    database = ShortcutDatabase(str(tmp_path / 'library.db'))
+    database.replace_all(shortcuts)
+    return database
+
+
+def test_search_returns_every_match_by_default(tmp_path):
+    database = make_database(tmp_path, {f'ctrl+{i}': f'invoice number {i}' for i in range(2500)})
+    assert len(database.search('invoice')) == 2500
+    assert len(database.search('invoice', limit=10)) == 10
+
+
+def test_search_matches_shortcut_column(tmp_path):
+    database = make_database(tmp_path, {'ctrl+alt+q': 'Kind regards', ';addr': 'Main Street 1'})
+    assert database.search('regards') == ['ctrl+alt+q']
+    assert database.search('alt') == ['ctrl+alt+q']
+    assert database.search('addr') == [';addr']
+
+
+def test_search_follows_updates_and_deletes(tmp_path):
+    database = make_database(tmp_path, {'ctrl+1': 'alpha'})
+    database.set('ctrl+1', 'beta')
+    assert database.search('alpha') == []
+    assert database.search('beta') == ['ctrl+1']
+    database.delete(['ctrl+1'])
+    assert database.search('beta') == []
+
+
+def test_existing_rows_are_indexed_when_fts_is_created(tmp_path):
+    path = str(tmp_path / 'library.db')
+    # Written by an SQLite build without FTS5: rows but no index
+    connection = sqlite3.connect(path)
+    connection.executescript('''
+        CREATE TABLE shortcuts (id INTEGER PRIMARY KEY, shortcut TEXT NOT NULL UNIQUE,
+                                text TEXT NOT NULL, engine TEXT, trigger TEXT);
+        INSERT INTO shortcuts (shortcut, text) VALUES ('ctrl+1', 'quarterly report');
+        PRAGMA user_version=1;
+    ''')
+    connection.close()
+
+    database = ShortcutDatabase(path)
+    assert database.has_fts
+    assert database.search('quarterly') == ['ctrl+1']
+    assert database.search('ctrl') == ['ctrl+1']
+    database.close()
+
+    # Reopening does not rebuild or lose anything
+    database = ShortcutDatabase(path)
+    assert database.search('report') == ['ctrl+1']
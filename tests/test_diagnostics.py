@@ -0,0 +1,143 @@
+import json
+
+import diagnostics
+from diagnostics import (LatencyHistogram, LatencyStats, PhaseTimer, write_dump, LATENCY_BOUNDS,
+                         LATENCY_CALLBACK_TO_INJECTION, LATENCY_INJECTION, LATENCY_KEY_TO_CALLBACK)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_timer(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(diagnostics.time, 'perf_counter', clock)
+    return PhaseTimer(), clock
+
+
+def test_laps_measure_from_the_previous_lap(monkeypatch):
+    timer, clock = make_timer(monkeypatch)
+    clock.now += 0.010
+    timer.lap('imports')
+    clock.now += 0.250
+    timer.lap('window')
+    assert [(name, round(start, 3), round(duration, 3)) for name, start, duration in timer.phases] == [
+        ('imports', 0.0, 0.010), ('window', 0.010, 0.250)]
+    assert round(timer.total, 3) == 0.260
+
+
+def test_skipped_time_is_not_part_of_the_next_phase(monkeypatch):
+    timer, clock = make_timer(monkeypatch)
+    clock.now += 0.010
+    timer.lap('imports')
+    clock.now += 5.0  # e.g. a modal dialog
+    timer.skip()
+    clock.now += 0.020
+    timer.lap('hotkeys')
+    name, start, duration = timer.phases[1]
+    assert (name, round(start, 3), round(duration, 3)) == ('hotkeys', 5.010, 0.020)
+
+
+def test_as_dict_reports_milliseconds(monkeypatch):
+    timer, clock = make_timer(monkeypatch)
+    clock.now += 0.0125
+    timer.lap('imports')
+    report = timer.as_dict()
+    assert report['total_ms'] == 12.5
+    assert report['phases'] == [{'name': 'imports', 'start_ms': 0.0, 'duration_ms': 12.5}]
+
+
+def test_format_marks_the_slowest_phase(monkeypatch):
+    timer, clock = make_timer(monkeypatch)
+    assert timer.format() == ''
+    for name, seconds in (('imports', 0.010), ('library', 0.300), ('window', 0.050)):
+        clock.now += seconds
+        timer.lap(name)
+    lines = timer.format().splitlines()
+    assert [line.split()[0] for line in lines] == ['imports', 'library', 'window', 'total']
+    assert [line for line in lines if line.endswith('<- slowest')] == [lines[1]]
+    assert '360.0 ms' in lines[-1]
+
+
+def test_dump_keeps_previous_startups(tmp_path):
+    path = str(tmp_path / 'startup-profile.json')
+    for run in range(diagnostics.DUMP_HISTORY + 3):
+        write_dump(path, {'startup': {'run': run}})
+    with open(path, encoding='utf-8') as f:
+        dump = json.load(f)
+    assert dump['startup'] == {'run': diagnostics.DUMP_HISTORY + 2}
+    assert len(dump['history']) == diagnostics.DUMP_HISTORY
+    assert dump['history'][-1] == {'run': diagnostics.DUMP_HISTORY + 1}
+
+
+def test_unreadable_dump_is_replaced(tmp_path):
+    path = tmp_path / 'startup-profile.json'
+    path.write_text('not json', encoding='utf-8')
+    write_dump(str(path), {'startup': {'run': 1}})
+    assert json.loads(path.read_text(encoding='utf-8')) == {'startup': {'run': 1}, 'history': []}
+
+
+def test_histogram_buckets_are_logarithmic():
+    assert LATENCY_BOUNDS[0] == 10e-6
+    assert LATENCY_BOUNDS[-1] < 60 <= LATENCY_BOUNDS[-1] * 1.15
+    assert all(round(upper / lower, 6) == 1.15 for lower, upper in zip(LATENCY_BOUNDS, LATENCY_BOUNDS[1:]))
+
+    histogram = LatencyHistogram()
+    histogram.record(0.0)
+    histogram.record(LATENCY_BOUNDS[3])   # Upper bounds are inclusive
+    histogram.record(120.0)               # Beyond the last bound
+    assert histogram.counts[0] == 1
+    assert histogram.counts[3] == 1
+    assert histogram.counts[-1] == 1
+    assert (histogram.count, histogram.max) == (3, 120.0)
+
+
+def test_percentiles_are_within_one_bucket():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    # 1..100 ms
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+    for percent in (50, 95, 99):
+        exact = percent / 1000
+        assert exact <= histogram.percentile(percent) < exact * 1.15
+    # Never more than the largest sample
+    assert histogram.percentile(100) == 0.1
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert summary['max_ms'] == 100.0
+    assert 50 <= summary['p50_ms'] < 57.5
+
+
+def test_latency_stats_keep_per_shortcut_and_overall_histograms():
+    stats = LatencyStats()
+    for _ in range(3):
+        stats.record('ctrl+1', LATENCY_CALLBACK_TO_INJECTION, 0.001)
+    stats.record('ctrl+2', LATENCY_CALLBACK_TO_INJECTION, 0.002)
+    stats.record('ctrl+2', LATENCY_INJECTION, 0.010)
+    stats.record('ctrl+2', LATENCY_KEY_TO_CALLBACK, -0.5)  # Clock went backwards
+
+    report = stats.as_dict()
+    assert report['overall'][LATENCY_CALLBACK_TO_INJECTION]['count'] == 4
+    assert report['overall'][LATENCY_KEY_TO_CALLBACK]['max_ms'] == 0.0
+    assert report['shortcuts']['ctrl+1'][LATENCY_INJECTION]['count'] == 0
+    assert report['shortcuts']['ctrl+2'][LATENCY_INJECTION]['max_ms'] == 10.0
+
+    # The most fired shortcut comes first; stages without samples are skipped
+    rows = []
+    for line in stats.format().splitlines()[1:]:
+        label = rows[-1][0] if line.startswith(' ') else line.split()[0]
+        rows.append((label, line.split()[-6]))
+    assert rows == [
+        ('(all)', LATENCY_KEY_TO_CALLBACK), ('(all)', LATENCY_CALLBACK_TO_INJECTION), ('(all)', LATENCY_INJECTION),
+        ('ctrl+1', LATENCY_CALLBACK_TO_INJECTION),
+        ('ctrl+2', LATENCY_KEY_TO_CALLBACK), ('ctrl+2', LATENCY_CALLBACK_TO_INJECTION), ('ctrl+2', LATENCY_INJECTION),
+    ]
+
+    stats.clear()
+    assert stats.as_dict()['shortcuts'] == {}
+    assert stats.as_dict()['overall'][LATENCY_INJECTION]['count'] == 0
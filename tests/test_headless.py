@@ -0,0 +1,259 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import pytest
+from PyQt6.QtCore import QSettings, QTimer
+from PyQt6.QtWidgets import QApplication, QMainWindow
+
+from benchmark import FakeKeyboard
+from command_server import send_command
+from diagnostics import PhaseTimer
+from engine import ShortcutEngine
+from ezText import VERSION, run_headless
+from injector import RecordingBackend
+from storage import STORAGE_JOURNAL, STORAGE_SNAPSHOT, atomic_write, parse_ini, serialize_ini
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    # Keep the library and QSettings out of the real profile
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path))
+    for settings_format in (QSettings.Format.NativeFormat, QSettings.Format.IniFormat):
+        QSettings.setPath(settings_format, QSettings.Scope.UserScope, str(tmp_path / 'settings'))
+    path = tmp_path / 'ezText' / 'ezTextShortcut.ini'
+    path.parent.mkdir()
+    path.write_text(serialize_ini({'ctrl+alt+a': 'alpha'}), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def headless(app, config_file):
+    """Build a headless engine that records the windows open during each command"""
+    server_name = f'ezText_test_{uuid.uuid4().hex[:12]}'
+    engine = ShortcutEngine(VERSION, PhaseTimer(), headless=True, hotkey_backend=FakeKeyboard(),
+                            injection_backend=RecordingBackend(), server_name=server_name)
+    windows_seen = []
+
+    handlers = engine.command_server.handlers
+    for command, handler in list(handlers.items()):
+        def counted(argument, reply, command=command, handler=handler):
+            windows = [w for w in QApplication.topLevelWidgets() if isinstance(w, QMainWindow)]
+            windows_seen.append((command, len(windows)))
+            return handler(argument, reply)
+        handlers[command] = counted
+
+    return engine, server_name, windows_seen
+
+
+
+@pytest.fixture
+def engine(app, config_file):
+    """A loaded headless engine whose file watcher settles after 50 ms"""
+    engine = ShortcutEngine(VERSION, PhaseTimer(), headless=True, hotkey_backend=FakeKeyboard(),
+                            injection_backend=RecordingBackend(),
+                            server_name=f'ezText_test_{uuid.uuid4().hex[:12]}')
+    engine.reload_timer.setInterval(50)
+    engine.load_shortcuts()
+    yield engine
+    engine.shutdown()
+
+def run_engine(app, engine, client, timeout=30.0):
+    """Run the headless event loop while a client thread sends commands"""
+    result = {}
+
+    def target():
+        try:
+            result['value'] = client()
+        except BaseException as e:
+            result['error'] = e
+            # Don't leave the event loop running on failure
+            QTimer.singleShot(0, app.quit)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    QTimer.singleShot(int(timeout * 1000), app.quit)
+    exit_code = run_headless(app, PhaseTimer(), engine=engine)
+    thread.join(timeout)
+    for widget in QApplication.topLevelWidgets():
+        widget.deleteLater()
+    if 'error' in result:
+        raise result['error']
+    assert 'value' in result, "client did not finish"
+    return exit_code, result['value']
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+
+def process_until(app, predicate, timeout=5.0):
+    """Run the event loop until predicate() holds; False on timeout"""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.005)
+    return True
+
+
+def registered(app, engine):
+    """Chord hotkeys once the background registration has finished"""
+    assert process_until(app, lambda: not engine.registration_queue.pending)
+    return sorted(engine.hotkey_registry.registered)
+
+
+def record_registrations(monkeypatch, engine):
+    calls = []
+    registry = engine.hotkey_registry
+    for name in ('register', 'unregister'):
+        def recorded(shortcut, name=name, method=getattr(registry, name)):
+            calls.append((name, shortcut))
+            return method(shortcut)
+        monkeypatch.setattr(registry, name, recorded)
+    return calls
+
+def test_commands_work_without_a_window(app, headless, config_file, tmp_path):
+    engine, server_name, windows_seen = headless
+    backend = engine.injector.backend
+    export_path = tmp_path / 'export.ini'
+
+    def client():
+        replies = {'STATS': send_command('STATS', name=server_name)}
+        # The running engine picks up external edits on RELOAD
+        config_file.write_text(serialize_ini({'ctrl+alt+a': 'ALPHA', 'ctrl+alt+b': 'beta'}), encoding='utf-8')
+        replies['RELOAD'] = send_command('RELOAD', name=server_name)
+        replies['ADD'] = send_command('ADD', json.dumps({'shortcut': 'ctrl+alt+c', 'text': 'gamma'}),
+                                      name=server_name)
+        replies['FIRE'] = send_command('FIRE', 'ctrl+alt+c', name=server_name)
+        wait_for(lambda: any('gamma' in call[1:] for call in list(backend.calls)))
+        replies['EXPORT'] = send_command('EXPORT', str(export_path), name=server_name)
+        replies['SHOW'] = send_command('SHOW', name=server_name)
+        replies['SHOWN'] = send_command('STATS', name=server_name)
+        replies['QUIT'] = send_command('QUIT', name=server_name)
+        return replies
+
+    exit_code, replies = run_engine(app, engine, client)
+
+    assert exit_code == 0
+    assert replies['RELOAD'] == {'entries': 2, 'added': 1, 'removed': 0, 'changed': 1}
+    assert replies['ADD'] == {'created': True}
+    assert 'depth' in replies['FIRE']
+    assert replies['EXPORT']['entries'] == 3
+    assert parse_ini(str(export_path))[0] == {'ctrl+alt+a': 'ALPHA', 'ctrl+alt+b': 'beta', 'ctrl+alt+c': 'gamma'}
+    assert replies['STATS']['library']['entries'] == 1
+    assert replies['SHOWN']['library']['entries'] == 3
+
+    # No window exists until SHOW attaches one
+    assert windows_seen == [('STATS', 0), ('RELOAD', 0), ('ADD', 0), ('FIRE', 0), ('EXPORT', 0),
+                            ('SHOW', 0), ('STATS', 1), ('QUIT', 1)]
+
+
+def test_quit_without_a_window(app, headless):
+    engine, server_name, windows_seen = headless
+
+    exit_code, reply = run_engine(app, engine, lambda: send_command('QUIT', name=server_name))
+
+    assert exit_code == 0
+    assert reply == {}
+    assert windows_seen == [('QUIT', 0)]
+    assert not [w for w in QApplication.topLevelWidgets() if isinstance(w, QMainWindow)]
+
+
+def test_engine_does_not_import_widgets():
+    # The headless engine must not pay for QtWidgets
+    probe = "import sys, engine; print('PyQt6.QtWidgets' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', probe], cwd=root, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
+
+
+def test_apply_library_touches_only_what_changed(app, engine, monkeypatch):
+    diffs = []
+    engine.library_diffed.connect(diffs.append)
+    engine.apply_library({'ctrl+alt+a': 'alpha', 'ctrl+alt+b': 'beta', 'ctrl+alt+c': 'gamma'}, {}, {})
+    assert registered(app, engine) == ['ctrl+alt+a', 'ctrl+alt+b', 'ctrl+alt+c']
+
+    calls = record_registrations(monkeypatch, engine)
+    diff = engine.apply_library({'ctrl+alt+a': 'ALPHA', 'ctrl+alt+c': 'gamma', 'ctrl+alt+d': 'delta'},
+                                {'ctrl+alt+a': 'paste', 'ctrl+alt+c': 'unknown'}, {})
+
+    assert (diff.added, diff.removed, diff.changed) == (['ctrl+alt+d'], ['ctrl+alt+b'], ['ctrl+alt+a'])
+    assert diffs[-1] is diff
+    assert registered(app, engine) == ['ctrl+alt+a', 'ctrl+alt+c', 'ctrl+alt+d']
+    # A changed text or engine is read when the hotkey fires; only the
+    # removed entry is unregistered and only the new one registered
+    assert calls == [('unregister', 'ctrl+alt+b'), ('register', 'ctrl+alt+d')]
+    assert dict(engine.shortcuts_dict) == {'ctrl+alt+a': 'ALPHA', 'ctrl+alt+c': 'gamma', 'ctrl+alt+d': 'delta'}
+    # Unknown engines are dropped
+    assert engine.shortcut_engines == {'ctrl+alt+a': 'paste'}
+
+
+def test_unsaved_edits_win_over_the_file(app, engine):
+    engine.put_shortcut('ctrl+alt+a', 'mine')
+    diff = engine.apply_library({'ctrl+alt+a': 'theirs', 'ctrl+alt+b': 'beta'}, {}, {})
+    assert diff.added == ['ctrl+alt+b'] and not diff.changed
+    assert engine.shortcuts_dict['ctrl+alt+a'] == 'mine'
+
+
+def test_own_autosave_does_not_trigger_a_reload(app, engine, config_file, monkeypatch):
+    reloads = []
+    start_reload = engine.start_reload
+
+    def recorded(request):
+        reloads.append(request)
+        start_reload(request)
+    monkeypatch.setattr(engine, 'start_reload', recorded)
+
+    engine.put_shortcut('ctrl+alt+b', 'beta')
+    engine.flush_autosave()
+    assert parse_ini(str(config_file))[0] == {'ctrl+alt+a': 'alpha', 'ctrl+alt+b': 'beta'}
+
+    assert not process_until(app, lambda: reloads, timeout=0.5)
+    assert engine.live_reloads == 0
+
+
+def test_external_edits_are_reloaded_through_the_watcher(app, engine, config_file):
+    assert registered(app, engine) == ['ctrl+alt+a']
+
+    # Atomic save (the file is replaced; the directory watch sees it)
+    atomic_write(str(config_file), serialize_ini({'ctrl+alt+a': 'ALPHA', 'ctrl+alt+b': 'beta'}))
+    assert process_until(app, lambda: engine.live_reloads == 1)
+    assert registered(app, engine) == ['ctrl+alt+a', 'ctrl+alt+b']
+    assert engine.shortcuts_dict['ctrl+alt+a'] == 'ALPHA'
+
+    # In-place save
+    config_file.write_text(serialize_ini({'ctrl+alt+b': 'beta', 'ctrl+alt+c': 'gamma'}), encoding='utf-8')
+    assert process_until(app, lambda: engine.live_reloads == 2)
+    assert registered(app, engine) == ['ctrl+alt+b', 'ctrl+alt+c']
+    assert dict(engine.shortcuts_dict) == {'ctrl+alt+b': 'beta', 'ctrl+alt+c': 'gamma'}
+
+
+def test_reload_replays_and_folds_a_leftover_journal(app, engine, config_file):
+    engine.storage_mode = STORAGE_JOURNAL
+    engine.put_shortcut('ctrl+alt+b', 'beta')
+    engine.flush_autosave()
+    assert parse_ini(str(config_file))[0] == {'ctrl+alt+a': 'alpha'}
+
+    # Journal left over from journal mode
+    engine.storage_mode = STORAGE_SNAPSHOT
+    diffs = []
+    engine.reload_shortcuts(done=lambda diff, error: diffs.append((diff, error)))
+    assert process_until(app, lambda: diffs)
+
+    diff, error = diffs[0]
+    assert error is None and not diff
+    assert parse_ini(str(config_file))[0] == {'ctrl+alt+a': 'alpha', 'ctrl+alt+b': 'beta'}
+    assert not engine.open_journal().exists()
+    # Writing the folded file is not taken for an external change
+    assert not process_until(app, lambda: engine.live_reloads, timeout=0.5)
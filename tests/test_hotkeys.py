@@ -0,0 +1,491 @@
+import threading
+import time
+
+from hotkeys import (AbbreviationMatcher, ChordDispatcher, HookWatchdog, HotkeyRegistry, RegistrationQueue,
+                     SequenceHotkey, UsageStats)
+
+
+class FakeKeyboard:
+    """Backend that records registrations instead of hooking the keyboard"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.parsed = []
+        self.added = []
+        self.removed = []
+        self.sent = []
+        self.hooks = []
+        self.alive = True
+        self._next = 0
+
+    def parse_hotkey(self, shortcut):
+        self.parsed.append(shortcut)
+        return ('parsed', shortcut)
+
+    def add_hotkey(self, parsed, callback):
+        if parsed[1] in self.failing:
+            raise ValueError(f"can't register {parsed[1]}")
+        self._next += 1
+        self.added.append(parsed[1])
+        return (self._next, parsed[1])
+
+    def remove_hotkey(self, handle):
+        self.removed.append(handle[1])
+
+    def hook(self, callback):
+        self.hooks.append(callback)
+        return callback
+
+    def unhook(self, callback):
+        self.hooks.remove(callback)
+
+    def send(self, key):
+        # A live hook sees the probe key
+        self.sent.append(key)
+        if self.alive:
+            for callback in self.hooks:
+                callback(key)
+
+
+def make_registry(failing=(), retry_base=0.0):
+    backend = FakeKeyboard(failing)
+    return HotkeyRegistry(lambda shortcut: shortcut, backend, retry_base=retry_base), backend
+
+
+def test_refresh_applies_only_the_difference():
+    registry, backend = make_registry()
+    stats = registry.refresh(['ctrl+1', 'ctrl+2', 'ctrl+3'])
+    assert (stats.added, stats.removed, stats.touched) == (3, 0, 3)
+
+    stats = registry.refresh(['ctrl+1', 'ctrl+3', 'ctrl+4'])
+    assert (stats.added, stats.removed, stats.touched) == (1, 1, 2)
+    assert sorted(registry.registered) == ['ctrl+1', 'ctrl+3', 'ctrl+4']
+    assert sorted(backend.added) == ['ctrl+1', 'ctrl+2', 'ctrl+3', 'ctrl+4']
+    assert backend.removed == ['ctrl+2']
+
+
+def test_unchanged_refresh_touches_nothing():
+    registry, backend = make_registry()
+    registry.refresh(['ctrl+1', 'ctrl+2'])
+    stats = registry.refresh(['ctrl+2', 'ctrl+1'])
+    assert stats.touched == 0
+    assert len(backend.added) == 2
+    assert registry.refresh_count == 2
+    assert registry.last_refresh is stats
+
+
+def test_parsed_hotkeys_are_cached_until_removed():
+    registry, backend = make_registry()
+    registry.refresh(['ctrl+1'])
+    registry.mark_broken('ctrl+1')
+    registry.refresh(['ctrl+1'])
+    assert backend.parsed == ['ctrl+1']
+
+    registry.refresh([])
+    registry.refresh(['ctrl+1'])
+    assert backend.parsed == ['ctrl+1', 'ctrl+1']
+
+
+def test_broken_hotkeys_are_re_registered():
+    registry, backend = make_registry()
+    registry.refresh(['ctrl+1', 'ctrl+2'])
+    registry.mark_broken('ctrl+2')
+    stats = registry.refresh(['ctrl+1', 'ctrl+2'])
+    assert (stats.repaired, stats.added, stats.removed) == (1, 0, 0)
+    assert backend.removed == ['ctrl+2']
+    assert not registry.broken
+
+
+def test_failed_registration_is_reported_and_retried():
+    registry, backend = make_registry(failing={'ctrl+2'})
+    stats = registry.refresh(['ctrl+1', 'ctrl+2'])
+    assert (stats.added, stats.failed) == (1, 1)
+    assert 'ctrl+2' not in registry
+    assert registry.broken == {'ctrl+2'}
+
+    backend.failing.clear()
+    stats = registry.refresh(['ctrl+1', 'ctrl+2'])
+    assert (stats.repaired, stats.failed) == (1, 0)
+    assert 'ctrl+2' in registry
+    assert not registry.pending_retries
+
+
+def test_failed_registration_backs_off_exponentially(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('hotkeys.time.monotonic', lambda: clock[0])
+    registry, backend = make_registry(failing={'ctrl+2'}, retry_base=2.0)
+
+    registry.refresh(['ctrl+2'])
+    assert registry.registration_failures == 1
+    # Not due yet: nothing is attempted
+    clock[0] += 1.9
+    assert registry.refresh(['ctrl+2']).failed == 0
+    assert registry.registration_failures == 1
+
+    clock[0] += 0.1
+    assert registry.refresh(['ctrl+2']).failed == 1
+    assert registry.registration_failures == 2
+    # The second failure waits twice as long
+    clock[0] += 3.9
+    assert registry.refresh(['ctrl+2']).failed == 0
+    clock[0] += 0.1
+    assert registry.refresh(['ctrl+2']).failed == 1
+    assert registry.pending_retries == ['ctrl+2']
+
+
+def test_retry_delay_is_capped():
+    registry, backend = make_registry(failing={'ctrl+2'}, retry_base=2.0)
+    registry.retry_max = 5.0
+    for _ in range(10):
+        registry._schedule_retry('ctrl+2')
+    attempts, due = registry._retries['ctrl+2']
+    assert attempts == 10
+    assert due - time.monotonic() <= 5.0
+
+
+def test_broken_shortcut_that_is_no_longer_wanted_is_forgotten():
+    registry, backend = make_registry(failing={'ctrl+2'})
+    registry.refresh(['ctrl+2'])
+    stats = registry.refresh([])
+    assert stats.touched == 0
+    assert not registry.broken
+
+
+def make_watchdog(shortcuts=('ctrl+1',)):
+    registry, backend = make_registry()
+    registry.refresh(shortcuts)
+    watchdog = HookWatchdog(registry, check_interval=10.0)
+    watchdog.install()
+    return watchdog, registry, backend
+
+
+def test_watchdog_skips_the_probe_while_events_arrive():
+    watchdog, registry, backend = make_watchdog()
+    start = watchdog._last_check
+    backend.hooks[0]('a')
+    assert not watchdog.check(start + 5)   # not due yet
+    assert not watchdog.check(start + 10)  # events seen since the last check
+    assert backend.sent == []
+
+
+def test_watchdog_probes_an_idle_hook_and_keeps_a_live_one():
+    watchdog, registry, backend = make_watchdog()
+    assert watchdog.check(watchdog._last_check + 10)
+    assert backend.sent == ['f24']
+    assert watchdog.probing
+    assert watchdog.finish_probe()
+    assert (watchdog.hook_failures, watchdog.rearm_count) == (0, 0)
+
+
+def test_watchdog_rearms_only_a_dead_hook():
+    watchdog, registry, backend = make_watchdog(['ctrl+1', 'ctrl+2'])
+    backend.alive = False
+    assert watchdog.check(watchdog._last_check + 10)
+    assert not watchdog.finish_probe()
+    assert watchdog.hook_failures == 1
+
+    stats = watchdog.rearm(['ctrl+1', 'ctrl+2'])
+    assert stats.added == 2
+    assert sorted(backend.removed) == ['ctrl+1', 'ctrl+2']
+    assert watchdog.rearm_count == 1
+    # The heartbeat hook was replaced, not duplicated
+    assert len(backend.hooks) == 1
+
+
+class KeyEvent:
+    def __init__(self, event_type, scan_code, name):
+        self.event_type = event_type
+        self.scan_code = scan_code
+        self.name = name
+        self.time = 0.0
+
+
+class GermanKeyboard:
+    """Backend whose key events carry German key names"""
+
+    scan_codes = {
+        'ctrl': (29, 97), 'shift': (42, 54), 'alt': (56,), 'alt gr': (100,),
+        'windows': (125, 126), 'a': (30,), 'b': (48,),
+    }
+    event_names = {29: 'strg', 97: 'strg-rechts', 42: 'umschalt', 54: 'umschalt',
+                   56: 'alt', 100: 'alt gr', 125: 'windows', 126: 'windows',
+                   30: 'a', 48: 'b'}
+
+    def __init__(self):
+        self.sequences = {}
+
+    def key_to_scan_codes(self, key):
+        try:
+            return self.scan_codes[key]
+        except KeyError:
+            raise ValueError(key)
+
+    def hook(self, callback):
+        return callback
+
+    def unhook(self, callback):
+        pass
+
+    def send(self, hotkey):
+        pass
+
+    def add_hotkey(self, hotkey, callback):
+        self.sequences[hotkey] = callback
+        return hotkey
+
+    def remove_hotkey(self, handle):
+        del self.sequences[handle]
+
+
+def press(dispatcher, backend, *scan_codes):
+    for code in scan_codes:
+        dispatcher.dispatch(KeyEvent('down', code, backend.event_names[code]))
+    for code in reversed(scan_codes):
+        dispatcher.dispatch(KeyEvent('up', code, backend.event_names[code]))
+
+
+def make_dispatcher():
+    backend = GermanKeyboard()
+    dispatcher = ChordDispatcher(backend)
+    fired = []
+    dispatcher.add_hotkey(dispatcher.parse_hotkey('ctrl+a'), lambda event_time: fired.append('ctrl+a'))
+    dispatcher.add_hotkey(dispatcher.parse_hotkey('ctrl+shift+b'), lambda event_time: fired.append('ctrl+shift+b'))
+    return dispatcher, backend, fired
+
+
+def test_localized_modifier_names_are_recognized():
+    dispatcher, backend, fired = make_dispatcher()
+    press(dispatcher, backend, 29, 30)
+    press(dispatcher, backend, 97, 42, 48)
+    assert fired == ['ctrl+a', 'ctrl+shift+b']
+
+
+def test_modifier_released_clears_mask():
+    dispatcher, backend, fired = make_dispatcher()
+    press(dispatcher, backend, 29)
+    press(dispatcher, backend, 30)
+    assert fired == []
+
+
+def test_unresolvable_modifier_names_are_skipped():
+    backend = GermanKeyboard()
+    backend.scan_codes = dict(backend.scan_codes)
+    del backend.scan_codes['alt gr']
+    dispatcher = ChordDispatcher(backend)
+    fired = []
+    dispatcher.add_hotkey(dispatcher.parse_hotkey('ctrl+a'), lambda event_time: fired.append('ctrl+a'))
+    press(dispatcher, backend, 29, 30)
+    assert fired == ['ctrl+a']
+
+
+def test_callbacks_receive_the_key_event_time():
+    backend = GermanKeyboard()
+    backend.scan_codes = {**backend.scan_codes, ';': (39,), 's': (31,)}
+    dispatcher = ChordDispatcher(backend)
+    fired = []
+    dispatcher.add_hotkey(dispatcher.parse_hotkey('ctrl+a'), fired.append)
+    dispatcher.on_abbreviation = lambda abbreviation, event_time: fired.append((abbreviation, event_time))
+    dispatcher.abbreviations.add(';s')
+    dispatcher.abbreviations.publish()
+
+    for event_type, code, name, time_ in (('down', 29, 'strg', 1.0), ('down', 30, 'a', 2.0),
+                                          ('up', 30, 'a', 2.1), ('up', 29, 'strg', 2.2),
+                                          ('down', 39, ';', 3.0), ('down', 31, 's', 4.0)):
+        event = KeyEvent(event_type, code, name)
+        event.time = time_
+        dispatcher.dispatch(event)
+    assert fired == [2.0, (';s', 4.0)]
+
+
+def test_sequence_hotkeys_are_left_to_the_backend():
+    backend = GermanKeyboard()
+    dispatcher = ChordDispatcher(backend)
+    fired = []
+    for hotkey in ('ctrl+k, ctrl+c', 'a+b'):
+        parsed = dispatcher.parse_hotkey(hotkey)
+        assert isinstance(parsed, SequenceHotkey)
+        handle = dispatcher.add_hotkey(parsed, lambda event_time=None, hotkey=hotkey: fired.append(hotkey))
+    assert len(dispatcher) == 0
+    backend.sequences['ctrl+k, ctrl+c']()
+    assert fired == ['ctrl+k, ctrl+c']
+
+    dispatcher.remove_hotkey(handle)
+    assert list(backend.sequences) == ['ctrl+k, ctrl+c']
+
+
+def test_comma_hotkey_registers_without_retries():
+    backend = GermanKeyboard()
+    registry = HotkeyRegistry(lambda shortcut: shortcut, ChordDispatcher(backend))
+    stats = registry.refresh(['ctrl+a', 'ctrl+a, b'])
+    assert (stats.added, stats.failed) == (2, 0)
+    assert registry.registration_failures == 0
+    assert not registry.pending_retries
+    assert sorted(backend.sequences) == ['ctrl+a, b']
+
+
+def feed_text(matcher, text):
+    return [match for match in map(matcher.feed, text) if match is not None]
+
+
+def test_matcher_finds_overlapping_abbreviations():
+    matcher = AbbreviationMatcher()
+    for abbreviation in (';sig', 'sig', 'dr'):
+        matcher.add(abbreviation)
+    matcher.publish()
+    assert feed_text(matcher, 'x;sig sig ;addr') == [';sig', 'sig', 'dr']
+
+
+def test_matcher_edits_apply_only_after_publish():
+    matcher = AbbreviationMatcher()
+    matcher.add(';a')
+    assert ';a' in matcher and matcher.pending
+    assert not matcher.active
+    assert feed_text(matcher, ';a') == []
+
+    matcher.publish()
+    assert matcher.active and not matcher.pending
+    assert feed_text(matcher, ';a') == [';a']
+
+    matcher.remove(';a')
+    assert feed_text(matcher, ';a') == [';a']
+    matcher.publish()
+    assert feed_text(matcher, ';a') == []
+    assert not matcher.active
+
+
+def test_matcher_restarts_on_a_new_automaton():
+    matcher = AbbreviationMatcher()
+    matcher.add(';abc')
+    matcher.publish()
+    feed_text(matcher, ';ab')
+    matcher.add(';x')
+    matcher.publish()
+    # The partial match belonged to the old automaton
+    assert matcher.feed('c') is None
+    assert feed_text(matcher, ';abc;x') == [';abc', ';x']
+
+
+def test_matcher_feed_during_concurrent_publish():
+    matcher = AbbreviationMatcher()
+    matcher.add(';stable')
+    matcher.publish()
+    stop = threading.Event()
+    errors = []
+    found = []
+
+    def typist():
+        try:
+            while not stop.is_set():
+                found.extend(feed_text(matcher, 'x;stable '))
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=typist)
+    thread.start()
+    try:
+        for i in range(300):
+            matcher.add(f';tmp{i}')
+            matcher.publish()
+            matcher.remove(f';tmp{i - 1}')
+            matcher.publish()
+    finally:
+        stop.set()
+        thread.join()
+
+    assert errors == []
+    assert found and set(found) == {';stable'}
+
+
+def test_dispatcher_expands_typed_abbreviation():
+    backend = GermanKeyboard()
+    backend.scan_codes = {**backend.scan_codes, ';': (39,), 's': (31,)}
+    backend.event_names = {**backend.event_names, 39: ';', 31: 's'}
+    dispatcher = ChordDispatcher(backend)
+    typed = []
+    dispatcher.on_abbreviation = lambda abbreviation, event_time: typed.append(abbreviation)
+    dispatcher.abbreviations.add(';s')
+    press(dispatcher, backend, 39)
+    press(dispatcher, backend, 31)
+    assert typed == []
+
+    dispatcher.abbreviations.publish()
+    press(dispatcher, backend, 39)
+    press(dispatcher, backend, 31)
+    assert typed == [';s']
+
+
+def test_queue_registers_most_used_first_in_batches():
+    registered = []
+    queue = RegistrationQueue(registered.append, batch_size=2)
+    queue.start(['a', 'b', 'c', 'd'], priority={'c': 5, 'd': 1})
+    assert queue.run_batch()
+    assert registered == ['c', 'd']
+    assert (queue.done, queue.total, queue.pending) == (2, 4, 2)
+    assert not queue.run_batch()
+    # Equally weighted shortcuts keep their order
+    assert registered == ['c', 'd', 'a', 'b']
+
+
+def test_queue_cancel_drops_pending_shortcuts():
+    registered = []
+    queue = RegistrationQueue(registered.append, batch_size=1)
+    queue.start(['a', 'b', 'c'])
+    queue.run_batch()
+    queue.cancel()
+    assert not queue.run_batch()
+    assert registered == ['a']
+    assert (queue.done, queue.total) == (1, 1)
+
+
+def test_queue_extend_skips_queued_shortcuts():
+    registered = []
+    queue = RegistrationQueue(registered.append, batch_size=1)
+    queue.start(['a', 'b'])
+    queue.extend(['b', 'c', 'c'])
+    assert queue.pending == 3
+    queue.run_batch()
+    queue.extend(['a'])  # already registered, so it may be queued again
+    while queue.run_batch():
+        pass
+    assert registered == ['a', 'b', 'c', 'a']
+
+
+def test_refresh_defers_missing_and_retried_shortcuts():
+    registry, backend = make_registry(failing=['ctrl+2'])
+    registry.refresh(['ctrl+1', 'ctrl+2', 'ctrl+3'])
+    assert registry.pending_retries == ['ctrl+2']
+
+    backend.failing.clear()
+    backend.added.clear()
+    queue = RegistrationQueue(registry.register)
+    stats = registry.refresh(['ctrl+2', 'ctrl+3', 'ctrl+4'], defer=queue.extend)
+
+    # Removal is immediate, registration waits for the queue
+    assert 'ctrl+1' not in registry
+    assert (stats.removed, stats.deferred) == (1, 2)
+    assert backend.added == []
+    assert queue.pending == 2
+
+    # A second refresh before the queue ran does not queue them twice
+    registry.refresh(['ctrl+2', 'ctrl+3', 'ctrl+4'], defer=queue.extend)
+    assert queue.pending == 2
+
+    while queue.run_batch():
+        pass
+    assert sorted(backend.added) == ['ctrl+2', 'ctrl+4']
+    assert sorted(registry.registered) == ['ctrl+2', 'ctrl+3', 'ctrl+4']
+    assert registry.pending_retries == []
+
+
+def test_usage_counts_persist_only_when_changed(tmp_path):
+    path = str(tmp_path / 'usage.json')
+    stats = UsageStats(path)
+    stats.record('ctrl+1')
+    stats.record('ctrl+1')
+    stats.rename('ctrl+1', 'ctrl+alt+1')
+    stats.save()
+    assert UsageStats(path).counts == {'ctrl+alt+1': 2}
+
+    (tmp_path / 'usage.json').write_text('{}', encoding='utf-8')
+    stats.save()  # Nothing recorded since the last save
+    assert UsageStats(path).counts == {}
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from injector import (MODE_PASTE, MODE_TYPE, POLICY_DROP, POLICY_QUEUE, POLICY_REPLACE, InjectionWorker,
+                      RecordingBackend, TextInjector)
+
+
+def make_injector(**kwargs):
+    backend = RecordingBackend()
+    return TextInjector(backend, restore_delay=0, **kwargs), backend
+
+
+def test_auto_mode_switches_to_paste_at_threshold():
+    injector, backend = make_injector(paste_threshold=10)
+    assert injector.engine_for('x' * 9).name == MODE_TYPE
+    assert injector.engine_for('x' * 10).name == MODE_PASTE
+
+
+def test_per_snippet_mode_overrides_global_mode():
+    injector, backend = make_injector(mode=MODE_TYPE, paste_threshold=10)
+    assert injector.engine_for('x' * 50).name == MODE_TYPE
+    assert injector.engine_for('short', MODE_PASTE).name == MODE_PASTE
+    # Unknown overrides follow the global mode
+    assert injector.engine_for('x' * 50, 'telepathy').name == MODE_TYPE
+
+
+def test_unknown_global_mode_falls_back_to_auto():
+    injector, backend = make_injector(mode='telepathy', paste_threshold=10)
+    assert injector.engine_for('x' * 10).name == MODE_PASTE
+
+
+def test_type_injection_writes_the_text():
+    injector, backend = make_injector(mode=MODE_TYPE)
+    injector.inject('hello')
+    assert backend.calls == [('write', 'hello')]
+    assert backend.key_events == 5
+
+
+def test_paste_injection_restores_the_clipboard():
+    injector, backend = make_injector(mode=MODE_PASTE)
+    backend.clipboard = 'previous'
+    injector.inject('snippet')
+    assert backend.calls == [('get_clipboard',), ('set_clipboard', 'snippet'), ('send', 'ctrl+v'),
+                             ('set_clipboard', 'previous')]
+    assert backend.clipboard == 'previous'
+    assert backend.key_events == 1
+
+
+def test_abbreviation_is_erased_before_injecting():
+    injector, backend = make_injector(mode=MODE_TYPE)
+    injector.inject('Kind regards', erase=4)
+    assert backend.calls == [('send', 'backspace')] * 4 + [('write', 'Kind regards')]
+
+
+def test_paste_injection_restores_the_clipboard_when_sending_fails():
+    injector, backend = make_injector(mode=MODE_PASTE)
+    backend.clipboard = 'previous'
+
+    def fail(hotkey):
+        raise OSError('no keyboard')
+    backend.send = fail
+
+    with pytest.raises(OSError):
+        injector.inject('snippet')
+    assert backend.clipboard == 'previous'
+
+
+class GatedInjector:
+    """Injector whose jobs block until released"""
+
+    def __init__(self):
+        self.injected = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def inject(self, text, mode=None, erase=0):
+        self.started.set()
+        self.release.wait(5)
+        if text == 'boom':
+            raise OSError('injection failed')
+        self.injected.append((text, mode))
+
+
+def pending(worker):
+    return [job.text for job in worker._jobs]
+
+
+def test_queue_policy_is_bounded():
+    worker = InjectionWorker(GatedInjector(), max_pending=2, policy=POLICY_QUEUE)
+    assert [worker.submit(text) for text in 'abc'] == [True, True, False]
+    assert pending(worker) == ['a', 'b']
+    assert worker.dropped == 1
+
+
+def test_drop_policy_ignores_fires_while_busy():
+    worker = InjectionWorker(GatedInjector(), policy=POLICY_DROP)
+    assert [worker.submit(text) for text in 'abc'] == [True, False, False]
+    assert pending(worker) == ['a']
+    assert worker.dropped == 2
+
+
+def test_replace_policy_keeps_the_latest_fire():
+    worker = InjectionWorker(GatedInjector(), policy=POLICY_REPLACE)
+    assert [worker.submit(text) for text in 'abc'] == [True, True, True]
+    assert pending(worker) == ['c']
+    assert worker.dropped == 2
+
+
+def test_worker_runs_jobs_in_order_and_reports_depth():
+    injector = GatedInjector()
+    depths = []
+    worker = InjectionWorker(injector, on_depth_changed=depths.append)
+    worker.start()
+    try:
+        worker.submit('one', MODE_PASTE, 'ctrl+1')
+        assert injector.started.wait(5)
+        # The running job counts towards the depth
+        worker.submit('boom')
+        worker.submit('two')
+        assert worker.depth == 3
+        injector.release.set()
+        deadline = time.monotonic() + 5
+        while worker.depth and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+
+    assert injector.injected == [('one', MODE_PASTE), ('two', None)]
+    assert (worker.completed, worker.failed) == (2, 1)
+    assert depths[:3] == [1, 2, 3]
+    assert depths[-1] == 0
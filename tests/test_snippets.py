@@ -0,0 +1,37 @@
+from snippets import SnippetStore
+
+
+def is_compressed(store, shortcut):
+    return isinstance(store._values[shortcut], bytes)
+
+
+def test_threshold_counts_utf8_bytes():
+    store = SnippetStore(compress_threshold=512)
+    # 200 characters, 600 bytes of UTF-8
+    store['ctrl+1'] = '日本語' * 67
+    # 500 characters, 500 bytes
+    store['ctrl+2'] = 'a' * 500
+    assert is_compressed(store, 'ctrl+1')
+    assert not is_compressed(store, 'ctrl+2')
+    assert store['ctrl+1'] == '日本語' * 67
+
+
+def test_compressed_size_is_compared_with_utf8_size():
+    store = SnippetStore(compress_threshold=16)
+    # 40 characters, 120 bytes of UTF-8, 119 bytes compressed
+    text = ''.join(chr(0x4e00 + (i * 7919) % 20000) for i in range(40))
+    store['ctrl+1'] = text
+    assert is_compressed(store, 'ctrl+1')
+    assert store['ctrl+1'] == text
+
+    # Incompressible: zlib output is longer than the text
+    store['ctrl+2'] = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    assert not is_compressed(store, 'ctrl+2')
+
+
+def test_equal_texts_share_one_blob():
+    store = SnippetStore(compress_threshold=64)
+    store['ctrl+1'] = 'x' * 1000
+    store['ctrl+2'] = 'x' * 1000
+    assert store._values['ctrl+1'] is store._values['ctrl+2']
+    assert store.memory_report()['unique'] == 1
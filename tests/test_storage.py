@@ -0,0 +1,298 @@
+import os
+import threading
+
+import pytest
+
+from storage import (AutosaveWriter, ShortcutJournal, SnapshotCache, atomic_write, diff_library, parse_ini,
+                     serialize_ini, stat_key)
+
+
+@pytest.fixture
+def writer():
+    writer = AutosaveWriter()
+    yield writer
+    writer.stop()
+
+
+def test_atomic_write_replaces_the_file_and_leaves_no_temp_files(tmp_path):
+    path = tmp_path / 'library.ini'
+    atomic_write(str(path), 'old')
+    atomic_write(str(path), 'new ü')
+    assert path.read_text(encoding='utf-8') == 'new ü'
+    assert os.listdir(tmp_path) == ['library.ini']
+
+
+def test_atomic_write_keeps_the_original_on_failure(tmp_path, monkeypatch):
+    path = tmp_path / 'library.ini'
+    atomic_write(str(path), 'original')
+
+    def fail(source, target):
+        raise OSError('disk full')
+    monkeypatch.setattr('storage.os.replace', fail)
+
+    with pytest.raises(OSError):
+        atomic_write(str(path), 'replacement')
+    assert path.read_text() == 'original'
+    assert os.listdir(tmp_path) == ['library.ini']
+
+
+def test_unchanged_content_is_not_rewritten(writer, tmp_path):
+    path = str(tmp_path / 'library.ini')
+    for _ in range(3):
+        writer.submit(path, {'ctrl+1': 'one'})
+        assert writer.flush()
+    assert (writer.writes, writer.skipped) == (1, 2)
+
+    writer.submit(path, {'ctrl+1': 'two'})
+    writer.flush()
+    assert writer.writes == 2
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == serialize_ini({'ctrl+1': 'two'})
+
+
+def test_deleted_or_forgotten_file_is_written_again(writer, tmp_path):
+    path = str(tmp_path / 'library.ini')
+    writer.submit(path, {'ctrl+1': 'one'})
+    writer.flush()
+
+    os.remove(path)
+    writer.submit(path, {'ctrl+1': 'one'})
+    writer.flush()
+    assert os.path.exists(path)
+
+    writer.forget(path)
+    writer.submit(path, {'ctrl+1': 'one'})
+    writer.flush()
+    assert (writer.writes, writer.skipped) == (3, 0)
+
+
+
+def test_written_stat_tells_own_saves_from_external_ones(writer, tmp_path):
+    path = str(tmp_path / 'library.ini')
+    assert writer.written_stat(path) is None
+    writer.submit(path, {'ctrl+1': 'one'})
+    writer.flush()
+    assert writer.written_stat(path) == stat_key(path)
+
+    # Another program saves different content
+    atomic_write(path, serialize_ini({'ctrl+1': 'one', 'ctrl+2': 'two'}))
+    assert writer.written_stat(path) != stat_key(path)
+    assert stat_key(str(tmp_path / 'missing.ini')) is None
+
+def test_snapshots_submitted_during_a_write_are_coalesced(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+    serialized = []
+
+    def serialize(shortcuts):
+        serialized.append(dict(shortcuts))
+        started.set()
+        release.wait(5)
+        return serialize_ini(shortcuts)
+
+    writer = AutosaveWriter(serialize)
+    path = str(tmp_path / 'library.ini')
+    try:
+        writer.submit(path, {'ctrl+1': 'first'})
+        assert started.wait(5)
+        for i in range(10):
+            writer.submit(path, {'ctrl+1': f'edit {i}'})
+        release.set()
+        assert writer.flush()
+    finally:
+        writer.stop()
+
+    # Only the newest of the queued snapshots is written
+    assert serialized == [{'ctrl+1': 'first'}, {'ctrl+1': 'edit 9'}]
+    assert writer.writes == 2
+
+
+def test_after_callbacks_of_replaced_snapshots_still_run(tmp_path):
+    release = threading.Event()
+
+    def serialize(shortcuts):
+        release.wait(5)
+        return serialize_ini(shortcuts)
+
+    writer = AutosaveWriter(serialize)
+    path = str(tmp_path / 'library.ini')
+    done = []
+    try:
+        writer.submit(path, {'ctrl+1': 'first'}, after=lambda: done.append('first'))
+        writer.submit(path, {'ctrl+1': 'second'}, after=lambda: done.append('second'))
+        writer.submit(path, {'ctrl+1': 'third'}, after=lambda: done.append('third'))
+        release.set()
+        writer.flush()
+    finally:
+        writer.stop()
+    assert sorted(done) == ['first', 'second', 'third']
+
+
+def test_failed_write_is_reported(tmp_path):
+    errors = []
+    writer = AutosaveWriter(on_error=lambda path, message: errors.append(path))
+    path = str(tmp_path / 'missing' / 'library.ini')
+    try:
+        writer.submit(path, {'ctrl+1': 'one'})
+        writer.flush()
+    finally:
+        writer.stop()
+    assert errors == [path]
+    assert writer.writes == 0
+
+
+def replay(journal):
+    shortcuts, engines, triggers = {'ctrl+1': 'one', 'ctrl+2': 'two'}, {'ctrl+2': 'paste'}, {}
+    applied = journal.replay(shortcuts, engines, triggers)
+    return applied, shortcuts, engines, triggers
+
+
+def test_journal_replays_records_on_top_of_the_snapshot(tmp_path):
+    journal = ShortcutJournal(str(tmp_path / 'library.ini'))
+    journal.record_set('ctrl+3', 'three', engine='type')
+    journal.record_set(';sig', 'Kind regards', trigger='abbreviation')
+    journal.record_set('ctrl+2', 'TWO')
+    journal.record_delete('ctrl+1')
+    journal.close()
+
+    applied, shortcuts, engines, triggers = replay(ShortcutJournal(journal.config_file))
+    assert applied == 4
+    assert shortcuts == {'ctrl+2': 'TWO', 'ctrl+3': 'three', ';sig': 'Kind regards'}
+    # An edit replaces the engine override of the old entry
+    assert engines == {'ctrl+3': 'type'}
+    assert triggers == {';sig': 'abbreviation'}
+
+
+def test_journal_clear_record(tmp_path):
+    journal = ShortcutJournal(str(tmp_path / 'library.ini'))
+    journal.record_clear()
+    journal.record_set('ctrl+9', 'nine')
+    journal.close()
+    assert replay(journal)[1:] == ({'ctrl+9': 'nine'}, {}, {})
+
+
+def test_journal_ignores_a_truncated_last_record(tmp_path):
+    journal = ShortcutJournal(str(tmp_path / 'library.ini'))
+    journal.record_set('ctrl+3', 'three')
+    journal.close()
+    with open(journal.path, 'ab') as f:
+        f.write(b'{"op":"set","shortcut":"ctrl+4","te')
+
+    journal = ShortcutJournal(journal.config_file)
+    assert replay(journal)[0] == 1
+    # The next append starts on a fresh line
+    journal.record_delete('ctrl+3')
+    journal.close()
+    applied, shortcuts, _, _ = replay(journal)
+    assert applied == 2
+    assert 'ctrl+3' not in shortcuts
+
+
+def test_journal_rotation_and_compaction(tmp_path):
+    journal = ShortcutJournal(str(tmp_path / 'library.ini'), compact_threshold=64)
+    assert not journal.exists()
+    journal.record_set('ctrl+3', 'three')
+    journal.record_set('ctrl+4', 'four')
+    assert journal.needs_compaction
+
+    journal.rotate()
+    assert journal.size == 0
+    assert not journal.needs_compaction
+    # Records written while the snapshot is saved land in the fresh journal
+    journal.record_delete('ctrl+4')
+    assert replay(journal)[1] == {'ctrl+1': 'one', 'ctrl+2': 'two', 'ctrl+3': 'three'}
+
+    journal.finish_compaction()
+    assert not os.path.exists(journal.rotated_path)
+    assert replay(journal)[0] == 1
+
+    journal.reset()
+    assert not journal.exists()
+    assert journal.size == 0
+
+
+def write_library(path, shortcuts, engines=None, triggers=None):
+    atomic_write(path, serialize_ini(shortcuts, engines, triggers))
+
+
+def test_snapshot_cache_hit_returns_parsed_library(tmp_path):
+    source = str(tmp_path / 'library.ini')
+    write_library(source, {'ctrl+1': 'one', ';sig': 'Kind regards'}, {'ctrl+1': 'paste'},
+                  {';sig': 'abbreviation'})
+    cache = SnapshotCache(str(tmp_path / 'cache'))
+
+    parsed = cache.load(source)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.load(source) == parsed == parse_ini(source)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_snapshot_cache_keeps_long_engine_and_trigger_names(tmp_path):
+    source = str(tmp_path / 'library.ini')
+    engine = 'e' * 300
+    trigger = 'ü' * 200  # 400 bytes of UTF-8
+    write_library(source, {'ctrl+1': 'one'}, {'ctrl+1': engine}, {'ctrl+1': trigger})
+    cache = SnapshotCache(str(tmp_path / 'cache'))
+
+    cache.load(source)
+    shortcuts, engines, triggers = cache.load(source)
+    assert cache.hits == 1
+    assert engines == {'ctrl+1': engine}
+    assert triggers == {'ctrl+1': trigger}
+
+
+def test_snapshot_cache_detects_same_size_edit(tmp_path):
+    source = str(tmp_path / 'library.ini')
+    write_library(source, {'ctrl+1': 'aaaa'})
+    cache = SnapshotCache(str(tmp_path / 'cache'))
+    cache.load(source)
+
+    stat = os.stat(source)
+    write_library(source, {'ctrl+1': 'bbbb'})
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.path.getsize(source) == stat.st_size
+
+    assert cache.load(source)[0] == {'ctrl+1': 'bbbb'}
+    assert cache.misses == 2
+
+
+def test_snapshot_cache_describes_the_bytes_it_parsed(tmp_path, monkeypatch):
+    source = str(tmp_path / 'library.ini')
+    write_library(source, {'ctrl+1': 'old'})
+    cache = SnapshotCache(str(tmp_path / 'cache'))
+
+    # The file is replaced right after it was read, before the cache is written
+    real_store = cache.store
+
+    def store_after_replace(*args):
+        write_library(source, {'ctrl+1': 'new'})
+        real_store(*args)
+
+    monkeypatch.setattr(cache, 'store', store_after_replace)
+    assert cache.load(source)[0] == {'ctrl+1': 'old'}
+    monkeypatch.undo()
+
+    # The cache entry belongs to the old bytes, so it must not be served
+    assert cache.load(source)[0] == {'ctrl+1': 'new'}
+
+
+def test_snapshot_cache_missing_source_is_empty(tmp_path):
+    cache = SnapshotCache(str(tmp_path / 'cache'))
+    assert cache.load(str(tmp_path / 'missing.ini')) == ({}, {}, {})
+
+
+def test_diff_library_reports_added_removed_and_changed_entries():
+    current = ({'ctrl+1': 'one', 'ctrl+2': 'two', 'ctrl+3': 'three', 'ctrl+4': 'four', 'ctrl+5': 'five'},
+               {'ctrl+3': 'paste'}, {'ctrl+4': 'abbreviation'})
+    target = ({'ctrl+6': 'six', 'ctrl+5': 'FIVE', 'ctrl+4': 'four', 'ctrl+3': 'three', 'ctrl+1': 'one'},
+              {}, {})
+    diff = diff_library(current, target)
+    assert diff.added == ['ctrl+6']
+    assert diff.removed == ['ctrl+2']
+    # Text, engine and trigger changes, in target order
+    assert diff.changed == ['ctrl+5', 'ctrl+4', 'ctrl+3']
+    assert diff
+
+    diff.exclude({'ctrl+6', 'ctrl+2', 'ctrl+4'})
+    assert (diff.added, diff.removed, diff.changed) == ([], [], ['ctrl+5', 'ctrl+3'])
+    assert not diff_library(target, target)
@@ -0,0 +1,178 @@
+from PyQt6.QtCore import Qt
+
+from table_model import COLUMN_CHECK, COLUMN_SHORTCUT, COLUMN_TEXT, ShortcutFilterProxyModel, ShortcutTableModel
+
+
+def make_model(count=3):
+    texts = {f'ctrl+{i}': f'text {i}' for i in range(count)}
+    model = ShortcutTableModel(texts)
+    model.reset_rows(texts)
+    return model
+
+
+def append(model, shortcut, text):
+    model._texts[shortcut] = text
+    return model.append_row(shortcut)
+
+
+def rows(model):
+    return [(model.shortcut_at(row), model.text_at(row)) for row in range(model.rowCount())]
+
+
+def test_rows_are_exposed_per_column():
+    model = make_model(2)
+    assert (model.rowCount(), model.columnCount()) == (2, 3)
+    assert model.data(model.index(1, COLUMN_TEXT)) == 'text 1'
+    assert model.data(model.index(1, COLUMN_SHORTCUT), Qt.ItemDataRole.EditRole) == 'ctrl+1'
+    assert model.data(model.index(1, COLUMN_CHECK), Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Unchecked
+    assert not model.flags(model.index(0, COLUMN_CHECK)) & Qt.ItemFlag.ItemIsEditable
+    assert model.flags(model.index(0, COLUMN_TEXT)) & Qt.ItemFlag.ItemIsEditable
+
+
+def test_edits_are_requested_not_applied():
+    model = make_model(2)
+    requested = []
+    model.edit_requested.connect(lambda row, column, value: requested.append((row, column, value)))
+
+    assert not model.setData(model.index(1, COLUMN_SHORTCUT), 'ctrl+9')
+    assert requested == [(model.id_at(1), COLUMN_SHORTCUT, 'ctrl+9')]
+    assert model.shortcut_at(1) == 'ctrl+1'
+
+    # The application owns the texts and notifies the model
+    texts = model._texts
+    texts['ctrl+9'] = texts.pop('ctrl+1')
+    model.set_shortcut(1, 'ctrl+9')
+    assert rows(model)[1] == ('ctrl+9', 'text 1')
+    texts['ctrl+9'] = 'nine'
+    changed = []
+    model.dataChanged.connect(lambda first, last: changed.append((first.row(), first.column())))
+    model.text_changed(1)
+    assert changed == [(1, COLUMN_TEXT)]
+    assert rows(model)[1] == ('ctrl+9', 'nine')
+
+
+def test_check_state_and_bulk_selection():
+    model = make_model(4)
+    assert model.setData(model.index(2, COLUMN_CHECK), Qt.CheckState.Checked.value,
+                         Qt.ItemDataRole.CheckStateRole)
+    assert model.checked_rows() == [2]
+
+    model.set_all_checked(True)
+    assert model.checked_rows() == [0, 1, 2, 3]
+    model.set_all_checked(False)
+    assert model.checked_rows() == []
+
+
+def test_append_and_remove_rows():
+    model = make_model(3)
+    assert append(model, 'ctrl+x', 'x') == 3
+    model.setData(model.index(3, COLUMN_CHECK), Qt.CheckState.Checked.value, Qt.ItemDataRole.CheckStateRole)
+
+    model.remove_rows([0, 2, 0])
+    assert rows(model) == [('ctrl+1', 'text 1'), ('ctrl+x', 'x')]
+    # Check states move with their rows
+    assert model.checked_rows() == [1]
+
+
+
+def test_append_rows_inserts_once_with_fresh_ids():
+    model = make_model(2)
+    old_ids = {model.id_at(row) for row in range(2)}
+    inserts = []
+    model.rowsInserted.connect(lambda parent, first, last: inserts.append((first, last)))
+    model._texts.update({'ctrl+x': 'x', 'ctrl+y': 'y'})
+    model.append_rows(['ctrl+x', 'ctrl+y'])
+    model.append_rows([])
+
+    assert inserts == [(2, 3)]
+    assert rows(model)[2:] == [('ctrl+x', 'x'), ('ctrl+y', 'y')]
+    assert model.checked_rows() == []
+    ids = [model.id_at(row) for row in range(4)]
+    assert len(set(ids)) == 4 and not old_ids & set(ids[2:])
+    assert model.row_of_shortcut('ctrl+y') == 3
+
+
+def test_removing_many_rows_rebuilds_once():
+    model = make_model(100)
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    model.remove_rows(range(0, 100, 2))
+    assert len(resets) == 1
+    assert [shortcut for shortcut, _ in rows(model)] == [f'ctrl+{i}' for i in range(1, 100, 2)]
+
+
+def test_row_ids_survive_removals_and_renames():
+    model = make_model(5)
+    ids = [model.id_at(row) for row in range(5)]
+    assert len(set(ids)) == 5
+
+    model.remove_rows([0, 2])
+    assert model.row_of(ids[3]) == 1
+    assert model.row_of(ids[0]) is None
+    assert model.shortcut_of(ids[2]) is None
+    assert model.id_of('ctrl+2') is None
+
+    model.set_shortcut(model.row_of(ids[4]), 'ctrl+alt+4')
+    assert model.id_of('ctrl+alt+4') == ids[4]
+    assert model.id_of('ctrl+4') is None
+    assert model.shortcut_of(ids[4]) == 'ctrl+alt+4'
+    assert model.row_of_shortcut('ctrl+alt+4') == 2
+
+
+def test_new_rows_never_reuse_ids():
+    model = make_model(3)
+    old_ids = {model.id_at(row) for row in range(3)}
+    model.remove_rows([2])
+    row = append(model, 'ctrl+2', 'again')
+    assert model.id_at(row) not in old_ids
+    assert model.row_of_shortcut('ctrl+2') == row
+
+    model.reset_rows(['ctrl+1'])
+    assert model.id_at(0) not in old_ids
+
+
+def test_many_removals_keep_the_indexes_consistent():
+    model = make_model(100)
+    model.remove_rows(range(0, 100, 3))
+    for row in range(model.rowCount()):
+        assert model.row_of(model.id_at(row)) == row
+        assert model.row_of_shortcut(model.shortcut_at(row)) == row
+
+
+def visible(proxy):
+    return [proxy.data(proxy.index(row, COLUMN_SHORTCUT)) for row in range(proxy.rowCount())]
+
+
+def make_proxy():
+    texts = {'ctrl+1': 'Kind Regards', 'ctrl+2': 'Invoice', ';addr': 'Main Street 1'}
+    model = ShortcutTableModel(texts)
+    model.reset_rows(texts)
+    proxy = ShortcutFilterProxyModel()
+    proxy.setSourceModel(model)
+    return model, proxy
+
+
+def test_proxy_filters_by_text_or_shortcut_ignoring_case():
+    model, proxy = make_proxy()
+    proxy.set_query('REGARDS')
+    assert visible(proxy) == ['ctrl+1']
+    proxy.set_query('ADDR')
+    assert visible(proxy) == [';addr']
+    proxy.set_query('')
+    assert visible(proxy) == ['ctrl+1', 'ctrl+2', ';addr']
+
+
+def test_proxy_shows_precomputed_matches():
+    model, proxy = make_proxy()
+    # Search hits from a database library replace substring matching
+    proxy.set_query('street', {'ctrl+2'})
+    assert visible(proxy) == ['ctrl+2']
+
+
+def test_proxy_follows_source_edits():
+    model, proxy = make_proxy()
+    proxy.set_query('invoice')
+    append(model, 'ctrl+3', 'Second invoice')
+    assert visible(proxy) == ['ctrl+2', 'ctrl+3']
+    model.remove_rows([1])
+    assert visible(proxy) == ['ctrl+3']
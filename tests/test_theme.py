@@ -0,0 +1,176 @@
+import threading
+
+import pytest
+from PyQt6.QtGui import QPalette
+
+from ezText import TextShortcutApp
+from theme import (FakeThemeWatcher, PollingThemeWatcher, RegistryThemeWatcher, ThemeWatcher, THEME_COLORS,
+                   palette, stylesheet)
+
+
+def test_theme_watcher_is_abstract():
+    with pytest.raises(TypeError):
+        ThemeWatcher()
+
+
+def test_fake_watcher_reports_flips_only():
+    watcher = FakeThemeWatcher(is_dark=False)
+    flips = []
+    watcher.start(flips.append)
+    assert watcher.running
+    watcher.set_dark(False)
+    watcher.set_dark(True)
+    watcher.set_dark(True)
+    watcher.set_dark(False)
+    assert watcher.stop()
+    assert not watcher.running
+    assert flips == [True, False]
+
+    # Changes while stopped are picked up as the initial state, not reported
+    watcher.set_dark(True)
+    watcher.start(flips.append)
+    assert watcher.is_dark is True
+    assert watcher.stop()
+    assert flips == [True, False]
+
+
+def test_polling_watcher_checks_on_its_thread():
+    class Watcher(PollingThemeWatcher):
+        value = False
+
+        def read(self):
+            return self.value
+
+    watcher = Watcher(interval=0.01)
+    flipped = threading.Event()
+    watcher.start(lambda is_dark: flipped.set())
+    watcher.value = True
+    assert flipped.wait(2.0)
+    assert watcher.stop()
+
+
+class FakeKernel32:
+    """Event handles as the watcher uses them, with open/closed tracking"""
+
+    def __init__(self):
+        self.events = {}
+        self.closed = []
+
+    def CreateEventW(self, attributes, manual_reset, initial_state, name):
+        handle = len(self.events) + len(self.closed) + 1
+        self.events[handle] = threading.Event()
+        return handle
+
+    def SetEvent(self, handle):
+        self.events[handle].set()
+
+    def CloseHandle(self, handle):
+        del self.events[handle]
+        self.closed.append(handle)
+
+
+class BlockingRegistryWatcher(RegistryThemeWatcher):
+    """RegistryThemeWatcher whose thread only exits once released"""
+
+    def __init__(self):
+        ThemeWatcher.__init__(self)
+        self._kernel32 = FakeKernel32()
+        self._stop_event = None
+        self.release = threading.Event()
+        self.handle_open_at_exit = []
+
+    def read(self):
+        return False
+
+    def _run(self):
+        stop_event = self._stop_event
+        self._kernel32.events[stop_event].wait()
+        self.release.wait()
+        self.handle_open_at_exit.append(stop_event in self._kernel32.events)
+
+
+def test_registry_watcher_keeps_stop_event_until_thread_exits():
+    watcher = BlockingRegistryWatcher()
+    watcher.start(lambda is_dark: None)
+    handle = watcher._stop_event
+
+    assert watcher.stop(timeout=0.05) is False
+    assert watcher.running
+    assert handle in watcher._kernel32.events
+
+    watcher.release.set()
+    assert watcher.stop()
+    assert watcher.handle_open_at_exit == [True]
+    assert watcher._kernel32.closed == [handle]
+    assert watcher._stop_event is None
+
+
+def test_registry_watcher_restarts_after_timed_out_stop():
+    watcher = BlockingRegistryWatcher()
+    watcher.start(lambda is_dark: None)
+    first = watcher._stop_event
+    assert watcher.stop(timeout=0.05) is False
+
+    watcher.release.set()
+    watcher.start(lambda is_dark: None)
+    assert watcher.running
+    assert watcher._kernel32.closed == [first]
+    assert watcher._stop_event in watcher._kernel32.events
+    assert watcher.stop()
+    assert watcher._kernel32.events == {}
+
+
+def test_stylesheets_are_built_once_per_theme():
+    assert stylesheet('dark') is stylesheet('dark')
+    assert stylesheet('light') is not stylesheet('dark')
+    for theme, colors in THEME_COLORS.items():
+        sheet = stylesheet(theme)
+        assert colors['bg_color'] in sheet
+        # Every template placeholder was filled in
+        assert '{bg_color}' not in sheet and '{{' not in sheet
+
+
+def test_palettes_match_the_theme_colors():
+    assert palette('light') is palette('light')
+    for theme, colors in THEME_COLORS.items():
+        assert palette(theme).color(QPalette.ColorRole.Window).name() == colors['bg_color']
+        assert palette(theme).color(QPalette.ColorRole.Text).name() == colors['text_color']
+
+
+class ThemedWindow:
+    """Just the attributes TextShortcutApp.apply_theme uses"""
+
+    apply_theme = TextShortcutApp.apply_theme
+
+    def __init__(self, watcher):
+        self.theme_mode = 'auto'
+        self.theme_watcher = watcher
+        self.current_theme = None
+        self.applied = []
+
+    def setPalette(self, palette):
+        pass
+
+    def setStyleSheet(self, sheet):
+        self.applied.append(sheet)
+
+
+def test_apply_theme_restyles_only_on_a_change():
+    watcher = FakeThemeWatcher(is_dark=True)
+    watcher.start(lambda is_dark: None)
+    window = ThemedWindow(watcher)
+    try:
+        window.apply_theme()
+        window.apply_theme()
+        assert window.applied == [stylesheet('dark')]
+
+        watcher.set_dark(False)
+        window.apply_theme()
+        window.theme_mode = 'light'
+        window.apply_theme()
+        assert window.applied == [stylesheet('dark'), stylesheet('light')]
+
+        window.apply_theme(force=True)
+        assert len(window.applied) == 3
+    finally:
+        watcher.stop()
@@ -0,0 +1,479 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import updater as updater_module
+from updater import STAGING_DIR, SWAP_JOURNAL, AutoUpdater, DownloadCancelled, build_manifest, download_file
+
+
+class ReleaseServer:
+    """Local stand-in for the GitHub release API and asset downloads"""
+
+    ETAG = '"release-1"'
+
+    def __init__(self):
+        self.release = {
+            'tag_name': 'v9.9.9',
+            'html_url': 'http://localhost/releases/v9.9.9',
+            'body': 'Release notes',
+            'assets': [],
+        }
+        self.files = {}          # URL path -> bytes
+        self.ranges = []         # Range header of each file request
+        self.sent = 0            # File bytes sent
+        self.fail = False
+        self.full = 0
+        self.not_modified = 0
+        self.requests = []       # URL paths in request order
+        self.conditional = []    # If-None-Match of each release request
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.requests.append(self.path)
+                if server.fail:
+                    self.send_error(503)
+                    return
+                if self.path in server.files:
+                    self.send_file(server.files[self.path])
+                    return
+                if self.path != '/releases/latest':
+                    self.send_error(404)
+                    return
+                condition = self.headers.get('If-None-Match')
+                with server.lock:
+                    server.conditional.append(condition)
+                if condition == server.ETAG:
+                    with server.lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', server.ETAG)
+                    self.end_headers()
+                    return
+                with server.lock:
+                    server.full += 1
+                self.send_body(json.dumps(server.release).encode(), 'application/json',
+                               ETag=server.ETAG, **{'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+
+            def send_file(self, data):
+                # Range requests as served by a CDN, with If-Range validated against the ETag
+                etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+                requested = self.headers.get('Range')
+                with server.lock:
+                    server.ranges.append(requested)
+                if requested and self.headers.get('If-Range') in (None, etag):
+                    start = int(requested[len('bytes='):].rstrip('-'))
+                    if start >= len(data):
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{len(data)}')
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_body(data[start:], 'application/octet-stream', status=206, ETag=etag,
+                                   **{'Content-Range': f'bytes {start}-{len(data) - 1}/{len(data)}'})
+                else:
+                    self.send_body(data, 'application/octet-stream', ETag=etag)
+
+            def send_body(self, body, content_type, status=200, **headers):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                if content_type == 'application/octet-stream':
+                    with server.lock:
+                        server.sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+        self.api_url = self.url + '/releases/latest'
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server():
+    server = ReleaseServer()
+    yield server
+    server.close()
+
+
+def make_updater(server, cache_path=None, **kwargs):
+    return AutoUpdater('1.0.0', 'owner', 'repo', cache_path, api_url=server.api_url, **kwargs)
+
+
+def test_recheck_is_conditional_and_not_modified(server, tmp_path):
+    updater = make_updater(server, str(tmp_path / 'cache.json'))
+    available, info = updater.check_for_updates(force=True)
+    assert available and info['version'] == '9.9.9'
+
+    available, info = updater.check_for_updates(force=True)
+    assert available and info['version'] == '9.9.9'
+    assert (server.full, server.not_modified) == (1, 1)
+    assert server.conditional == [None, ReleaseServer.ETAG]
+    assert (updater.requests, updater.not_modified) == (2, 1)
+
+
+def test_restarted_updater_reuses_cached_validators(server, tmp_path):
+    cache_path = str(tmp_path / 'cache.json')
+    make_updater(server, cache_path).check_for_updates()
+
+    # A new instance (next start) with the interval elapsed
+    restarted = make_updater(server, cache_path, check_interval=0)
+    available, info = restarted.check_for_updates()
+    assert available and info['version'] == '9.9.9'
+    assert server.conditional == [None, ReleaseServer.ETAG]
+    assert (server.full, server.not_modified) == (1, 1)
+
+
+def test_automatic_checks_within_interval_use_cache(server, tmp_path):
+    updater = make_updater(server, str(tmp_path / 'cache.json'))
+    for _ in range(5):
+        assert updater.check_for_updates()[0]
+    assert updater.requests == 1
+    assert updater.cache_hits == 4
+
+
+def test_concurrent_checks_send_one_request(server, tmp_path):
+    updater = make_updater(server, str(tmp_path / 'cache.json'))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(updater.check_for_updates()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.full == 1
+    assert updater.requests == 1
+    assert len(results) == 8 and all(available for available, _ in results)
+
+
+def test_failed_checks_back_off(server, tmp_path):
+    server.fail = True
+    cache_path = str(tmp_path / 'cache.json')
+    failing = make_updater(server, cache_path, check_interval=0)
+    for _ in range(3):
+        assert failing.check_for_updates() == (False, None)
+    assert failing.requests == 1
+
+    with open(cache_path, encoding='utf-8') as f:
+        cache = json.load(f)
+    assert cache['failures'] == 1 and cache['retry_at'] > 0
+
+    # The backoff survives a restart; a manual check still goes out
+    restarted = make_updater(server, cache_path, check_interval=0)
+    restarted.check_for_updates()
+    assert restarted.requests == 0
+    server.fail = False
+    assert restarted.check_for_updates(force=True)[0]
+    with open(cache_path, encoding='utf-8') as f:
+        assert 'retry_at' not in json.load(f)
+
+
+def publish_installer(server, data, checksum=True):
+    """Add an installer (and a SHA256SUMS asset) to the release"""
+    server.files['/ezText_Setup.exe'] = data
+    server.release['assets'] = [
+        {'name': 'ezText_Setup.exe', 'browser_download_url': server.url + '/ezText_Setup.exe', 'size': len(data)},
+    ]
+    if checksum:
+        server.files['/SHA256SUMS'] = f"{hashlib.sha256(data).hexdigest()}  ezText_Setup.exe\n".encode()
+        server.release['assets'].append(
+            {'name': 'SHA256SUMS', 'browser_download_url': server.url + '/SHA256SUMS', 'size': 83})
+    return hashlib.sha256(data).hexdigest()
+
+
+INSTALLER = bytes(range(256)) * 40
+
+
+def test_installer_checksum_is_read_once_per_release(server, tmp_path):
+    sha256 = publish_installer(server, INSTALLER)
+    cache_path = str(tmp_path / 'cache.json')
+    updater = make_updater(server, cache_path)
+    assert updater.check_for_updates(force=True)[1]['sha256'] == sha256
+    # Answered with 304, and by a restarted instance
+    assert updater.check_for_updates(force=True)[1]['sha256'] == sha256
+    assert make_updater(server, cache_path).check_for_updates(force=True)[1]['sha256'] == sha256
+    assert server.not_modified == 2
+    assert server.requests.count('/SHA256SUMS') == 1
+
+
+def test_download_verifies_and_reuses_the_installer(server, tmp_path):
+    sha256 = publish_installer(server, INSTALLER)
+    path = str(tmp_path / 'ezText_Setup.exe')
+    assert download_file(server.url + '/ezText_Setup.exe', path, sha256) is True
+    with open(path, 'rb') as f:
+        assert f.read() == INSTALLER
+    assert sorted(os.listdir(tmp_path)) == ['ezText_Setup.exe']
+
+    # Already downloaded and matching: no request
+    assert download_file(server.url + '/ezText_Setup.exe', path, sha256.upper()) is False
+    assert server.requests == ['/ezText_Setup.exe']
+
+
+def download_partly(server, path, stop_at):
+    """Start a download and cancel it once stop_at bytes are on disk"""
+    cancel = threading.Event()
+
+    def progress(downloaded, total):
+        if downloaded >= stop_at:
+            cancel.set()
+
+    with pytest.raises(DownloadCancelled):
+        download_file(server.url + '/ezText_Setup.exe', path, progress=progress, cancel_event=cancel,
+                      chunk_size=1000, progress_interval=0)
+    assert os.path.getsize(path + '.part') == stop_at
+
+
+def test_interrupted_download_resumes_with_a_range_request(server, tmp_path):
+    sha256 = publish_installer(server, INSTALLER)
+    path = str(tmp_path / 'ezText_Setup.exe')
+    download_partly(server, path, 4000)
+
+    server.sent = 0
+    assert download_file(server.url + '/ezText_Setup.exe', path, sha256)
+    with open(path, 'rb') as f:
+        assert f.read() == INSTALLER
+    assert server.ranges[-1] == 'bytes=4000-'
+    assert server.sent == len(INSTALLER) - 4000
+
+
+def test_changed_file_is_downloaded_whole_despite_the_range(server, tmp_path):
+    publish_installer(server, INSTALLER)
+    path = str(tmp_path / 'ezText_Setup.exe')
+    download_partly(server, path, 4000)
+
+    # If-Range no longer matches: the server sends the new file from the start
+    sha256 = publish_installer(server, INSTALLER[::-1])
+    assert download_file(server.url + '/ezText_Setup.exe', path, sha256)
+    with open(path, 'rb') as f:
+        assert f.read() == INSTALLER[::-1]
+
+
+def test_unsatisfiable_range_starts_over(server, tmp_path):
+    sha256 = publish_installer(server, INSTALLER)
+    path = str(tmp_path / 'ezText_Setup.exe')
+    download_partly(server, path, 4000)
+    with open(path + '.part', 'ab') as f:
+        f.write(b'x' * len(INSTALLER))  # Longer than the file itself
+
+    assert download_file(server.url + '/ezText_Setup.exe', path, sha256)
+    with open(path, 'rb') as f:
+        assert f.read() == INSTALLER
+    assert server.ranges[-2:] == [f'bytes={4000 + len(INSTALLER)}-', None]
+
+
+def test_hash_mismatch_deletes_the_download(server, tmp_path):
+    publish_installer(server, INSTALLER)
+    path = str(tmp_path / 'ezText_Setup.exe')
+    with pytest.raises(ValueError, match='SHA256'):
+        download_file(server.url + '/ezText_Setup.exe', path, '0' * 64)
+    # Nothing is left to be resumed or reused
+    assert os.listdir(tmp_path) == []
+
+
+def write_bundle(root, files):
+    for path, data in files.items():
+        full_path = os.path.join(root, *path.split('/'))
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(data)
+
+
+def read_tree(root):
+    tree = {}
+    for directory, dirs, names in os.walk(root):
+        dirs[:] = [d for d in dirs if d != STAGING_DIR]
+        for name in names:
+            full_path = os.path.join(directory, name)
+            with open(full_path, 'rb') as f:
+                tree[os.path.relpath(full_path, root).replace(os.sep, '/')] = f.read()
+    return tree
+
+
+V1 = {
+    'ezText.exe': b'MZ' + bytes(range(256)) * 64,
+    '_internal/lib/a.pyd': b'a' * 5000,
+    '_internal/lib/b.pyd': b'b' * 3000,
+    '_internal/base_library.zip': b'zip-v1' * 100,
+    '_internal/old/d.pyd': b'd' * 400,           # dropped in V2
+}
+V2 = {
+    'ezText.exe': b'MZ' + bytes(reversed(range(256))) * 64,
+    '_internal/lib/a.pyd': b'a' * 5000,
+    '_internal/lib/b.pyd': b'B' * 3000,          # same size, new content
+    '_internal/base_library.zip': b'zip-v2' * 120,
+    '_internal/new/c.pyd': b'c' * 700,           # added
+}
+
+
+@pytest.fixture
+def release(server, tmp_path):
+    """A v2 bundle published on the server and a v1 install to update"""
+    bundle = tmp_path / 'v2'
+    write_bundle(bundle, V2)
+    manifest = build_manifest(str(bundle), '2.0.0')
+    for path, data in V2.items():
+        server.files['/bundle/' + path] = data
+    server.files['/bundle/manifest.json'] = json.dumps(manifest).encode()
+    install = tmp_path / 'install'
+    write_bundle(install, V1)
+    return str(install), server.url + '/bundle/manifest.json'
+
+
+def make_delta_updater(install):
+    return AutoUpdater('1.0.0', 'owner', 'repo', install_dir=install)
+
+
+def test_build_manifest_lists_every_file(tmp_path):
+    write_bundle(tmp_path, V2)
+    write_bundle(tmp_path / STAGING_DIR, {'leftover': b'x'})
+    manifest = build_manifest(str(tmp_path), '2.0.0')
+    assert manifest['version'] == '2.0.0'
+    assert sorted(manifest['files']) == sorted(V2)
+    assert manifest['files']['_internal/new/c.pyd']['size'] == 700
+
+
+def test_apply_delta_produces_the_new_bundle(server, release):
+    install, manifest_url = release
+    updater = make_delta_updater(install)
+    manifest = updater.fetch_manifest(manifest_url, '2.0.0')
+    assert sorted(updater.plan_delta(manifest)) == sorted(
+        ['ezText.exe', '_internal/lib/b.pyd', '_internal/base_library.zip', '_internal/new/c.pyd'])
+    assert updater.plan_removals(manifest) == ['_internal/old/d.pyd']
+
+    assert updater.apply_delta(manifest) == 5
+    assert read_tree(install) == V2
+    assert not os.path.exists(os.path.join(install, STAGING_DIR))
+    # The unchanged file was not downloaded
+    assert '/bundle/_internal/lib/a.pyd' not in server.requests
+
+
+def test_hash_mismatch_leaves_install_unchanged(server, release):
+    install, manifest_url = release
+    updater = make_delta_updater(install)
+    manifest = updater.fetch_manifest(manifest_url, '2.0.0')
+    server.files['/bundle/_internal/new/c.pyd'] = b'tampered'
+
+    with pytest.raises(ValueError):
+        updater.apply_delta(manifest)
+    assert read_tree(install) == V1
+    assert not os.path.exists(os.path.join(install, STAGING_DIR, SWAP_JOURNAL))
+
+
+def fail_on_replace(monkeypatch, calls, exception):
+    """Make the calls-th os.replace inside the updater raise"""
+    real_replace = os.replace
+    count = [0]
+
+    def replace(source, target):
+        count[0] += 1
+        if count[0] == calls:
+            raise exception
+        real_replace(source, target)
+
+    monkeypatch.setattr(updater_module.os, 'replace', replace)
+
+
+def test_failed_swap_is_rolled_back(server, release, monkeypatch):
+    install, manifest_url = release
+    updater = make_delta_updater(install)
+    manifest = updater.fetch_manifest(manifest_url, '2.0.0')
+    updater._download_staged(manifest, updater.plan_delta(manifest),
+                             os.path.join(install, STAGING_DIR, '2.0.0'), None, None)
+
+    # os.replace calls: 1 writes the journal, 2-5 swap two files, 6 moves the third aside
+    fail_on_replace(monkeypatch, 6, PermissionError('file in use'))
+    with pytest.raises(PermissionError):
+        updater.apply_delta(manifest)
+    monkeypatch.undo()
+
+    assert read_tree(install) == V1
+    assert not os.path.exists(os.path.join(install, STAGING_DIR, SWAP_JOURNAL))
+    assert updater.apply_delta(manifest) == 5
+    assert read_tree(install) == V2
+
+
+class ProcessDied(BaseException):
+    """Stands in for the process being killed: no except clause runs"""
+
+
+# os.replace calls: 1 writes the journal, 2/3 move ezText.exe aside/in, ...,
+# 8 moves the added file in, 9 moves the removed file aside
+@pytest.mark.parametrize('calls', [1, 2, 3, 6, 8, 9])
+def test_interrupted_swap_is_restored_on_next_start(server, release, monkeypatch, calls):
+    install, manifest_url = release
+    updater = make_delta_updater(install)
+    manifest = updater.fetch_manifest(manifest_url, '2.0.0')
+    updater._download_staged(manifest, updater.plan_delta(manifest),
+                             os.path.join(install, STAGING_DIR, '2.0.0'), None, None)
+
+    fail_on_replace(monkeypatch, calls, ProcessDied())
+    with pytest.raises(ProcessDied):
+        updater.apply_delta(manifest)
+    monkeypatch.undo()
+    assert os.path.exists(os.path.join(install, STAGING_DIR, SWAP_JOURNAL)) == (calls > 1)
+
+    # Next start: the original files come back, then the leftovers go
+    restarted = make_delta_updater(install)
+    restarted.recover_staging()
+    assert read_tree(install) == V1
+    staging = os.path.join(install, STAGING_DIR)
+    assert not os.path.exists(staging) or os.listdir(staging) == ['2.0.0']
+
+    assert restarted.apply_delta(manifest) == 5
+    assert read_tree(install) == V2
+
+
+def test_removal_keeps_files_outside_the_bundle_directories(server, release):
+    install, manifest_url = release
+    # Written by the installer, listed in no manifest
+    write_bundle(install, {'unins000.exe': b'uninstaller'})
+    updater = make_delta_updater(install)
+    manifest = updater.fetch_manifest(manifest_url, '2.0.0')
+    assert updater.plan_removals(manifest) == ['_internal/old/d.pyd']
+
+    updater.apply_delta(manifest)
+    assert read_tree(install) == dict(V2, **{'unins000.exe': b'uninstaller'})
+    assert not os.path.exists(os.path.join(install, '_internal', 'old'))
+
+
+def test_recover_staging_keeps_only_newer_downloads(tmp_path):
+    install = tmp_path / 'install'
+    write_bundle(install, V1)
+    staging = install / STAGING_DIR
+    write_bundle(staging, {
+        '0.9.0/ezText.exe': b'old',
+        '1.0.0/ezText.exe': b'current',
+        '2.0.0/ezText.exe.part': b'partial',
+        'backup-abc/ezText.exe': b'backup',
+    })
+    make_delta_updater(str(install)).recover_staging()
+    assert sorted(os.listdir(staging)) == ['2.0.0']
+    assert read_tree(install) == V1
+
+
+def test_manifest_for_another_version_is_rejected(server, release):
+    install, manifest_url = release
+    updater = make_delta_updater(install)
+    with pytest.raises(ValueError, match='version'):
+        updater.fetch_manifest(manifest_url, '2.0.1')
+    assert server.requests == ['/bundle/manifest.json']
+    assert read_tree(install) == V1
@@ -0,0 +1,451 @@
+"""
+ezText System Theme Watcher
+
+Watches the OS light/dark setting on a background thread and calls back
+only when it actually flips, instead of polling from the GUI thread.
+
+- RegistryThemeWatcher (Windows): blocks in RegNotifyChangeKeyValue on the
+  Personalize key and wakes up only when a value under it changes.
+- PollingThemeWatcher (other platforms): checks darkdetect at a slow
+  interval on its own thread.
+- FakeThemeWatcher: driven by hand, for tests and benchmarks.
+
+Callbacks run on the watcher thread; GUI code must marshal them (e.g.
+through a Qt signal).
+
+The light and dark stylesheets and palettes are built once per process
+(stylesheet(), palette()), so switching themes never rebuilds them.
+"""
+
+import sys
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+
+PERSONALIZE_KEY = r'Software\Microsoft\Windows\CurrentVersion\Themes\Personalize'
+
+THEMES = ('light', 'dark')
+
+THEME_COLORS = {
+    'dark': {
+        'bg_color': '#202020',
+        'surface_color': '#2b2b2b',
+        'text_color': '#ffffff',
+        'border_color': '#3d3d3d',
+        'hover_color': '#363636',
+        'accent_color': '#0078d4',
+        'accent_hover': '#1a86d9',
+        'accent_pressed': '#0067c0',
+        'table_alternate': '#252525',
+    },
+    'light': {
+        'bg_color': '#f3f3f3',
+        'surface_color': '#ffffff',
+        'text_color': '#000000',
+        'border_color': '#e0e0e0',
+        'hover_color': '#e8e8e8',
+        'accent_color': '#0067c0',
+        'accent_hover': '#0078d4',
+        'accent_pressed': '#005a9e',
+        'table_alternate': '#f9f9f9',
+    },
+}
+
+STYLESHEET_TEMPLATE = """
+    QMainWindow {{
+        background-color: {bg_color};
+    }}
+    QWidget {{
+        background-color: {bg_color};
+        color: {text_color};
+        font-family: 'Segoe UI';
+    }}
+    QLineEdit {{
+        background-color: {surface_color};
+        border: 1px solid {border_color};
+        border-radius: 4px;
+        padding: 5px 10px;
+        color: {text_color};
+        min-height: 25px;
+    }}
+    QLineEdit:focus {{
+        border: 2px solid {accent_color};
+        background-color: {surface_color};
+    }}
+    QLineEdit:disabled {{
+        background-color: {bg_color};
+        color: {border_color};
+        border: 1px solid {border_color};
+    }}
+    QLineEdit[readOnly="true"] {{
+        background-color: {surface_color};
+        color: {text_color};
+    }}
+    QLineEdit[readOnly="true"]:disabled {{
+        background-color: {bg_color};
+        color: {border_color};
+    }}
+    QTextEdit {{
+        background-color: {surface_color};
+        border: 1px solid {border_color};
+        border-radius: 4px;
+        padding: 5px 10px;
+        color: {text_color};
+    }}
+    QTextEdit:focus {{
+        border: 2px solid {accent_color};
+        background-color: {surface_color};
+    }}
+    QPushButton {{
+        background-color: {surface_color};
+        border: 1px solid {border_color};
+        border-radius: 4px;
+        padding: 8px 15px;
+        color: {text_color};
+    }}
+    QPushButton:hover {{
+        background-color: {hover_color};
+    }}
+    QPushButton:pressed {{
+        background-color: {border_color};
+    }}
+    QPushButton#addButton {{
+        background-color: {accent_color};
+        color: #ffffff;
+        font-weight: bold;
+        border: none;
+    }}
+    QPushButton#addButton:hover {{
+        background-color: {accent_hover};
+    }}
+    QPushButton#addButton:pressed {{
+        background-color: {accent_pressed};
+    }}
+    QTableView {{
+        background-color: {surface_color};
+        alternate-background-color: {table_alternate};
+        border: 1px solid {border_color};
+        border-radius: 4px;
+        gridline-color: {border_color};
+        color: {text_color};
+    }}
+    QTableView::item {{
+        padding: 8px;
+        border: none;
+    }}
+    QTableView::item:hover {{
+        background-color: {hover_color};
+    }}
+    QTableView::item:focus {{
+        background-color: transparent;
+        outline: none;
+    }}
+    QTableView::indicator {{
+        width: 18px;
+        height: 18px;
+        border-radius: 3px;
+        border: 2px solid {border_color};
+        background-color: {surface_color};
+        margin-left: 7px;
+    }}
+    QTableView::indicator:hover {{
+        border-color: #10a37f;
+    }}
+    QTableView::indicator:checked {{
+        background-color: #10a37f;
+        border-color: #10a37f;
+        image: url(data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTIiIGhlaWdodD0iOSIgdmlld0JveD0iMCAwIDEyIDkiIGZpbGw9Im5vbmUiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+PHBhdGggZD0iTTEgNEw0LjUgNy41TDExIDEiIHN0cm9rZT0id2hpdGUiIHN0cm9rZS13aWR0aD0iMiIgc3Ryb2tlLWxpbmVjYXA9InJvdW5kIiBzdHJva2UtbGluZWpvaW49InJvdW5kIi8+PC9zdmc+);
+    }}
+    QHeaderView::section {{
+        background-color: {surface_color};
+        border: 1px solid {border_color};
+        padding: 8px;
+        font-weight: bold;
+        color: {text_color};
+    }}
+    QMenuBar {{
+        background-color: {bg_color};
+        color: {text_color};
+        border-bottom: 1px solid {border_color};
+    }}
+    QMenuBar::item:selected {{
+        background-color: {hover_color};
+    }}
+    QMenu {{
+        background-color: {surface_color};
+        border: 1px solid {border_color};
+        color: {text_color};
+    }}
+    QMenu::item:selected {{
+        background-color: {hover_color};
+    }}
+    QLabel {{
+        color: {text_color};
+        background-color: transparent;
+    }}
+    QLabel#warningLabel {{
+        color: #ff9800;
+        background-color: transparent;
+        padding: 5px;
+    }}
+    QCheckBox {{
+        color: {text_color};
+        spacing: 5px;
+    }}
+    QCheckBox::indicator {{
+        width: 18px;
+        height: 18px;
+        border-radius: 3px;
+        border: 2px solid {border_color};
+        background-color: {surface_color};
+    }}
+    QCheckBox::indicator:hover {{
+        border-color: #10a37f;
+    }}
+    QCheckBox::indicator:checked {{
+        background-color: #10a37f;
+        border-color: #10a37f;
+        image: url(data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTIiIGhlaWdodD0iOSIgdmlld0JveD0iMCAwIDEyIDkiIGZpbGw9Im5vbmUiIHhtbG5zPSJodHRwOi8vd3d3LnczLm9yZy8yMDAwL3N2ZyI+PHBhdGggZD0iTTEgNEw0LjUgNy41TDExIDEiIHN0cm9rZT0id2hpdGUiIHN0cm9rZS13aWR0aD0iMiIgc3Ryb2tlLWxpbmVjYXA9InJvdW5kIiBzdHJva2UtbGluZWpvaW49InJvdW5kIi8+PC9zdmc+);
+    }}
+"""
+
+
+@lru_cache(maxsize=None)
+def stylesheet(theme):
+    """Application stylesheet for 'light' or 'dark' (built once)"""
+    return STYLESHEET_TEMPLATE.format(**THEME_COLORS[theme])
+
+
+@lru_cache(maxsize=None)
+def palette(theme):
+    """QPalette matching the stylesheet colors (built once)"""
+    from PyQt6.QtGui import QPalette, QColor
+
+    colors = THEME_COLORS[theme]
+    result = QPalette()
+    for role, color in (
+        (QPalette.ColorRole.Window, colors['bg_color']),
+        (QPalette.ColorRole.WindowText, colors['text_color']),
+        (QPalette.ColorRole.Base, colors['surface_color']),
+        (QPalette.ColorRole.AlternateBase, colors['table_alternate']),
+        (QPalette.ColorRole.Text, colors['text_color']),
+        (QPalette.ColorRole.Button, colors['surface_color']),
+        (QPalette.ColorRole.ButtonText, colors['text_color']),
+        (QPalette.ColorRole.ToolTipBase, colors['surface_color']),
+        (QPalette.ColorRole.ToolTipText, colors['text_color']),
+        (QPalette.ColorRole.Mid, colors['border_color']),
+        (QPalette.ColorRole.Highlight, colors['accent_color']),
+        (QPalette.ColorRole.HighlightedText, '#ffffff'),
+    ):
+        result.setColor(role, QColor(color))
+    return result
+
+
+def detect_dark():
+    """Current OS theme (darkdetect is imported on first use)"""
+    import darkdetect
+    return bool(darkdetect.isDark())
+
+
+class ThemeWatcher(ABC):
+    """Base class: tracks the last seen theme and reports flips"""
+
+    def __init__(self):
+        self.callback = None
+        self.is_dark = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, callback):
+        """
+        Start watching
+
+        Args:
+            callback: Callable(is_dark) invoked from the watcher thread on every flip
+        """
+        if self.running:
+            # Already watching, or a stop() that timed out is still waiting for the thread
+            if not self._stop.is_set() or not self.stop():
+                return
+        self.callback = callback
+        try:
+            self.is_dark = self.read()
+        except Exception as e:
+            print(f"Error reading system theme: {e}")
+        self._before_start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ezText-theme', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stop watching and wait for the thread to exit
+
+        Returns:
+            bool: True if the thread has exited; False if it is still
+                running after the timeout (stop() may be called again)
+        """
+        if self._thread is None:
+            return True
+        self._stop.set()
+        self._wake()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print("Theme watcher thread did not exit in time")
+            return False
+        self._thread = None
+        return True
+
+    def read(self):
+        """Read the current theme"""
+        return detect_dark()
+
+    def check(self):
+        """Re-read the theme and report it if it flipped"""
+        try:
+            is_dark = self.read()
+        except Exception as e:
+            print(f"Error reading system theme: {e}")
+            return
+        if is_dark != self.is_dark:
+            self.is_dark = is_dark
+            if self.callback is not None:
+                self.callback(is_dark)
+
+    def _before_start(self):
+        """Prepare resources for a new watcher thread (no thread is running)"""
+
+    def _wake(self):
+        """Interrupt a blocking wait in _run"""
+
+    @abstractmethod
+    def _run(self):
+        """Watch until self._stop is set (runs on the watcher thread)"""
+
+
+class PollingThemeWatcher(ThemeWatcher):
+    """Polls darkdetect on a background thread"""
+
+    def __init__(self, interval=5.0):
+        super().__init__()
+        self.interval = interval
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+
+class RegistryThemeWatcher(ThemeWatcher):
+    """Windows: wakes up on registry change notifications only"""
+
+    REG_NOTIFY_CHANGE_LAST_SET = 0x00000004
+    WAIT_OBJECT_0 = 0
+    INFINITE = 0xFFFFFFFF
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+
+        self._advapi32 = ctypes.WinDLL('advapi32')
+        self._kernel32 = ctypes.WinDLL('kernel32')
+        self._advapi32.RegNotifyChangeKeyValue.argtypes = [wintypes.HKEY, wintypes.BOOL, wintypes.DWORD,
+                                                           wintypes.HANDLE, wintypes.BOOL]
+        self._kernel32.CreateEventW.restype = wintypes.HANDLE
+        self._kernel32.CreateEventW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL,
+                                                wintypes.LPCWSTR]
+        self._kernel32.SetEvent.argtypes = [wintypes.HANDLE]
+        self._kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self._kernel32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE),
+                                                          wintypes.BOOL, wintypes.DWORD]
+        self._wintypes = wintypes
+        self._stop_event = None
+
+    def read(self):
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, PERSONALIZE_KEY) as key:
+            value, _ = winreg.QueryValueEx(key, 'AppsUseLightTheme')
+        return value == 0
+
+    def _before_start(self):
+        # The previous thread, if any, has exited; its event can go
+        self._close_stop_event()
+        self._stop_event = self._kernel32.CreateEventW(None, True, False, None)
+
+    def stop(self, timeout=1.0):
+        # A thread still blocked in WaitForMultipleObjects holds the event;
+        # it is closed only once the thread is gone
+        stopped = super().stop(timeout)
+        if stopped:
+            self._close_stop_event()
+        return stopped
+
+    def _close_stop_event(self):
+        if self._stop_event:
+            self._kernel32.CloseHandle(self._stop_event)
+            self._stop_event = None
+
+    def _wake(self):
+        if self._stop_event:
+            self._kernel32.SetEvent(self._stop_event)
+
+    def _run(self):
+        import winreg
+        wintypes = self._wintypes
+        try:
+            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, PERSONALIZE_KEY, 0,
+                                 winreg.KEY_READ | winreg.KEY_NOTIFY)
+        except OSError as e:
+            print(f"Error opening the theme registry key; theme changes are not tracked: {e}")
+            return
+        changed = self._kernel32.CreateEventW(None, False, False, None)
+        handles = (wintypes.HANDLE * 2)(changed, self._stop_event)
+        try:
+            while not self._stop.is_set():
+                # Arm a one-shot notification, then sleep until it or stop() fires
+                if self._advapi32.RegNotifyChangeKeyValue(wintypes.HKEY(key.handle), False,
+                                                          self.REG_NOTIFY_CHANGE_LAST_SET,
+                                                          changed, True) != 0:
+                    break
+                result = self._kernel32.WaitForMultipleObjects(2, handles, False, self.INFINITE)
+                if result != self.WAIT_OBJECT_0:
+                    break
+                self.check()
+        finally:
+            self._kernel32.CloseHandle(changed)
+            key.Close()
+
+
+class FakeThemeWatcher(ThemeWatcher):
+    """Theme watcher driven by set_dark(), for tests and benchmarks"""
+
+    def __init__(self, is_dark=False):
+        super().__init__()
+        self._value = is_dark
+
+    def read(self):
+        return self._value
+
+    def set_dark(self, is_dark):
+        """Change the fake OS theme; reports a flip like a real watcher"""
+        self._value = is_dark
+        if self.running:
+            self.check()
+
+    def _run(self):
+        self._stop.wait()
+
+
+def create_theme_watcher():
+    """Best watcher for this platform"""
+    if sys.platform == 'win32':
+        try:
+            return RegistryThemeWatcher()
+        except OSError as e:
+            print(f"Registry theme watcher unavailable, polling instead: {e}")
+    return PollingThemeWatcher()
@@ -19,21 +19,243 @@ Update Process (Setup version):
 3. Show installer wizard to user
 4. Installer closes app automatically (via setup.iss)
 5. User completes installation
+
+Release checks are conditional and cached: the last release metadata is
+kept on disk together with its ETag/Last-Modified validators, automatic
+checks within the minimum interval are answered from the cache, re-checks
+send If-None-Match/If-Modified-Since (a 304 reply costs no JSON parsing
+and doesn't count against the GitHub rate limit), and failed checks back
+off exponentially.
+
+Installers are downloaded with download_file(): streamed in large chunks
+to a .part file that later attempts resume with an HTTP Range request,
+and verified against the SHA256 published with the release. An installer
+already on disk whose hash matches is reused without downloading.
+
+Delta updates: a release can publish a manifest asset (manifest.json,
+written by "python updater.py manifest <bundle dir> <version>") listing
+the SHA256 of every file in the onedir bundle. apply_delta() compares it
+with the installed files, downloads only the changed files into a staging
+directory inside the install directory, and then swaps them in. Files the
+new bundle no longer has are removed in the same swap. Each replaced or
+removed file is first renamed into a backup folder, which Windows allows
+even for the running executable. The swap is recorded in a journal
+(swap.json) before the first rename and the journal is removed once every
+file is in place. If any step fails, the files already swapped are moved
+back; if the process dies mid-swap, recover_staging() does the same from
+the journal on the next start, before the staging leftovers are deleted
+and before any new update is attempted. Releases without a manifest, or
+installs that aren't a writable frozen bundle, use the installer.
 """
 
 import sys
 import os
+import hashlib
 import json
 import urllib.request
 import urllib.error
 import subprocess
 import tempfile
+import shutil
+import threading
+import time
+import urllib.parse
 from pathlib import Path
 from packaging import version
 
+from storage import atomic_write
+
+
+# Automatic checks within this many seconds of the last one use the cache
+DEFAULT_CHECK_INTERVAL = 6 * 60 * 60
+
+# Backoff after failed checks: first delay, doubling up to the maximum
+BACKOFF_INITIAL = 5 * 60
+BACKOFF_MAX = 24 * 60 * 60
+
+# Download read size and minimum seconds between progress callbacks
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 0.25
+
+# Release asset with the per-file hashes of the bundle
+MANIFEST_NAME = 'manifest.json'
+
+# Staging directory (inside the install directory, so swaps stay on one volume)
+STAGING_DIR = '_update'
+
+# Swap journal and per-swap backup directories inside the staging directory
+SWAP_JOURNAL = 'swap.json'
+BACKUP_PREFIX = 'backup-'
+
+
+class DownloadCancelled(Exception):
+    """Raised by download_file() when cancelled"""
+
+
+def file_sha256(path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """SHA256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_file(url, path, sha256=None, progress=None, cancel_event=None,
+                  chunk_size=DOWNLOAD_CHUNK_SIZE, progress_interval=PROGRESS_INTERVAL):
+    """
+    Download a file, resuming an interrupted download and verifying its hash
+
+    Data goes to path + '.part' and is moved to path once complete and
+    verified. A leftover .part file from an earlier attempt is resumed with
+    a Range request (If-Range makes the server send the whole file instead
+    if it changed in between).
+
+    Args:
+        url: Download URL
+        path: Destination file path
+        sha256: Expected SHA256 hex digest (None: not verified, never reused)
+        progress: Callback(downloaded, total) at most every progress_interval
+            seconds, plus once at the end; total is 0 if unknown
+        cancel_event: threading.Event that aborts the download when set
+        chunk_size: Read size in bytes
+
+    Returns:
+        bool: True if downloaded, False if an existing verified file was reused
+
+    Raises:
+        DownloadCancelled: The cancel event was set (the .part file is kept)
+        ValueError: The downloaded file doesn't match sha256 (it is deleted)
+        OSError, urllib.error.URLError: Network or file errors
+    """
+    sha256 = sha256.lower() if sha256 else None
+    if sha256 and os.path.exists(path) and file_sha256(path) == sha256:
+        return False
+
+    part_path = path + '.part'
+    meta_path = part_path + '.json'
+
+    # Resume only a partial download of the same URL
+    meta = {}
+    offset = 0
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('url') == url:
+            offset = os.path.getsize(part_path)
+    except (OSError, ValueError):
+        pass
+
+    request = urllib.request.Request(url)
+    request.add_header('User-Agent', 'ezText-AutoUpdater')
+    validator = meta.get('etag') or meta.get('last_modified')
+    if offset and validator:
+        request.add_header('Range', f'bytes={offset}-')
+        request.add_header('If-Range', validator)
+    else:
+        offset = 0
+
+    try:
+        response = urllib.request.urlopen(request, timeout=30)
+    except urllib.error.HTTPError as e:
+        if e.code != 416 or not offset:
+            raise
+        # Range not satisfiable: the part file is unusable, start over
+        os.remove(part_path)
+        os.remove(meta_path)
+        return download_file(url, path, sha256, progress, cancel_event, chunk_size, progress_interval)
+
+    digest = hashlib.sha256()
+    with response:
+        if offset and response.status == 206:
+            # Hash what is already on disk, then append
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(chunk_size), b''):
+                    digest.update(chunk)
+            mode = 'ab'
+        else:
+            offset = 0
+            mode = 'wb'
+            atomic_write(meta_path, json.dumps({
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }))
+
+        length = response.headers.get('Content-Length')
+        total = offset + int(length) if length else 0
+        downloaded = offset
+        last_report = 0.0
+
+        with open(part_path, mode) as f:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise DownloadCancelled()
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                digest.update(chunk)
+                downloaded += len(chunk)
+                if progress:
+                    now = time.monotonic()
+                    if now - last_report >= progress_interval:
+                        last_report = now
+                        progress(downloaded, total)
+
+    if progress:
+        progress(downloaded, total)
+
+    if total and downloaded != total:
+        raise OSError(f"Download incomplete: {downloaded} of {total} bytes")
+    if sha256 and digest.hexdigest() != sha256:
+        # A corrupt file must not be resumed or reused
+        os.remove(part_path)
+        os.remove(meta_path)
+        raise ValueError(f"SHA256 mismatch for {os.path.basename(path)}")
+
+    os.replace(part_path, path)
+    os.remove(meta_path)
+    return True
+
+
+def build_manifest(bundle_dir, version_string, base_url=None):
+    """
+    Describe every file of a bundle for delta updates
+
+    Args:
+        bundle_dir: Onedir bundle (e.g. dist/ezText)
+        version_string: Release version
+        base_url: URL the bundle files are published under (defaults to the
+            manifest's own location)
+
+    Returns:
+        dict: Manifest ({'version', 'base_url', 'files': {path: {'sha256', 'size'}}})
+    """
+    files = {}
+    for root, dirs, names in os.walk(bundle_dir):
+        dirs[:] = sorted(d for d in dirs if d != STAGING_DIR)
+        for name in sorted(names):
+            full_path = os.path.join(root, name)
+            path = os.path.relpath(full_path, bundle_dir).replace(os.sep, '/')
+            files[path] = {'sha256': file_sha256(full_path), 'size': os.path.getsize(full_path)}
+    manifest = {'version': version_string, 'files': files}
+    if base_url:
+        manifest['base_url'] = base_url
+    return manifest
+
+
+def _manifest_path(path):
+    """Validate a manifest path and convert it to a native relative path"""
+    parts = path.split('/')
+    if not path or path.startswith('/') or ':' in path or any(part in ('', '.', '..') for part in parts):
+        raise ValueError(f"Invalid path in update manifest: {path!r}")
+    return os.path.join(*parts)
+
 
 class AutoUpdater:
-    def __init__(self, current_version, repo_owner, repo_name):
+    def __init__(self, current_version, repo_owner, repo_name, cache_path=None,
+                 check_interval=DEFAULT_CHECK_INTERVAL, api_url=None, install_dir=None):
         """
         Initialize AutoUpdater
 
@@ -41,45 +263,163 @@ class AutoUpdater:
             current_version: Current application version (e.g., "1.0.0")
             repo_owner: GitHub repository owner
             repo_name: GitHub repository name
+            cache_path: JSON file caching the last release check (None: no cache)
+            check_interval: Seconds during which automatic checks use the cache
+            api_url: Release API URL (defaults to the GitHub latest-release URL)
+            install_dir: Onedir bundle to delta-update (None: installer only)
         """
         self.current_version = current_version
         self.repo_owner = repo_owner
         self.repo_name = repo_name
-        self.api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/releases/latest"
+        self.api_url = api_url or f"https://api.github.com/repos/{repo_owner}/{repo_name}/releases/latest"
+        self.cache_path = cache_path
+        self.check_interval = check_interval
+        self.install_dir = install_dir
+
+        # Checks can come from the startup timer and the menu at once
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
 
-    def check_for_updates(self):
+        # Startup recovery must not run while an update swaps files
+        self._staging_lock = threading.Lock()
+
+        # Counters for diagnostics
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+
+    def _load_cache(self):
+        if self.cache_path:
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+                if isinstance(cache, dict):
+                    return cache
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save_cache(self):
+        if self.cache_path:
+            try:
+                atomic_write(self.cache_path, json.dumps(self._cache, ensure_ascii=False))
+            except OSError as e:
+                print(f"Error saving update cache: {e}")
+
+    def check_for_updates(self, force=False):
         """
         Check if a new version is available
 
+        Args:
+            force: Ask the server even within the check interval or backoff
+                (manual checks); the request is still conditional
+
         Returns:
             tuple: (bool, dict) - (update_available, release_info)
         """
+        with self._lock:
+            data = self._fetch_release(force)
+        if data is None:
+            return False, None
+
         try:
-            request = urllib.request.Request(self.api_url)
-            request.add_header('User-Agent', 'ezText-AutoUpdater')
+            latest_version = data['tag_name'].lstrip('v')
 
-            with urllib.request.urlopen(request, timeout=10) as response:
-                data = json.loads(response.read().decode())
+            # Compare versions
+            if version.parse(latest_version) > version.parse(self.current_version):
+                return True, {
+                    'version': latest_version,
+                    'download_url': self._get_installer_url(data),
+                    'sha256': self._cached_installer_sha256(data),
+                    'manifest_url': self._get_asset_url(data, MANIFEST_NAME),
+                    'release_notes': data.get('body', ''),
+                    'html_url': data.get('html_url', '')
+                }
+            else:
+                return False, None
 
-                latest_version = data['tag_name'].lstrip('v')
+        except Exception as e:
+            print(f"Error checking for updates: {e}")
+            return False, None
 
-                # Compare versions
-                if version.parse(latest_version) > version.parse(self.current_version):
-                    return True, {
-                        'version': latest_version,
-                        'download_url': self._get_installer_url(data),
-                        'release_notes': data.get('body', ''),
-                        'html_url': data.get('html_url', '')
-                    }
-                else:
-                    return False, None
+    def _fetch_release(self, force):
+        """
+        Latest release metadata, from the cache or the server
+
+        Returns:
+            dict: Release data, or None if unavailable
+        """
+        cache = self._cache
+        now = time.time()
+        release = cache.get('release')
 
+        if not force:
+            if now < cache.get('retry_at', 0):
+                return release
+            if release and now - cache.get('checked_at', 0) < self.check_interval:
+                self.cache_hits += 1
+                return release
+
+        request = urllib.request.Request(self.api_url)
+        request.add_header('User-Agent', 'ezText-AutoUpdater')
+        request.add_header('Accept', 'application/vnd.github+json')
+        # Validators are only useful together with the release they describe
+        if release:
+            if cache.get('etag'):
+                request.add_header('If-None-Match', cache['etag'])
+            if cache.get('last_modified'):
+                request.add_header('If-Modified-Since', cache['last_modified'])
+
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                data = json.loads(response.read().decode())
+                headers = response.headers
+            release = self._trim_release(data)
+            cache['release'] = release
+            cache['etag'] = headers.get('ETag')
+            cache['last_modified'] = headers.get('Last-Modified')
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or not release:
+                return self._check_failed(f"HTTP error checking for updates: {e}")
+            # Not modified: the cached release is current
+            self.not_modified += 1
+            etag = e.headers.get('ETag')
+            if etag:
+                cache['etag'] = etag
         except urllib.error.URLError as e:
-            print(f"Network error checking for updates: {e}")
-            return False, None
+            return self._check_failed(f"Network error checking for updates: {e}")
         except Exception as e:
-            print(f"Error checking for updates: {e}")
-            return False, None
+            return self._check_failed(f"Error checking for updates: {e}")
+
+        cache['checked_at'] = now
+        cache.pop('failures', None)
+        cache.pop('retry_at', None)
+        self._save_cache()
+        return release
+
+    def _check_failed(self, message):
+        """Schedule the next automatic check with exponential backoff"""
+        print(message)
+        failures = self._cache.get('failures', 0) + 1
+        delay = min(BACKOFF_INITIAL * 2 ** (failures - 1), BACKOFF_MAX)
+        self._cache['failures'] = failures
+        self._cache['retry_at'] = time.time() + delay
+        self._save_cache()
+        return None
+
+    @staticmethod
+    def _trim_release(data):
+        """Keep only the release fields the updater uses"""
+        return {
+            'tag_name': data['tag_name'],
+            'body': data.get('body', ''),
+            'html_url': data.get('html_url', ''),
+            'assets': [
+                {key: asset.get(key) for key in ('name', 'browser_download_url', 'size', 'digest')}
+                for asset in data.get('assets', [])
+            ],
+        }
 
     def _get_installer_url(self, release_data):
         """
@@ -105,6 +445,342 @@ class AutoUpdater:
 
         return None
 
+    def _get_asset_url(self, release_data, name):
+        """Download URL of the release asset with the given name, or None"""
+        for asset in release_data.get('assets', []):
+            if asset['name'].lower() == name:
+                return asset['browser_download_url']
+        return None
+
+    def _cached_installer_sha256(self, release):
+        """
+        Installer SHA256 of a release, looked up once and kept in the cache
+
+        A checksum file is only downloaded the first time a release offers
+        an update; later checks, including 304 replies, reuse the digest.
+        """
+        with self._lock:
+            sha256 = release.get('installer_sha256')
+            if sha256 is None:
+                sha256 = self._get_installer_sha256(release)
+                if sha256:
+                    # A failed lookup is retried on the next check
+                    release['installer_sha256'] = sha256
+                    self._save_cache()
+            return sha256
+
+    def _get_installer_sha256(self, release_data):
+        """
+        Get the installer's SHA256 published with the release
+
+        Uses the asset digest GitHub records for uploads, or a checksum asset
+        next to the installer ("<installer>.sha256", "SHA256SUMS" or
+        "checksums.txt" in sha256sum format).
+
+        Returns:
+            str: Hex digest, or None if the release doesn't publish one
+        """
+        installer_url = self._get_installer_url(release_data)
+        if not installer_url:
+            return None
+        assets = release_data.get('assets', [])
+        installer = next(asset for asset in assets if asset['browser_download_url'] == installer_url)
+
+        digest = installer.get('digest') or ''
+        if digest.startswith('sha256:'):
+            return digest[len('sha256:'):].lower()
+
+        checksum_names = (installer['name'].lower() + '.sha256', 'sha256sums', 'sha256sums.txt', 'checksums.txt')
+        for asset in assets:
+            if asset['name'].lower() in checksum_names:
+                try:
+                    return self._read_checksum(asset['browser_download_url'], installer['name'])
+                except Exception as e:
+                    print(f"Error reading checksum file: {e}")
+        return None
+
+    def _read_checksum(self, url, file_name):
+        """Find a file's digest in a sha256sum-format checksum file"""
+        request = urllib.request.Request(url)
+        request.add_header('User-Agent', 'ezText-AutoUpdater')
+        with urllib.request.urlopen(request, timeout=10) as response:
+            lines = response.read(64 * 1024).decode('utf-8', 'replace').splitlines()
+        for line in lines:
+            fields = line.split()
+            if not fields or len(fields[0]) != 64:
+                continue
+            # A single-file .sha256 may omit the name
+            if len(fields) == 1 or fields[-1].lstrip('*').lower() == file_name.lower():
+                return fields[0].lower()
+        return None
+
+    def can_apply_delta(self):
+        """Whether the installed bundle can be updated in place"""
+        return bool(self.install_dir) and os.access(self.install_dir, os.W_OK)
+
+    def fetch_manifest(self, manifest_url, expected_version):
+        """
+        Download and validate a release manifest
+
+        Args:
+            manifest_url: URL of the release's manifest asset
+            expected_version: Version of the release the manifest belongs to
+
+        Raises:
+            ValueError: The manifest is malformed or describes another version
+        """
+        request = urllib.request.Request(manifest_url)
+        request.add_header('User-Agent', 'ezText-AutoUpdater')
+        with urllib.request.urlopen(request, timeout=30) as response:
+            manifest = json.loads(response.read().decode())
+        # The version also names the staging directory, so it must parse
+        if version.parse(str(manifest['version'])) != version.parse(expected_version):
+            raise ValueError(f"Update manifest is for version {manifest['version']}, "
+                             f"not {expected_version}")
+        for path, entry in manifest['files'].items():
+            _manifest_path(path)
+            if len(entry['sha256']) != 64:
+                raise ValueError(f"Invalid hash in update manifest for {path!r}")
+        manifest['url'] = manifest_url
+        return manifest
+
+    def plan_delta(self, manifest):
+        """
+        Files of a manifest that differ from the installed ones
+
+        Sizes are compared first, so only same-size files are hashed.
+
+        Returns:
+            list: Manifest paths to download
+        """
+        changed = []
+        for path, entry in manifest['files'].items():
+            installed = os.path.join(self.install_dir, _manifest_path(path))
+            try:
+                if os.path.getsize(installed) == entry.get('size') and file_sha256(installed) == entry['sha256']:
+                    continue
+            except OSError:
+                pass
+            changed.append(path)
+        return changed
+
+    def plan_removals(self, manifest):
+        """
+        Installed files the manifest no longer lists
+
+        Only subdirectories that hold bundle files (e.g. _internal) are
+        searched. The top level of the install directory also holds files
+        the installer writes (the uninstaller), which no manifest lists.
+
+        Returns:
+            list: Manifest-style paths to delete
+        """
+        listed = set(manifest['files'])
+        owned = {path.split('/', 1)[0] for path in listed if '/' in path}
+        removed = []
+        for top in sorted(owned - {STAGING_DIR}):
+            for root, dirs, names in os.walk(os.path.join(self.install_dir, top)):
+                dirs.sort()
+                for name in sorted(names):
+                    path = os.path.relpath(os.path.join(root, name), self.install_dir).replace(os.sep, '/')
+                    if path not in listed:
+                        removed.append(path)
+        return removed
+
+    def apply_delta(self, manifest, progress=None, cancel_event=None):
+        """
+        Download the changed files of a manifest and swap them in
+
+        Files the manifest no longer lists are removed in the same swap.
+
+        Args:
+            manifest: Manifest from fetch_manifest()
+            progress: Callback(downloaded, total) over all changed files
+            cancel_event: threading.Event that aborts the download phase
+
+        Returns:
+            int: Number of files replaced, added or removed
+
+        Raises:
+            DownloadCancelled, ValueError, OSError, urllib.error.URLError: The
+                install directory is left unchanged
+        """
+        with self._staging_lock:
+            # Normally done at startup already; a no-op then
+            self._recover_staging()
+            changed = self.plan_delta(manifest)
+            removed = self.plan_removals(manifest)
+            if not changed and not removed:
+                return 0
+            staging = os.path.join(self.install_dir, STAGING_DIR)
+            files_dir = os.path.join(staging, str(manifest['version']))
+            self._download_staged(manifest, changed, files_dir, progress, cancel_event)
+            self._swap(changed, removed, staging, files_dir)
+
+        # Backups of files in use (the running executable) can't be deleted
+        # yet; recover_staging() removes them on the next start
+        shutil.rmtree(staging, ignore_errors=True)
+        return len(changed) + len(removed)
+
+    def _download_staged(self, manifest, changed, files_dir, progress, cancel_event):
+        """
+        Download changed files into the staging directory
+
+        Staged files that already verify are reused, so an interrupted
+        update resumes where it stopped.
+        """
+        base_url = manifest.get('base_url') or urllib.parse.urljoin(manifest['url'], '.')
+        if not base_url.endswith('/'):
+            base_url += '/'
+
+        total = sum(manifest['files'][path].get('size') or 0 for path in changed)
+        done = 0
+        for path in changed:
+            entry = manifest['files'][path]
+            staged = os.path.join(files_dir, _manifest_path(path))
+            os.makedirs(os.path.dirname(staged), exist_ok=True)
+            url = entry.get('url') or urllib.parse.urljoin(base_url, urllib.parse.quote(path))
+            file_progress = None
+            if progress:
+                file_progress = lambda downloaded, _total, done=done: progress(done + downloaded, total)
+            download_file(url, staged, entry['sha256'], progress=file_progress, cancel_event=cancel_event)
+            done += entry.get('size') or 0
+
+    def _swap(self, changed, removed, staging, files_dir):
+        """
+        Move each installed file aside, then the staged one in
+
+        Removed files are only moved aside.
+
+        The journal is written before the first rename and removed after
+        the last one, so a swap is either complete or undone (here, or by
+        recover_staging() if the process dies in between).
+        """
+        backup_dir = tempfile.mkdtemp(prefix=BACKUP_PREFIX, dir=staging)
+        journal = {'backup_dir': os.path.basename(backup_dir), 'files': []}
+        for path in changed:
+            target = os.path.join(self.install_dir, _manifest_path(path))
+            journal['files'].append({'path': path, 'new': not os.path.exists(target)})
+        for path in removed:
+            journal['files'].append({'path': path, 'new': False, 'removed': True})
+        journal_path = os.path.join(staging, SWAP_JOURNAL)
+        atomic_write(journal_path, json.dumps(journal))
+
+        try:
+            for entry in journal['files']:
+                native = _manifest_path(entry['path'])
+                target = os.path.join(self.install_dir, native)
+                if entry['new']:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                else:
+                    backup = os.path.join(backup_dir, native)
+                    os.makedirs(os.path.dirname(backup), exist_ok=True)
+                    os.replace(target, backup)
+                if not entry.get('removed'):
+                    os.replace(os.path.join(files_dir, native), target)
+        except Exception:
+            if self._undo_swap(journal):
+                os.remove(journal_path)
+            raise
+        os.remove(journal_path)
+
+        # Directories emptied by removals go too
+        for path in removed:
+            directory = os.path.dirname(os.path.join(self.install_dir, _manifest_path(path)))
+            while os.path.normcase(directory) != os.path.normcase(self.install_dir):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+    def _undo_swap(self, journal):
+        """
+        Put back the files of a journaled swap, however far it got
+
+        Returns:
+            bool: True if every file was restored
+        """
+        backup_dir = os.path.join(self.install_dir, STAGING_DIR, journal['backup_dir'])
+        restored = True
+        for entry in reversed(journal['files']):
+            native = _manifest_path(entry['path'])
+            target = os.path.join(self.install_dir, native)
+            try:
+                if entry['new']:
+                    if os.path.exists(target):
+                        os.remove(target)
+                else:
+                    backup = os.path.join(backup_dir, native)
+                    # No backup: this file was not reached, the original is in place
+                    if os.path.exists(backup):
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(backup, target)
+            except OSError as e:
+                print(f"Error rolling back {target}: {e}")
+                restored = False
+        return restored
+
+    def recover_staging(self):
+        """
+        Finish or clean up after an earlier update; call on startup
+
+        First restores the original files of a swap that was interrupted
+        (the journal is still there), then deletes the staging leftovers:
+        backups, and staged downloads of versions that are not newer than
+        the running one. Staged downloads of a newer version are kept so
+        that an interrupted download resumes.
+        """
+        if not self.install_dir:
+            return
+        with self._staging_lock:
+            self._recover_staging()
+
+    def _recover_staging(self):
+        staging = os.path.join(self.install_dir, STAGING_DIR)
+        if not os.path.isdir(staging):
+            return
+
+        journal_path = os.path.join(staging, SWAP_JOURNAL)
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            backup_name = journal['backup_dir']
+            if os.path.basename(backup_name) != backup_name or not backup_name.startswith(BACKUP_PREFIX):
+                raise ValueError(f"Invalid backup directory {backup_name!r}")
+        except FileNotFoundError:
+            journal = None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Without a readable journal the backups are the only copy; keep them
+            print(f"Error reading the update swap journal; leaving {staging} alone: {e}")
+            return
+        if journal is not None:
+            print("Restoring files of an interrupted update")
+            if not self._undo_swap(journal):
+                return
+            os.remove(journal_path)
+
+        current = version.parse(self.current_version)
+        for name in os.listdir(staging):
+            path = os.path.join(staging, name)
+            if not name.startswith(BACKUP_PREFIX):
+                try:
+                    if version.parse(name) > current:
+                        continue
+                except version.InvalidVersion:
+                    pass
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        try:
+            os.rmdir(staging)
+        except OSError:
+            pass
+
     def download_and_install(self, download_url, silent=False):
         """
         Download and install the update (LEGACY - NOT USED)
@@ -158,3 +834,12 @@ class AutoUpdater:
             str: Current version
         """
         return self.current_version
+
+
+if __name__ == '__main__':
+    # Release tooling: python updater.py manifest <bundle dir> <version> [base url]
+    if len(sys.argv) >= 4 and sys.argv[1] == 'manifest':
+        print(json.dumps(build_manifest(sys.argv[2], sys.argv[3], *sys.argv[4:5]), indent=2))
+    else:
+        print("usage: python updater.py manifest <bundle dir> <version> [base url]")
+        sys.exit(2)